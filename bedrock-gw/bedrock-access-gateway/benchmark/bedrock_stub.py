@@ -0,0 +1,323 @@
+"""Local stand-in for the Bedrock APIs the gateway calls, for load tests.
+
+Usage (from the repository root of the gateway):
+
+    python benchmark/bedrock_stub.py --port 9001 --latency-ms 300 --tokens-per-second 80 --throttle-rate 0.02
+
+Serves the bedrock-runtime REST API (converse, converse-stream as AWS event stream,
+invoke_model for Cohere/Titan embeddings and Cohere rerank) and the two bedrock control
+plane calls made at startup (list_foundation_models, list_inference_profiles). Point the
+gateway at it with:
+
+    BEDROCK_ENDPOINT_URLS=us-east-1=http://127.0.0.1:9001 AWS_ENDPOINT_URL_BEDROCK=http://127.0.0.1:9001
+
+Responses are synthetic: chat models answer with OUTPUT_TOKENS words at TOKENS_PER_SECOND
+after LATENCY_MS, embeddings are deterministic per text. With --throttle-rate a fraction of
+calls (and with --max-concurrency every call over the limit) fails with ThrottlingException,
+like an exhausted Bedrock quota; --error-rate fails a fraction with a 503. GET /stats
+returns call counters per operation.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHAT_MODEL_ID = "anthropic.claude-3-sonnet-20240229-v1:0"
+CHAT_MODEL_IDS = (CHAT_MODEL_ID, "anthropic.claude-3-haiku-20240307-v1:0")
+COHERE_DIMENSIONS = 1024
+TITAN_DIMENSIONS = 1024
+
+MODEL_PATH = re.compile(r"^/model/(?P<model_id>[^/]+)/(?P<operation>converse|converse-stream|invoke)$")
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 300  # time to first token (chat) or to the response (invoke_model)
+    tokens_per_second: float = 80
+    output_tokens: int = 100  # capped by the request's maxTokens
+    invoke_latency_ms: float = 50
+    throttle_rate: float = 0.0
+    error_rate: float = 0.0  # fraction answered with ServiceUnavailableException (503)
+    max_concurrency: int = 0  # 0 = unlimited
+
+
+def _event_header(name: str, value: str) -> bytes:
+    name_bytes, value_bytes = name.encode("utf-8"), value.encode("utf-8")
+    # Header value type 7 = string
+    return struct.pack(">B", len(name_bytes)) + name_bytes + struct.pack(">BH", 7, len(value_bytes)) + value_bytes
+
+
+def encode_event(event_type: str, payload: dict) -> bytes:
+    """One application/vnd.amazon.eventstream message, as sent by converse_stream."""
+    headers = (
+        _event_header(":event-type", event_type)
+        + _event_header(":content-type", "application/json")
+        + _event_header(":message-type", "event")
+    )
+    body = json.dumps(payload).encode("utf-8")
+    prelude = struct.pack(">II", 12 + len(headers) + len(body) + 4, len(headers))
+    message = prelude + struct.pack(">I", zlib.crc32(prelude)) + headers + body
+    return message + struct.pack(">I", zlib.crc32(message))
+
+
+def _vector(text: str, dimensions: int) -> list[float]:
+    rnd = random.Random(hashlib.md5(text.encode("utf-8")).digest())
+    return [round(rnd.uniform(-1, 1), 6) for _ in range(dimensions)]
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class BedrockStub:
+    def __init__(self, config: StubConfig, host: str = "127.0.0.1", port: int = 0):
+        self.config = config
+        self.stats = {
+            "converse": 0, "converse_stream": 0, "invoke_model": 0, "throttled": 0, "errors": 0, "in_flight_max": 0
+        }
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive: botocore reuses pooled connections
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.handle_get(self)
+
+            def do_POST(self):
+                stub.handle_post(self)
+
+        ThreadingHTTPServer.request_queue_size = 1024
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="bedrock-stub", daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # --- requests ---
+
+    def handle_get(self, handler: BaseHTTPRequestHandler):
+        path = handler.path.split("?", 1)[0]
+        if path == "/foundation-models":
+            self._json(handler, 200, {"modelSummaries": [self._model_summary(m) for m in CHAT_MODEL_IDS]})
+        elif path == "/inference-profiles":
+            self._json(handler, 200, {"inferenceProfileSummaries": []})
+        elif path == "/stats":
+            with self._lock:
+                self._json(handler, 200, dict(self.stats))
+        else:
+            self._json(handler, 404, {"message": f"Unknown path {path}"})
+
+    def handle_post(self, handler: BaseHTTPRequestHandler):
+        body = json.loads(handler.rfile.read(int(handler.headers.get("Content-Length", 0))) or b"{}")
+        match = MODEL_PATH.match(handler.path)
+        if not match:
+            self._json(handler, 404, {"message": f"Unknown path {handler.path}"})
+            return
+        operation = {"converse": "converse", "converse-stream": "converse_stream", "invoke": "invoke_model"}[
+            match["operation"]
+        ]
+        with self._lock:
+            self.stats[operation] += 1
+            throttled = random.random() < self.config.throttle_rate or (
+                self.config.max_concurrency and self._in_flight >= self.config.max_concurrency
+            )
+            failed = not throttled and random.random() < self.config.error_rate
+            if throttled:
+                self.stats["throttled"] += 1
+            elif failed:
+                self.stats["errors"] += 1
+            else:
+                self._in_flight += 1
+                self.stats["in_flight_max"] = max(self.stats["in_flight_max"], self._in_flight)
+        if throttled:
+            self._error(handler, 429, "ThrottlingException", "Too many requests, please wait before trying again.")
+            return
+        if failed:
+            self._error(handler, 503, "ServiceUnavailableException", "Service unavailable, try again later.")
+            return
+        try:
+            if operation == "converse":
+                self._converse(handler, body)
+            elif operation == "converse_stream":
+                self._converse_stream(handler, body)
+            else:
+                self._invoke_model(handler, match["model_id"], body)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _output_tokens(self, body: dict) -> int:
+        max_tokens = body.get("inferenceConfig", {}).get("maxTokens")
+        return min(self.config.output_tokens, max_tokens) if max_tokens else self.config.output_tokens
+
+    def _usage(self, body: dict, output_tokens: int) -> dict:
+        input_tokens = _count_tokens(json.dumps(body.get("messages", [])) + json.dumps(body.get("system", [])))
+        return {"inputTokens": input_tokens, "outputTokens": output_tokens, "totalTokens": input_tokens + output_tokens}
+
+    def _converse(self, handler: BaseHTTPRequestHandler, body: dict):
+        output_tokens = self._output_tokens(body)
+        time.sleep(self.config.latency_ms / 1000 + output_tokens / self.config.tokens_per_second)
+        self._json(
+            handler,
+            200,
+            {
+                "output": {"message": {"role": "assistant", "content": [{"text": "token " * output_tokens}]}},
+                "stopReason": "end_turn",
+                "usage": self._usage(body, output_tokens),
+                "metrics": {"latencyMs": int(self.config.latency_ms)},
+            },
+        )
+
+    def _converse_stream(self, handler: BaseHTTPRequestHandler, body: dict):
+        output_tokens = self._output_tokens(body)
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/vnd.amazon.eventstream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def send(event_type: str, payload: dict):
+            message = encode_event(event_type, payload)
+            handler.wfile.write(f"{len(message):x}\r\n".encode() + message + b"\r\n")
+            handler.wfile.flush()
+
+        time.sleep(self.config.latency_ms / 1000)
+        send("messageStart", {"role": "assistant"})
+        interval = 1 / self.config.tokens_per_second
+        started = time.perf_counter()
+        for i in range(output_tokens):
+            # Paced against the start time so per-write overhead doesn't slow the token rate
+            delay = started + i * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            send("contentBlockDelta", {"contentBlockIndex": 0, "delta": {"text": "token "}})
+        send("contentBlockStop", {"contentBlockIndex": 0})
+        send("messageStop", {"stopReason": "end_turn"})
+        send("metadata", {"usage": self._usage(body, output_tokens), "metrics": {"latencyMs": int(self.config.latency_ms)}})
+        handler.wfile.write(b"0\r\n\r\n")
+        handler.wfile.flush()
+
+    def _invoke_model(self, handler: BaseHTTPRequestHandler, model_id: str, body: dict):
+        time.sleep(self.config.invoke_latency_ms / 1000)
+        if "query" in body:
+            # Cohere rerank: score by shared words with the query, deterministic
+            query_words = set(body["query"].lower().split())
+            scores = [
+                len(query_words & set(document.lower().split())) / (len(query_words) or 1) for document in body["documents"]
+            ]
+            ranked = sorted(range(len(scores)), key=lambda i: -scores[i])
+            response = {"id": "stub", "results": [{"index": i, "relevance_score": scores[i]} for i in ranked]}
+            input_tokens = _count_tokens(body["query"]) + sum(_count_tokens(d) for d in body["documents"])
+        elif "texts" in body:
+            embeddings = [_vector(text, body.get("output_dimension", COHERE_DIMENSIONS)) for text in body["texts"]]
+            if body.get("embedding_types"):
+                embeddings = {"float": embeddings}
+            response = {"id": "stub", "embeddings": embeddings, "texts": body["texts"], "response_type": "embeddings_floats"}
+            input_tokens = sum(_count_tokens(text) for text in body["texts"])
+        elif "inputText" in body:
+            input_tokens = _count_tokens(body["inputText"])
+            response = {
+                "embedding": _vector(body["inputText"], body.get("dimensions", TITAN_DIMENSIONS)),
+                "inputTextTokenCount": input_tokens,
+            }
+        else:
+            self._error(handler, 400, "ValidationException", f"Unsupported request body for {model_id}")
+            return
+        self._json(handler, 200, response, {"x-amzn-bedrock-input-token-count": str(input_tokens)})
+
+    # --- helpers ---
+
+    @staticmethod
+    def _model_summary(model_id: str) -> dict:
+        return {
+            "modelArn": f"arn:aws:bedrock:us-east-1::foundation-model/{model_id}",
+            "modelId": model_id,
+            "modelName": model_id,
+            "providerName": "Anthropic",
+            "inputModalities": ["TEXT", "IMAGE"],
+            "outputModalities": ["TEXT"],
+            "responseStreamingSupported": True,
+            "inferenceTypesSupported": ["ON_DEMAND"],
+            "modelLifecycle": {"status": "ACTIVE"},
+        }
+
+    @staticmethod
+    def _json(handler: BaseHTTPRequestHandler, status: int, body: dict, headers: dict | None = None):
+        data = json.dumps(body).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _error(self, handler: BaseHTTPRequestHandler, status: int, code: str, message: str):
+        # botocore reads the modeled error code from this header
+        self._json(handler, status, {"message": message}, {"x-amzn-ErrorType": f"{code}:http://internal.amazon.com/"})
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    defaults = StubConfig()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--output-tokens", type=int, default=defaults.output_tokens, help="Tokens per chat answer")
+    parser.add_argument("--invoke-latency-ms", type=float, default=defaults.invoke_latency_ms,
+                        help="Latency of embeddings and rerank calls")
+    parser.add_argument("--throttle-rate", type=float, default=defaults.throttle_rate,
+                        help="Fraction of calls answered with ThrottlingException")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate,
+                        help="Fraction of calls answered with ServiceUnavailableException (503)")
+    parser.add_argument("--max-concurrency", type=int, default=defaults.max_concurrency,
+                        help="Calls in flight above this are throttled (0 = unlimited)")
+
+
+def stub_config(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        latency_ms=args.latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        invoke_latency_ms=args.invoke_latency_ms,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        max_concurrency=args.max_concurrency,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Bedrock stub for gateway load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    stub = BedrockStub(stub_config(args), args.host, args.port)
+    print(f"Bedrock stub listening on {stub.url}", flush=True)
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark embeddings response building: Pydantic models vs the float32 matrix + orjson path.
+
+Usage (from the repository root of the gateway):
+
+    API_KEY=bench AWS_REGION=us-east-1 python benchmark/bench_embeddings_response.py
+
+No Bedrock calls are made; the decoded Bedrock body is simulated with random 1024-dim vectors.
+Both paths start from the raw JSON body so the decode cost is included.
+"""
+
+import base64
+import json
+import os
+import sys
+import timeit
+
+import numpy as np
+import orjson
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from api.models.bedrock import TitanEmbeddingsModel  # noqa: E402
+from api.schema import Embedding, EmbeddingsResponse, EmbeddingsUsage  # noqa: E402
+
+DIMENSIONS = 1024
+BATCH_SIZES = (1, 64, 512)
+REPEAT = 5
+
+
+def pydantic_response(raw_body: bytes, encoding_format: str) -> bytes:
+    """The previous implementation: one Pydantic Embedding per vector, base64 per row via a copy."""
+    embeddings = json.loads(raw_body)["embeddings"]
+    data = []
+    for i, embedding in enumerate(embeddings):
+        if encoding_format == "base64":
+            arr = np.array(embedding, dtype=np.float32)
+            data.append(Embedding(index=i, embedding=base64.b64encode(arr.tobytes())))
+        else:
+            data.append(Embedding(index=i, embedding=embedding))
+    response = EmbeddingsResponse(
+        data=data, model="bench", usage=EmbeddingsUsage(prompt_tokens=0, total_tokens=0)
+    )
+    return response.model_dump_json().encode("utf-8")
+
+
+def matrix_response(model: TitanEmbeddingsModel, raw_body: bytes, encoding_format: str) -> bytes:
+    embeddings = orjson.loads(raw_body)["embeddings"]
+    return model._create_response(embeddings=embeddings, model="bench", encoding_format=encoding_format).body
+
+
+def main():
+    model = TitanEmbeddingsModel()
+    rng = np.random.default_rng(0)
+    print(f"{'inputs':>7} {'format':>7} {'pydantic ms':>12} {'matrix ms':>10} {'speedup':>8}")
+    for batch_size in BATCH_SIZES:
+        vectors = rng.standard_normal((batch_size, DIMENSIONS)).astype(np.float32).tolist()
+        raw_body = json.dumps({"embeddings": vectors}).encode("utf-8")
+        number = max(1, 512 // batch_size)
+        for encoding_format in ("float", "base64"):
+            legacy = min(
+                timeit.repeat(lambda: pydantic_response(raw_body, encoding_format), number=number, repeat=REPEAT)
+            )
+            fast = min(
+                timeit.repeat(
+                    lambda: matrix_response(model, raw_body, encoding_format), number=number, repeat=REPEAT
+                )
+            )
+            legacy_ms = legacy / number * 1000
+            fast_ms = fast / number * 1000
+            print(f"{batch_size:>7} {encoding_format:>7} {legacy_ms:>12.2f} {fast_ms:>10.2f} {legacy_ms / fast_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
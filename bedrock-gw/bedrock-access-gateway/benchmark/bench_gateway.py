@@ -0,0 +1,365 @@
+"""Load test the gateway against a local Bedrock stub: RPS, TTFT and p50/p99 per route and concurrency.
+
+Usage (from the repository root of the gateway):
+
+    python benchmark/bench_gateway.py --concurrency 1,8,32,64 --duration 20 \
+        --mix chat=1,stream=2,embeddings=1,rerank=1 --latency-ms 300 --tokens-per-second 80
+
+Starts benchmark/bedrock_stub.py and the gateway (uvicorn api.app:app) as separate processes,
+so neither shares the load generator's event loop or GIL, then drives each concurrency level
+for --duration seconds with a weighted mix of /chat/completions (plain and streaming),
+/embeddings and /rerank. TTFT is the time to the first streamed content token.
+
+The stub flags (--latency-ms, --tokens-per-second, --output-tokens, --invoke-latency-ms,
+--throttle-rate, --error-rate, --max-concurrency) shape the simulated Bedrock; see bedrock_stub.py.
+Gateway settings come from the environment as usual, so pool sizes, admission control or
+hedging can be compared between runs, e.g. CHAT_STREAM_POOL_SIZE=64 python benchmark/...
+Every region in BEDROCK_REGIONS / RERANK_REGIONS is pointed at the stub.
+
+Inputs are unique per request so the completion/rerank caches and request coalescing don't
+hide Bedrock calls; --repeat-inputs sends identical payloads to measure them instead.
+--output writes the per-level results as JSON.
+
+Requires httpx (pip install httpx), which the gateway itself doesn't use.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from dataclasses import dataclass
+
+import httpx
+import orjson
+from bedrock_stub import CHAT_MODEL_ID, add_stub_arguments
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+API_KEY = "bench"
+API_ROUTE_PREFIX = "/api/v1"
+EMBEDDING_MODEL_ID = "cohere.embed-multilingual-v3"
+RERANK_MODEL_ID = "cohere.rerank-v3-5:0"
+ROUTES = ("chat", "stream", "embeddings", "rerank")
+STARTUP_TIMEOUT = 120  # seconds; the gateway lists models and loads tiktoken on import
+
+
+@dataclass
+class Sample:
+    route: str
+    status: int  # 0 for client-side errors (timeouts, dropped connections)
+    latency: float
+    ttft: float | None = None
+
+
+def percentile(values: list[float], p: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        route, _, weight = item.strip().partition("=")
+        if route not in ROUTES:
+            raise argparse.ArgumentTypeError(f"Unknown route {route!r}, expected one of {', '.join(ROUTES)}")
+        weights[route] = float(weight or 1)
+    return {route: weight for route, weight in weights.items() if weight > 0}
+
+
+# --- requests ---
+
+
+def request_body(route: str, n: int, args: argparse.Namespace) -> tuple[str, dict]:
+    if args.repeat_inputs:
+        n = 0
+    if route in ("chat", "stream"):
+        return "/chat/completions", {
+            "model": CHAT_MODEL_ID,
+            "messages": [{"role": "user", "content": f"Request {n}: summarize the minutes of the last meeting."}],
+            "stream": route == "stream",
+            # Deterministic, so repeated inputs can hit the completion cache and be coalesced
+            "temperature": 0,
+        }
+    if route == "embeddings":
+        return "/embeddings", {
+            "model": EMBEDDING_MODEL_ID,
+            "input": [f"Request {n}, chunk {i}: the board approved the annual budget." for i in range(args.embeddings_batch)],
+        }
+    return "/rerank", {
+        "model": RERANK_MODEL_ID,
+        "query": f"request {n} budget approval",
+        "documents": [f"Document {i} about budget approval number {n + i}" for i in range(args.rerank_documents)],
+        "top_n": 3,
+    }
+
+
+async def send(client: httpx.AsyncClient, route: str, n: int, args: argparse.Namespace) -> Sample:
+    path, body = request_body(route, n, args)
+    started = time.perf_counter()
+    ttft = None
+    try:
+        if route != "stream":
+            response = await client.post(path, json=body)
+            return Sample(route, response.status_code, time.perf_counter() - started)
+        async with client.stream("POST", path, json=body) as response:
+            async for line in response.aiter_lines():
+                if ttft is None and line.startswith("data: ") and line != "data: [DONE]":
+                    choices = orjson.loads(line[6:]).get("choices")
+                    if choices and choices[0].get("delta", {}).get("content"):
+                        ttft = time.perf_counter() - started
+            return Sample(route, response.status_code, time.perf_counter() - started, ttft)
+    except httpx.HTTPError:
+        return Sample(route, 0, time.perf_counter() - started)
+
+
+async def run_level(
+    client: httpx.AsyncClient, args: argparse.Namespace, concurrency: int, counter: list[int]
+) -> tuple[list[Sample], float]:
+    rnd = random.Random(concurrency)
+    routes, weights = list(args.mix), list(args.mix.values())
+    samples: list[Sample] = []
+    started = time.perf_counter()
+    deadline = started + args.duration
+
+    async def user():
+        while time.perf_counter() < deadline:
+            counter[0] += 1
+            samples.append(await send(client, rnd.choices(routes, weights)[0], counter[0], args))
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+async def warm_up(client: httpx.AsyncClient, args: argparse.Namespace, counter: list[int]):
+    """One request per route, so a misconfiguration fails fast instead of as a table of errors."""
+    for route in args.mix:
+        counter[0] += 1
+        path, body = request_body(route, counter[0], args)
+        response = await client.post(path, json=body)
+        if response.status_code != 200:
+            raise SystemExit(f"Warm-up {route} request failed with {response.status_code}: {response.text[:500]}")
+
+
+# --- reporting ---
+
+
+def summarize(samples: list[Sample], elapsed: float, routes: list[str]) -> list[dict]:
+    rows = []
+    for route in [*routes, "all"]:
+        group = [s for s in samples if route in ("all", s.route)]
+        ok = [s for s in group if s.status == 200]
+        ttfts = [s.ttft for s in ok if s.ttft is not None]
+        latencies = [s.latency for s in ok]
+        rows.append(
+            {
+                "route": route,
+                "requests": len(group),
+                "errors": len(group) - len(ok),
+                "throttled": sum(1 for s in group if s.status == 429),
+                "rps": len(ok) / elapsed,
+                "ttft_p50": percentile(ttfts, 0.5),
+                "ttft_p99": percentile(ttfts, 0.99),
+                "p50": percentile(latencies, 0.5),
+                "p99": percentile(latencies, 0.99),
+            }
+        )
+    return rows
+
+
+def print_level(concurrency: int, elapsed: float, rows: list[dict], stub_calls: dict | None, queue_wait: dict | None):
+    total = rows[-1]
+    print(f"\nconcurrency {concurrency}: {total['requests']} requests in {elapsed:.1f}s")
+    print(
+        f"{'route':<12} {'requests':>9} {'errors':>7} {'429':>5} {'req/s':>8} "
+        f"{'ttft p50':>9} {'ttft p99':>9} {'p50 ms':>8} {'p99 ms':>8}"
+    )
+
+    def ms(value: float | None) -> str:
+        return f"{value * 1000:.0f}" if value is not None else "-"
+
+    for row in rows:
+        print(
+            f"{row['route']:<12} {row['requests']:>9} {row['errors']:>7} {row['throttled']:>5} {row['rps']:>8.1f} "
+            f"{ms(row['ttft_p50']):>9} {ms(row['ttft_p99']):>9} {ms(row['p50']):>8} {ms(row['p99']):>8}"
+        )
+    if stub_calls:
+        print("bedrock calls: " + ", ".join(f"{name} {count}" for name, count in stub_calls.items()))
+    if queue_wait:
+        print("pool queue wait avg ms: " + ", ".join(f"{name} {wait:.1f}" for name, wait in queue_wait.items()))
+
+
+def get_json(url: str, headers: dict | None = None) -> dict | None:
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {}), timeout=5) as response:
+            return json.loads(response.read())
+    except OSError:
+        return None
+
+
+def stub_calls_delta(before: dict | None, after: dict | None) -> dict | None:
+    if not before or not after:
+        return None
+    counters = ("converse", "converse_stream", "invoke_model", "throttled", "errors")
+    return {name: after[name] - before[name] for name in counters}
+
+
+def queue_wait_delta(before: dict | None, after: dict | None) -> dict | None:
+    """Average executor queue wait per pool during one level, from the cumulative /metrics snapshots."""
+    if not before or not after:
+        return None
+    waits = {}
+    for name, pool in after["pools"].items():
+        previous = before["pools"][name]
+        started = pool["completed"] + pool["active"]
+        previous_started = previous["completed"] + previous["active"]
+        if started > previous_started:
+            total_wait = pool["avg_queue_wait_ms"] * started - previous["avg_queue_wait_ms"] * previous_started
+            waits[name] = total_wait / (started - previous_started)
+    return waits
+
+
+# --- processes ---
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_process(name: str, command: list[str], env: dict, ready_url: str, log_path: str) -> subprocess.Popen:
+    log = open(log_path, "w")
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        if get_json(ready_url) is not None:
+            return process
+        time.sleep(0.5)
+    process.kill()
+    with open(log_path) as f:
+        output = f.read()[-3000:]
+    raise SystemExit(f"{name} did not start, log ({log_path}):\n{output}")
+
+
+def gateway_env(stub_url: str) -> dict:
+    env = {k: v for k, v in os.environ.items() if k not in ("AWS_PROFILE", "API_KEY_PARAM_NAME", "API_KEY_SECRET_ARN")}
+    bedrock_regions = env.setdefault("BEDROCK_REGIONS", "us-east-1")
+    rerank_regions = env.setdefault("RERANK_REGIONS", "us-east-1")
+    regions = {r.strip() for r in f"{bedrock_regions},{rerank_regions}".split(",") if r.strip()}
+    env.update(
+        {
+            "API_KEY": API_KEY,
+            "AWS_REGION": env.get("AWS_REGION", "us-east-1"),
+            "DEFAULT_MODEL": CHAT_MODEL_ID,
+            "BEDROCK_ENDPOINT_URLS": ",".join(f"{region}={stub_url}" for region in sorted(regions)),
+            # Control plane client (list_foundation_models at startup)
+            "AWS_ENDPOINT_URL_BEDROCK": stub_url,
+            "AWS_ACCESS_KEY_ID": "bench",
+            "AWS_SECRET_ACCESS_KEY": "bench",
+            "AWS_EC2_METADATA_DISABLED": "true",
+        }
+    )
+    env.pop("AWS_SESSION_TOKEN", None)
+    return env
+
+
+async def run(args: argparse.Namespace, gateway_url: str, stub_url: str | None) -> list[dict]:
+    headers = {"Authorization": f"Bearer {API_KEY}"}
+    metrics_url = f"{gateway_url}{API_ROUTE_PREFIX}/metrics"
+    counter = [0]
+    results = []
+    for concurrency in args.concurrency:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(
+            base_url=f"{gateway_url}{API_ROUTE_PREFIX}", headers=headers, limits=limits, timeout=args.timeout
+        ) as client:
+            if not results:
+                await warm_up(client, args, counter)
+            stub_before = get_json(f"{stub_url}/stats") if stub_url else None
+            metrics_before = get_json(metrics_url, headers)
+            samples, elapsed = await run_level(client, args, concurrency, counter)
+            stub_calls = stub_calls_delta(stub_before, get_json(f"{stub_url}/stats") if stub_url else None)
+            queue_wait = queue_wait_delta(metrics_before, get_json(metrics_url, headers))
+        rows = summarize(samples, elapsed, list(args.mix))
+        print_level(concurrency, elapsed, rows, stub_calls, queue_wait)
+        results.append(
+            {
+                "concurrency": concurrency,
+                "elapsed": elapsed,
+                "routes": rows,
+                "bedrock_calls": stub_calls,
+                "pool_queue_wait_ms": queue_wait,
+            }
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gateway load test against a local Bedrock stub")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per concurrency level")
+    parser.add_argument("--mix", type=parse_mix, default="chat=1,stream=2,embeddings=1,rerank=1",
+                        help="Route weights: chat, stream, embeddings, rerank")
+    parser.add_argument("--embeddings-batch", type=int, default=8, help="Texts per embeddings request")
+    parser.add_argument("--rerank-documents", type=int, default=20, help="Documents per rerank request")
+    parser.add_argument("--repeat-inputs", action="store_true", help="Identical payloads, to measure caches")
+    parser.add_argument("--timeout", type=float, default=300, help="Client timeout per request, seconds")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes for the gateway")
+    parser.add_argument("--gateway-url", help="Load an already running gateway instead of starting one")
+    parser.add_argument("--stub-url", help="With --gateway-url: the stub it uses, to report Bedrock calls")
+    parser.add_argument("--output", help="Write the results as JSON")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    processes = []
+    log_dir = tempfile.mkdtemp(prefix="bench_gateway_")
+    try:
+        if args.gateway_url:
+            gateway_url, stub_url = args.gateway_url.rstrip("/"), args.stub_url
+        else:
+            stub_port, gateway_port = free_port(), free_port()
+            stub_url = f"http://127.0.0.1:{stub_port}"
+            stub_command = [sys.executable, "benchmark/bedrock_stub.py", "--port", str(stub_port)]
+            for flag in ("latency_ms", "tokens_per_second", "output_tokens", "invoke_latency_ms", "throttle_rate",
+                         "error_rate", "max_concurrency"):
+                stub_command += [f"--{flag.replace('_', '-')}", str(getattr(args, flag))]
+            processes.append(
+                start_process("Bedrock stub", stub_command, os.environ.copy(), f"{stub_url}/stats",
+                              os.path.join(log_dir, "stub.log"))
+            )
+            gateway_url = f"http://127.0.0.1:{gateway_port}"
+            gateway_command = [
+                sys.executable, "-m", "uvicorn", "api.app:app", "--app-dir", "src", "--host", "127.0.0.1",
+                "--port", str(gateway_port), "--workers", str(args.workers), "--no-access-log",
+            ]  # fmt: skip
+            processes.append(
+                start_process("Gateway", gateway_command, gateway_env(stub_url), f"{gateway_url}/health",
+                              os.path.join(log_dir, "gateway.log"))
+            )
+            print(f"Bedrock stub at {stub_url}, gateway at {gateway_url}, logs in {log_dir}")
+
+        results = asyncio.run(run(args, gateway_url, stub_url))
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait(timeout=30)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"settings": vars(args), "levels": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from api.setting import (
+    ADMISSION_INITIAL_LIMIT,
+    ADMISSION_LATENCY_TARGET_MS,
+    ADMISSION_MAX_LIMIT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_MIN_LIMIT,
+    ADMISSION_QUEUE_TIMEOUT_MS,
+    ADMISSION_TOKENS_PER_MINUTE,
+    ENABLE_ADMISSION_CONTROL,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _reject(detail: str, retry_after: int = 1) -> HTTPException:
+    return HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
+class ModelLimiter:
+    """Admission control for a single model id.
+
+    - AIMD concurrency limit: +1/limit per successful call, halved on throttling and
+      reduced by 10% when latency exceeds ADMISSION_LATENCY_TARGET_MS (if set). Other
+      failures leave the limit unchanged.
+    - Optional tokens-per-minute bucket checked on arrival using the request's estimate,
+      and refunded if the request is shed before it gets a slot.
+    - Requests over the limit wait in per-user FIFO queues served round-robin, and are
+      rejected with 429 once the queue is full or their deadline passes.
+
+    All methods run on the event loop, so no locking is needed.
+    """
+
+    def __init__(self, model_id: str, tokens_per_minute: int = 0):
+        self.model_id = model_id
+        self.limit = float(ADMISSION_INITIAL_LIMIT)
+        self.inflight = 0
+        self.queued = 0
+        self.queues: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()
+        self.tokens_per_minute = tokens_per_minute
+        self.tokens = float(tokens_per_minute)
+        self.refilled_at = time.monotonic()
+        self.admitted = 0
+        self.rejected = 0
+        self.throttled = 0
+
+    def _take_tokens(self, tokens: int) -> bool:
+        if self.tokens_per_minute <= 0:
+            return True
+        now = time.monotonic()
+        self.tokens = min(
+            self.tokens_per_minute, self.tokens + (now - self.refilled_at) * self.tokens_per_minute / 60
+        )
+        self.refilled_at = now
+        # A single request larger than the whole budget would never fit otherwise
+        tokens = min(tokens, self.tokens_per_minute)
+        if tokens > self.tokens:
+            return False
+        self.tokens -= tokens
+        return True
+
+    def _refund_tokens(self, tokens: int):
+        """Give back the estimate of a request that never reached Bedrock."""
+        if self.tokens_per_minute > 0:
+            self.tokens = min(self.tokens_per_minute, self.tokens + min(tokens, self.tokens_per_minute))
+
+    def _remove(self, user: str, waiter: asyncio.Future):
+        queue = self.queues.get(user)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            self.queued -= 1
+            if not queue:
+                del self.queues[user]
+
+    def _dispatch(self):
+        while self.inflight < int(self.limit) and self.queues:
+            user, queue = next(iter(self.queues.items()))
+            waiter = queue.popleft()
+            self.queued -= 1
+            if queue:
+                # Next user gets the following slot
+                self.queues.move_to_end(user)
+            else:
+                del self.queues[user]
+            if waiter.done():
+                continue
+            self.inflight += 1
+            waiter.set_result(None)
+
+    async def acquire(self, tokens: int, user: str):
+        if not self._take_tokens(tokens):
+            self.rejected += 1
+            raise _reject(f"Token budget exceeded for model {self.model_id}", retry_after=60)
+        if self.inflight < int(self.limit) and not self.queued:
+            self.inflight += 1
+            self.admitted += 1
+            return
+        if self.queued >= ADMISSION_MAX_QUEUE:
+            self._refund_tokens(tokens)
+            self.rejected += 1
+            raise _reject(f"Too many queued requests for model {self.model_id}")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.queues.setdefault(user, deque()).append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter, timeout=ADMISSION_QUEUE_TIMEOUT_MS / 1000)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as the wait timed out: hand it to the next waiter
+                self.inflight -= 1
+                self._dispatch()
+            else:
+                self._remove(user, waiter)
+            self._refund_tokens(tokens)
+            self.rejected += 1
+            raise _reject(f"Request for model {self.model_id} timed out waiting for capacity")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just before the client went away
+                self.inflight -= 1
+                self._dispatch()
+            else:
+                self._remove(user, waiter)
+            self._refund_tokens(tokens)
+            raise
+        self.admitted += 1
+
+    def release(self, latency: float, throttled: bool, failed: bool = False):
+        """Free the slot and adapt the limit: halve on throttling, grow only on success."""
+        self.inflight -= 1
+        if throttled:
+            self.throttled += 1
+            self.limit = max(ADMISSION_MIN_LIMIT, self.limit / 2)
+        elif failed:
+            # Errors (validation, 5xx, client gone) say nothing about spare capacity
+            pass
+        elif ADMISSION_LATENCY_TARGET_MS and latency * 1000 > ADMISSION_LATENCY_TARGET_MS:
+            self.limit = max(ADMISSION_MIN_LIMIT, self.limit * 0.9)
+        else:
+            self.limit = min(ADMISSION_MAX_LIMIT, self.limit + 1 / self.limit)
+        self._dispatch()
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+        }
+
+
+class AdmissionController:
+    """Per-model admission control, enabled with ENABLE_ADMISSION_CONTROL."""
+
+    def __init__(self):
+        self.limiters: dict[str, ModelLimiter] = {}
+
+    def _limiter(self, model_id: str) -> ModelLimiter:
+        limiter = self.limiters.get(model_id)
+        if limiter is None:
+            tokens_per_minute = ADMISSION_TOKENS_PER_MINUTE.get(model_id, ADMISSION_TOKENS_PER_MINUTE.get("*", 0))
+            limiter = self.limiters[model_id] = ModelLimiter(model_id, tokens_per_minute)
+        return limiter
+
+    @asynccontextmanager
+    async def admit(self, model_id: str, estimated_tokens: int = 0, user: str | None = None):
+        """Hold a concurrency slot for model_id for the duration of the block.
+
+        Raises HTTPException(429) when the request is shed. A 429 raised inside the block is
+        treated as a Bedrock throttle and shrinks the limit; any other error leaves it as is.
+        """
+        if not ENABLE_ADMISSION_CONTROL:
+            yield
+            return
+        limiter = self._limiter(model_id)
+        await limiter.acquire(estimated_tokens, user or "")
+        start = time.monotonic()
+        throttled = failed = False
+        try:
+            yield
+        except HTTPException as e:
+            throttled = e.status_code == 429
+            failed = True
+            raise
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            limiter.release(time.monotonic() - start, throttled, failed)
+
+    def stats(self) -> dict:
+        return {model_id: limiter.stats() for model_id, limiter in self.limiters.items()}
+
+
+admission = AdmissionController()
@@ -8,7 +8,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import PlainTextResponse
 from mangum import Mangum
 
-from api.routers import chat, embeddings, model, rerank
+from api.routers import chat, embeddings, metrics, model, rerank
 from api.setting import API_ROUTE_PREFIX, DESCRIPTION, SUMMARY, TITLE, VERSION
 
 config = {
@@ -44,6 +44,7 @@ app.include_router(model.router, prefix=API_ROUTE_PREFIX)
 app.include_router(chat.router, prefix=API_ROUTE_PREFIX)
 app.include_router(embeddings.router, prefix=API_ROUTE_PREFIX)
 app.include_router(rerank.router, prefix=API_ROUTE_PREFIX)
+app.include_router(metrics.router, prefix=API_ROUTE_PREFIX)
 
 
 @app.get("/health")
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def hash_text(text: str) -> str:
+    """Return a stable hex digest used as a cache key component."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def canonical_hash(value: Any) -> str:
+    """Hash a JSON-like structure independently of dict key order.
+
+    Binary values (e.g. image bytes in converse messages) are hashed rather than embedded.
+    """
+
+    def default(obj):
+        if isinstance(obj, (bytes, bytearray)):
+            return {"__bytes__": hashlib.sha256(obj).hexdigest()}
+        return str(obj)
+
+    return hash_text(json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=default))
+
+
+class TTLCache:
+    """Thread-safe in-memory cache with a per-entry TTL and LRU eviction.
+
+    A max_size of 0 disables the cache: get always misses and set is a no-op.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CompletionCache:
+    """Two-tier cache for JSON-serializable chat completions.
+
+    The in-memory TTLCache is checked first; when redis_url is set, entries are also shared
+    through Redis so that all gateway replicas benefit. Redis errors are logged and treated
+    as misses so the cache can never fail a request.
+    """
+
+    def __init__(self, max_size: int, ttl: int, redis_url: str = "", prefix: str = "bedrock-gw:completion:"):
+        self.memory = TTLCache(max_size, ttl)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.redis_hits = 0
+        self.redis = None
+        if redis_url:
+            try:
+                import redis.asyncio as redis_asyncio
+            except ImportError:
+                logger.warning("COMPLETION_CACHE_REDIS_URL is set but the redis package is not installed")
+            else:
+                self.redis = redis_asyncio.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    async def get(self, key: str) -> dict | None:
+        value = self.memory.get(key)
+        if value is not None or self.redis is None:
+            return value
+        try:
+            raw = await self.redis.get(self.prefix + key)
+        except Exception as e:
+            logger.warning("Completion cache: Redis get failed: %s", e)
+            return None
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        self.redis_hits += 1
+        self.memory.set(key, value)
+        return value
+
+    async def set(self, key: str, value: dict):
+        self.memory.set(key, value)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+        except Exception as e:
+            logger.warning("Completion cache: Redis set failed: %s", e)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.memory),
+            "memory_hits": self.memory.hits,
+            "redis_hits": self.redis_hits,
+            # Memory misses that Redis answered are hits overall
+            "misses": self.memory.misses - self.redis_hits,
+            "redis": self.redis is not None,
+        }
+
+
+class PromptCacheStats:
+    """Per-model Bedrock prompt cache usage: uncached input, cache read and cache write tokens."""
+
+    def __init__(self):
+        self._models: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_id: str, input_tokens: int, cache_read_tokens: int, cache_write_tokens: int):
+        with self._lock:
+            counters = self._models.setdefault(
+                model_id, {"requests": 0, "input_tokens": 0, "cache_read_tokens": 0, "cache_write_tokens": 0}
+            )
+            counters["requests"] += 1
+            counters["input_tokens"] += input_tokens
+            counters["cache_read_tokens"] += cache_read_tokens
+            counters["cache_write_tokens"] += cache_write_tokens
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = {}
+            for model_id, counters in self._models.items():
+                prompt_tokens = (
+                    counters["input_tokens"] + counters["cache_read_tokens"] + counters["cache_write_tokens"]
+                )
+                result[model_id] = {
+                    **counters,
+                    "read_ratio": round(counters["cache_read_tokens"] / prompt_tokens, 4) if prompt_tokens else 0.0,
+                    "write_ratio": round(counters["cache_write_tokens"] / prompt_tokens, 4) if prompt_tokens else 0.0,
+                }
+            return result
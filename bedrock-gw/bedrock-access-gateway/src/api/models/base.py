@@ -4,6 +4,8 @@ import uuid
 from abc import ABC, abstractmethod
 from typing import AsyncIterable
 
+from fastapi.responses import Response
+
 from api.schema import (
     # Chat
     ChatRequest,
@@ -33,13 +35,19 @@ class BaseChatModel(ABC):
         pass
 
     @abstractmethod
-    async def chat(self, chat_request: ChatRequest) -> ChatResponse:
-        """Handle a basic chat completion requests."""
+    async def chat(self, chat_request: ChatRequest, cache_mode: str | None = None) -> ChatResponse:
+        """Handle a basic chat completion requests.
+
+        cache_mode is the X-Completion-Cache header value ("on", "off" or None).
+        """
         pass
 
     @abstractmethod
-    async def chat_stream(self, chat_request: ChatRequest) -> AsyncIterable[bytes]:
-        """Handle a basic chat completion requests with stream response."""
+    async def chat_stream(self, chat_request: ChatRequest, cache_mode: str | None = None) -> AsyncIterable[bytes]:
+        """Handle a basic chat completion requests with stream response.
+
+        cache_mode is the X-Completion-Cache header value ("on", "off" or None).
+        """
         pass
 
     @staticmethod
@@ -70,6 +78,9 @@ class BaseEmbeddingsModel(ABC):
     """
 
     @abstractmethod
-    def embed(self, embeddings_request: EmbeddingsRequest) -> EmbeddingsResponse:
-        """Handle a basic embeddings request."""
+    async def embed(self, embeddings_request: EmbeddingsRequest) -> EmbeddingsResponse | Response:
+        """Handle a basic embeddings request.
+
+        May return a pre-serialized Response whose body follows the EmbeddingsResponse schema.
+        """
         pass
@@ -1,20 +1,31 @@
+import asyncio
 import base64
+import functools
 import json
 import logging
 import re
+import threading
 import time
 import uuid
 from abc import ABC
-from typing import AsyncIterable, Iterable, Literal
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from typing import AsyncIterable, Callable, Iterable, Literal
 
 import boto3
 import numpy as np
+import orjson
 import requests
 import tiktoken
 from botocore.config import Config
+from botocore.exceptions import ClientError, ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError
 from fastapi import HTTPException
+from fastapi.responses import Response
 from starlette.concurrency import run_in_threadpool
 
+from api.admission import admission
+from api.cache import CompletionCache, PromptCacheStats, TTLCache, canonical_hash, hash_text
 from api.models.base import BaseChatModel, BaseEmbeddingsModel
 from api.schema import (
     AssistantMessage,
@@ -26,10 +37,7 @@ from api.schema import (
     ChoiceDelta,
     CompletionTokensDetails,
     DeveloperMessage,
-    Embedding,
     EmbeddingsRequest,
-    EmbeddingsResponse,
-    EmbeddingsUsage,
     Error,
     ErrorMessage,
     Function,
@@ -48,14 +56,34 @@ from api.schema import (
 )
 from api.setting import (
     AWS_REGION,
+    BEDROCK_ENDPOINT_URLS,
+    BEDROCK_REGIONS,
+    CHAT_POOL_SIZE,
+    CHAT_STREAM_POOL_SIZE,
+    COMPLETION_CACHE_REDIS_URL,
+    COMPLETION_CACHE_SIZE,
+    COMPLETION_CACHE_TTL,
     DEBUG,
     DEFAULT_MODEL,
     DEFAULT_RERANK_MODEL,
-    ENABLE_CROSS_REGION_INFERENCE,
+    EMBEDDINGS_MAX_CONCURRENCY,
+    EMBEDDINGS_POOL_SIZE,
     ENABLE_APPLICATION_INFERENCE_PROFILES,
+    ENABLE_COMPLETION_CACHE,
+    ENABLE_CROSS_REGION_INFERENCE,
+    ENABLE_HEDGED_REQUESTS,
     ENABLE_PROMPT_CACHING,
-    RERANK_REGION,
+    ENABLE_REQUEST_COALESCING,
+    HEDGE_DEFAULT_DELAY_MS,
+    HEDGE_MIN_DELAY_MS,
+    REGION_COOLDOWN_SECONDS,
+    RERANK_CACHE_SIZE,
+    RERANK_CACHE_TTL,
+    RERANK_POOL_SIZE,
+    RERANK_REGIONS,
+    RERANK_USAGE_MODE,
 )
+from api.singleflight import SharedStream, SingleFlight, StreamFlight
 
 logger = logging.getLogger(__name__)
 
@@ -69,18 +97,13 @@ config = Config(
             max_pool_connections=50  # Maximum connection pool size
         )
 
-bedrock_runtime = boto3.client(
-    service_name="bedrock-runtime",
-    region_name=AWS_REGION,
-    config=config,
-)
 bedrock_client = boto3.client(
     service_name="bedrock",
     region_name=AWS_REGION,
     config=config,
 )
 
-# Separate client for rerank - targets RERANK_REGION (us-east-1) where Cohere Rerank is available
+# Separate config for rerank clients - they target RERANK_REGIONS (us-east-1) where Cohere Rerank is available
 rerank_config = Config(
     connect_timeout=60,
     read_timeout=120,
@@ -91,23 +114,300 @@ rerank_config = Config(
     max_pool_connections=10,
 )
 
-bedrock_rerank_runtime = boto3.client(
-    service_name="bedrock-runtime",
-    region_name=RERANK_REGION,
-    config=rerank_config,
+# With more than one region, fail over to the next region quickly instead of
+# spending minutes in adaptive retries against a throttling one.
+failover_retries = Config(retries={'max_attempts': 2, 'mode': 'standard'})
+
+# Error codes worth retrying in another region. Anything else (validation, access denied...)
+# would fail the same way everywhere.
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "ServiceUnavailableException",
+    "InternalServerException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+}
+
+
+class RegionHealth:
+    """Rolling latency window and EWMA error rate for one region.
+
+    A retryable failure starts a cooldown. Once it is over the error rate is forgotten, so a
+    demoted region gets traffic again (and is demoted again if it still fails) instead of
+    staying starved: it receives no calls, so its error rate could never decay on its own.
+    """
+
+    def __init__(self, window: int = 200, cooldown: float = REGION_COOLDOWN_SECONDS):
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.error_rate = 0.0
+        self.cooldown = cooldown
+        self.cooldown_until = 0.0
+
+    def record(self, latency: float | None, failed: bool):
+        if latency is not None:
+            self.latencies.append(latency)
+        self.error_rate = 0.8 * self.error_rate + (0.2 if failed else 0.0)
+        if failed:
+            self.cooldown_until = time.monotonic() + self.cooldown
+
+    def current_error_rate(self) -> float:
+        if self.error_rate and time.monotonic() >= self.cooldown_until:
+            self.error_rate = 0.0
+        return self.error_rate
+
+    def percentile(self, p: float) -> float | None:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class PoolMetrics:
+    """Thread-safe counters for one executor: queue wait and run time per call."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.submitted = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.run_time_total = 0.0
+        self._lock = threading.Lock()
+
+    def enqueued(self):
+        with self._lock:
+            self.submitted += 1
+
+    def started(self, queue_wait: float):
+        with self._lock:
+            self.active += 1
+            self.queue_wait_total += queue_wait
+            self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+
+    def finished(self, run_time: float, failed: bool):
+        with self._lock:
+            self.active -= 1
+            self.completed += 1
+            self.failed += failed
+            self.run_time_total += run_time
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            started = self.completed + self.active
+            return {
+                "max_workers": self.max_workers,
+                "submitted": self.submitted,
+                "active": self.active,
+                "queued": self.submitted - started,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_queue_wait_ms": round(self.queue_wait_total / started * 1000, 2) if started else 0.0,
+                "max_queue_wait_ms": round(self.queue_wait_max * 1000, 2),
+                "avg_run_time_ms": round(self.run_time_total / self.completed * 1000, 2) if self.completed else 0.0,
+            }
+
+
+class RegionalClientPool:
+    """bedrock-runtime clients for one operation class across several regions.
+
+    Each pool has its own thread pool and HTTP connection pool of the same size, so a flood
+    of one operation class (e.g. long streams) can't starve another (e.g. embeddings).
+
+    Calls go to the healthiest region first (lowest p50 latency weighted by recent
+    retryable errors), failing over to the next region on throttling/5xx/timeouts.
+    With hedge=True (only for idempotent calls), a second region is also tried once the
+    first hasn't answered within its p95 latency, and the first success wins.
+    """
+
+    def __init__(self, name: str, regions: list[str], client_config: Config, max_workers: int):
+        self.name = name
+        self.regions = regions
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"bedrock-{name}")
+        self.metrics = PoolMetrics(max_workers)
+        client_config = client_config.merge(Config(max_pool_connections=max_workers))
+        if len(regions) > 1:
+            client_config = client_config.merge(failover_retries)
+        self.clients = {
+            region: boto3.client(
+                service_name="bedrock-runtime",
+                region_name=region,
+                endpoint_url=BEDROCK_ENDPOINT_URLS.get(region),
+                config=client_config,
+            )
+            for region in regions
+        }
+        self.health = {region: RegionHealth() for region in regions}
+
+    @property
+    def primary_client(self):
+        return self.clients[self.regions[0]]
+
+    def ranked_regions(self) -> list[str]:
+        default_latency = HEDGE_DEFAULT_DELAY_MS / 1000
+
+        def score(region: str) -> float:
+            health = self.health[region]
+            latency = health.percentile(0.5) or default_latency
+            return latency * (1 + 10 * health.current_error_rate())
+
+        return sorted(self.regions, key=lambda r: (score(r), self.regions.index(r)))
+
+    def hedge_delay(self, region: str) -> float:
+        p95 = self.health[region].percentile(0.95)
+        if p95 is None or len(self.health[region].latencies) < 20:
+            return HEDGE_DEFAULT_DELAY_MS / 1000
+        return max(HEDGE_MIN_DELAY_MS / 1000, p95)
+
+    @staticmethod
+    def is_retryable(error: BaseException) -> bool:
+        if isinstance(error, ClientError):
+            return error.response.get("Error", {}).get("Code") in RETRYABLE_ERROR_CODES
+        return isinstance(error, (EndpointConnectionError, ConnectTimeoutError, ReadTimeoutError))
+
+    async def submit(self, fn: Callable, *args):
+        """Run fn(*args) in this pool's executor, recording queue wait and run time."""
+        submitted_at = time.perf_counter()
+        self.metrics.enqueued()
+
+        def call():
+            started_at = time.perf_counter()
+            self.metrics.started(started_at - submitted_at)
+            failed = True
+            try:
+                result = fn(*args)
+                failed = False
+                return result
+            finally:
+                self.metrics.finished(time.perf_counter() - started_at, failed)
+
+        return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    async def iterate(self, iterable):
+        """Consume a blocking iterator (e.g. a converse_stream event stream) in this pool's executor."""
+        iterator = iter(iterable)
+        done = object()
+        while True:
+            item = await self.submit(next, iterator, done)
+            if item is done:
+                return
+            yield item
+
+    def _timed_call(self, region: str, fn: Callable):
+        start = time.perf_counter()
+        try:
+            result = fn(self.clients[region])
+        except Exception as e:
+            self.health[region].record(None, failed=self.is_retryable(e))
+            raise
+        self.health[region].record(time.perf_counter() - start, failed=False)
+        return result
+
+    async def run(self, fn: Callable, hedge: bool = False):
+        """Run fn(client) in the thread pool, with region failover and optional hedging."""
+        pending = self.ranked_regions()
+        tasks: dict[asyncio.Task, str] = {}
+        last_error: BaseException | None = None
+
+        def start_next():
+            region = pending.pop(0)
+            task = asyncio.ensure_future(self.submit(self._timed_call, region, fn))
+            tasks[task] = region
+            return region
+
+        current = start_next()
+        try:
+            while tasks:
+                timeout = self.hedge_delay(current) if hedge and pending else None
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    previous, current = current, start_next()
+                    logger.info("%s: hedging request from %s to %s", self.name, previous, current)
+                    continue
+                for task in done:
+                    region = tasks.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    if not self.is_retryable(error):
+                        raise error
+                    logger.warning("%s: %s failed in %s: %s", self.name, type(error).__name__, region, error)
+                    last_error = error
+                if not tasks and pending:
+                    current = start_next()
+                    logger.info("%s: failing over to %s", self.name, current)
+            raise last_error
+        finally:
+            # Losing hedges keep running in their threads; only their results are dropped
+            for task in tasks:
+                task.cancel()
+
+
+chat_stream_pool = RegionalClientPool("chat-stream", BEDROCK_REGIONS, config, CHAT_STREAM_POOL_SIZE)
+chat_pool = RegionalClientPool("chat", BEDROCK_REGIONS, config, CHAT_POOL_SIZE)
+embeddings_pool = RegionalClientPool("embeddings", BEDROCK_REGIONS, config, EMBEDDINGS_POOL_SIZE)
+rerank_pool = RegionalClientPool("rerank", RERANK_REGIONS, rerank_config, RERANK_POOL_SIZE)
+client_pools = [chat_stream_pool, chat_pool, embeddings_pool, rerank_pool]
+
+
+def pool_metrics() -> dict:
+    return {pool.name: pool.metrics.snapshot() for pool in client_pools}
+
+# Primary clients, also used for their modeled exception classes
+bedrock_runtime = chat_pool.primary_client
+bedrock_rerank_runtime = rerank_pool.primary_client
+
+rerank_cache = TTLCache(max_size=RERANK_CACHE_SIZE, ttl=RERANK_CACHE_TTL)
+completion_cache = CompletionCache(
+    max_size=COMPLETION_CACHE_SIZE, ttl=COMPLETION_CACHE_TTL, redis_url=COMPLETION_CACHE_REDIS_URL
 )
 
+# Bedrock prompt cache reads/writes per model, as reported in converse usage
+prompt_cache_stats = PromptCacheStats()
+
+# Identical in-flight requests share one Bedrock call when ENABLE_REQUEST_COALESCING is set
+chat_flight = SingleFlight("chat")
+chat_stream_flight = StreamFlight("chat-stream")
+embeddings_flight = SingleFlight("embeddings")
+
+
+def coalescing_metrics() -> dict:
+    return {flight.name: flight.stats() for flight in (chat_flight, chat_stream_flight, embeddings_flight)}
+
 SUPPORTED_BEDROCK_EMBEDDING_MODELS = {
     "cohere.embed-multilingual-v3": "Cohere Embed Multilingual",
     "cohere.embed-english-v3": "Cohere Embed English",
     "amazon.titan-embed-text-v1": "Titan Embeddings G1 - Text",
     "amazon.titan-embed-text-v2:0": "Titan Embeddings G2 - Text",
+    "cohere.embed-v4:0": "Cohere Embed v4",
     # Disable Titan embedding.
     # "amazon.titan-embed-image-v1": "Titan Multimodal Embeddings G1"
 }
 
+# Output sizes accepted via the OpenAI `dimensions` parameter.
+# Cohere v3 models only produce their native 1024 dimensions.
+TITAN_V2_DIMENSIONS = (256, 512, 1024)
+COHERE_V3_DIMENSIONS = (1024,)
+COHERE_V4_DIMENSIONS = (256, 512, 1024, 1536)
+
+# Cohere Embed on Bedrock rejects calls with more texts than this.
+COHERE_MAX_TEXTS_PER_CALL = 96
+
 ENCODER = tiktoken.get_encoding("cl100k_base")
 
+
+def estimate_tokens(text: str) -> int:
+    """Fast length-based token estimate (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+@functools.lru_cache(maxsize=4096)
+def count_tokens_cached(text: str) -> int:
+    """Exact tiktoken count, cached because rerank documents recur across requests."""
+    return len(ENCODER.encode(text))
+
+
 # Global mapping: Profile ID/ARN → Foundation Model ID
 # Handles both SYSTEM_DEFINED (cross-region) and APPLICATION profiles
 # This enables feature detection for all profile types without pattern matching
@@ -346,7 +646,7 @@ class BedrockModel(BaseChatModel):
 
         return None
 
-    async def _invoke_bedrock(self, chat_request: ChatRequest, stream=False):
+    async def _invoke_bedrock(self, chat_request: ChatRequest, stream=False, args: dict | None = None):
         """Common logic for invoke bedrock models"""
         if DEBUG:
             logger.info("Raw request: " + chat_request.model_dump_json())
@@ -360,19 +660,20 @@ class BedrockModel(BaseChatModel):
                 )
 
         # convert OpenAI chat request to Bedrock SDK request
-        args = self._parse_request(chat_request)
+        if args is None:
+            args = self._parse_request(chat_request)
         if DEBUG:
             logger.info("Bedrock request: " + json.dumps(str(args)))
 
         try:
             if stream:
                 # Run the blocking boto3 call in a thread pool
-                response = await run_in_threadpool(
-                    bedrock_runtime.converse_stream, **args
-                )
+                response = await chat_stream_pool.run(lambda client: client.converse_stream(**args))
             else:
-                # Run the blocking boto3 call in a thread pool
-                response = await run_in_threadpool(bedrock_runtime.converse, **args)
+                # Run the blocking boto3 call in a thread pool, hedged across regions if enabled
+                response = await chat_pool.run(
+                    lambda client: client.converse(**args), hedge=ENABLE_HEDGED_REQUESTS
+                )
         except bedrock_runtime.exceptions.ValidationException as e:
             logger.error("Bedrock validation error for model %s: %s", chat_request.model, str(e))
             raise HTTPException(status_code=400, detail=str(e))
@@ -384,11 +685,32 @@ class BedrockModel(BaseChatModel):
             raise HTTPException(status_code=500, detail=str(e))
         return response
 
-    async def chat(self, chat_request: ChatRequest) -> ChatResponse:
+    def _completion_cache_key(self, chat_request: ChatRequest, args: dict, cache_mode: str | None) -> str | None:
+        """Cache key for the parsed converse args, or None if this request must not be cached.
+
+        Only deterministic requests (temperature 0) are cached unless the client opts in
+        explicitly with cache_mode "on"; "off" always bypasses the cache.
+        """
+        if not ENABLE_COMPLETION_CACHE or cache_mode == "off":
+            return None
+        if cache_mode != "on" and chat_request.temperature != 0:
+            return None
+        return canonical_hash(args)
+
+    async def chat(self, chat_request: ChatRequest, cache_mode: str | None = None) -> ChatResponse:
         """Default implementation for Chat API."""
 
         message_id = self.generate_message_id()
-        response = await self._invoke_bedrock(chat_request)
+        args = self._parse_request(chat_request)
+        cache_key = self._completion_cache_key(chat_request, args, cache_mode)
+        if cache_key:
+            cached = await completion_cache.get(cache_key)
+            if cached is not None:
+                if DEBUG:
+                    logger.info("Completion cache hit for model %s", chat_request.model)
+                return ChatResponse.model_validate({**cached, "id": message_id, "created": int(time.time())})
+
+        response = await self._converse(chat_request, args)
 
         output_message = response["output"]["message"]
         usage = response["usage"]
@@ -401,6 +723,9 @@ class BedrockModel(BaseChatModel):
         # Extract prompt caching metrics if available
         cache_read_tokens = usage.get("cacheReadInputTokens", 0)
         cache_creation_tokens = usage.get("cacheWriteInputTokens", 0)
+        prompt_cache_stats.record(
+            chat_request.model, usage.get("inputTokens", 0), cache_read_tokens, cache_creation_tokens
+        )
 
         # Calculate actual prompt tokens
         # Bedrock's totalTokens includes all: inputTokens + cacheRead + cacheWrite + outputTokens
@@ -420,38 +745,45 @@ class BedrockModel(BaseChatModel):
         )
         if DEBUG:
             logger.info("Proxy response :" + chat_response.model_dump_json())
+        if cache_key:
+            await completion_cache.set(cache_key, chat_response.model_dump(mode="json", exclude_unset=True))
         return chat_response
 
-    async def _async_iterate(self, stream):
-        """Helper method to convert sync iterator to async iterator"""
-        for chunk in stream:
-            await run_in_threadpool(lambda: chunk)
-            yield chunk
-
-    async def chat_stream(self, chat_request: ChatRequest) -> AsyncIterable[bytes]:
+    async def chat_stream(self, chat_request: ChatRequest, cache_mode: str | None = None) -> AsyncIterable[bytes]:
         """Default implementation for Chat Stream API"""
         try:
-            response = await self._invoke_bedrock(chat_request, stream=True)
             message_id = self.generate_message_id()
-            stream = response.get("stream")
-            self.think_emitted = False
-            async for chunk in self._async_iterate(stream):
-                args = {"model_id": chat_request.model, "message_id": message_id, "chunk": chunk}
-                stream_response = self._create_response_stream(**args)
-                if not stream_response:
-                    continue
+            args = self._parse_request(chat_request)
+            cache_key = self._completion_cache_key(chat_request, args, cache_mode)
+            cached = await completion_cache.get(cache_key) if cache_key else None
+            if cached is not None:
                 if DEBUG:
-                    logger.info("Proxy response :" + stream_response.model_dump_json())
-                if stream_response.choices:
-                    yield self.stream_response_to_bytes(stream_response)
-                elif chat_request.stream_options and chat_request.stream_options.include_usage:
-                    # An empty choices for Usage as per OpenAI doc below:
-                    # if you set stream_options: {"include_usage": true}.
-                    # an additional chunk will be streamed before the data: [DONE] message.
-                    # The usage field on this chunk shows the token usage statistics for the entire request,
-                    # and the choices field will always be an empty array.
-                    # All other chunks will also include a usage field, but with a null value.
-                    yield self.stream_response_to_bytes(stream_response)
+                    logger.info("Completion cache hit for model %s, replaying as a stream", chat_request.model)
+                for stream_response in self._replay_stream(cached, message_id):
+                    if stream_response.choices or self._include_usage(chat_request):
+                        yield self.stream_response_to_bytes(stream_response)
+            else:
+                # Stream responses are kept only when the result may be cached
+                recorded: list[ChatStreamResponse] | None = [] if cache_key else None
+                self.think_emitted = False
+                async for chunk in self._converse_stream(chat_request, args):
+                    stream_response = self._create_response_stream(
+                        model_id=chat_request.model, message_id=message_id, chunk=chunk
+                    )
+                    if not stream_response:
+                        continue
+                    if DEBUG:
+                        logger.info("Proxy response :" + stream_response.model_dump_json())
+                    if recorded is not None:
+                        recorded.append(stream_response)
+                    if stream_response.choices:
+                        yield self.stream_response_to_bytes(stream_response)
+                    elif self._include_usage(chat_request):
+                        yield self.stream_response_to_bytes(stream_response)
+                if recorded:
+                    collected = self._collect_stream(recorded, chat_request.model, message_id)
+                    if collected is not None:
+                        await completion_cache.set(cache_key, collected.model_dump(mode="json", exclude_unset=True))
 
             # return an [DONE] message at the end.
             yield self.stream_response_to_bytes()
@@ -461,69 +793,182 @@ class BedrockModel(BaseChatModel):
             error_event = Error(error=ErrorMessage(message=str(e)))
             yield self.stream_response_to_bytes(error_event)
 
-    def _parse_system_prompts(self, chat_request: ChatRequest) -> list[dict[str, str]]:
-        """Create system prompts with optional prompt caching support.
+    def _coalesce(self, chat_request: ChatRequest) -> bool:
+        """Whether identical concurrent requests may share one Bedrock call.
 
-        Prompt caching can be enabled via:
-        1. ENABLE_PROMPT_CACHING environment variable (global default)
-        2. extra_body.prompt_caching.system = True/False (per-request override)
+        Only deterministic requests (temperature 0) are coalesced: with sampling, each caller
+        is entitled to its own sample. A missing temperature means the model's default, which
+        samples, so it is not coalesced either.
+        """
+        return ENABLE_REQUEST_COALESCING and chat_request.temperature == 0
+
+    async def _converse(self, chat_request: ChatRequest, args: dict) -> dict:
+        """Admitted converse call; identical concurrent deterministic calls share one Bedrock request."""
 
-        Only adds cachePoint if:
-        - Model supports caching (Claude, Nova)
-        - Caching is enabled (ENV or extra_body)
-        - System prompts exist and meet minimum token requirements
+        async def call() -> dict:
+            async with admission.admit(
+                chat_request.model, self._estimate_request_tokens(chat_request), chat_request.user
+            ):
+                return await self._invoke_bedrock(chat_request, args=args)
 
-        Example output: [{"text" : system_prompt}, {"cachePoint": {"type": "default"}}]
+        if not self._coalesce(chat_request):
+            return await call()
+        return await chat_flight.do(canonical_hash(args), call)
 
-        See: https://docs.aws.amazon.com/bedrock/latest/userguide/prompt-caching.html
+    async def _converse_stream(self, chat_request: ChatRequest, args: dict) -> AsyncIterable[dict]:
+        """Raw converse_stream events.
+
+        With coalescing enabled (and temperature 0), the Bedrock stream is read by a task of its
+        own and every identical request in flight replays its events from the start, so the
+        first client disconnecting doesn't cut the stream short for the others.
         """
-        system_prompts = []
-        for message in chat_request.messages:
-            if message.role not in ("system", "developer"):
-                continue
-            if not isinstance(message.content, str):
-                raise TypeError(f"System message content must be a string, got {type(message.content).__name__}")
-            system_prompts.append({"text": message.content})
+        if not self._coalesce(chat_request):
+            async for chunk in self._bedrock_stream(chat_request, args):
+                yield chunk
+            return
+
+        key = canonical_hash(args)
+        shared = chat_stream_flight.follow(key)
+        if shared is None:
+
+            async def produce(shared: SharedStream):
+                async for chunk in self._bedrock_stream(chat_request, args):
+                    shared.append(chunk)
+
+            shared = chat_stream_flight.lead(key, produce)
+        async with aclosing(chat_stream_flight.consume(key, shared)) as chunks:
+            async for chunk in chunks:
+                yield chunk
+
+    async def _bedrock_stream(self, chat_request: ChatRequest, args: dict) -> AsyncIterable[dict]:
+        """Admitted converse_stream call. Prompt cache stats are recorded here, once per Bedrock
+        stream, not per (possibly coalesced) client."""
+        async with admission.admit(
+            chat_request.model, self._estimate_request_tokens(chat_request), chat_request.user
+        ):
+            response = await self._invoke_bedrock(chat_request, stream=True, args=args)
+            # Each blocking read of the event stream runs in the streaming pool
+            async for chunk in chat_stream_pool.iterate(response.get("stream")):
+                usage = chunk.get("metadata", {}).get("usage")
+                if usage:
+                    prompt_cache_stats.record(
+                        chat_request.model,
+                        usage.get("inputTokens", 0),
+                        usage.get("cacheReadInputTokens", 0),
+                        usage.get("cacheWriteInputTokens", 0),
+                    )
+                yield chunk
 
-        if not system_prompts:
-            return system_prompts
+    @staticmethod
+    def _include_usage(chat_request: ChatRequest) -> bool:
+        # An empty choices for Usage as per OpenAI doc below:
+        # if you set stream_options: {"include_usage": true}.
+        # an additional chunk will be streamed before the data: [DONE] message.
+        # The usage field on this chunk shows the token usage statistics for the entire request,
+        # and the choices field will always be an empty array.
+        # All other chunks will also include a usage field, but with a null value.
+        return bool(chat_request.stream_options and chat_request.stream_options.include_usage)
+
+    def _collect_stream(
+        self, stream_responses: list[ChatStreamResponse], model: str, message_id: str
+    ) -> ChatResponse | None:
+        """Fold streamed chunks into the equivalent ChatResponse, for the completion cache.
+
+        Returns None if the stream did not finish normally or carried no usage.
+        """
+        content = ""
+        tool_calls: dict[int, ToolCall] = {}
+        finish_reason = None
+        usage = None
+        for stream_response in stream_responses:
+            if stream_response.usage:
+                usage = stream_response.usage
+            for choice in stream_response.choices:
+                finish_reason = choice.finish_reason or finish_reason
+                content += choice.delta.content or ""
+                for tool_call in choice.delta.tool_calls or []:
+                    current = tool_calls.get(tool_call.index)
+                    if current is None:
+                        tool_calls[tool_call.index] = tool_call.model_copy(deep=True)
+                    else:
+                        current.function.arguments += tool_call.function.arguments
+        if finish_reason is None or usage is None:
+            return None
 
-        # Check if model supports prompt caching
-        if not self._supports_prompt_caching(chat_request.model):
-            return system_prompts
+        message = ChatResponseMessage(role="assistant")
+        if tool_calls:
+            message.tool_calls = [
+                ToolCall(id=call.id, type="function", function=call.function)
+                for _, call in sorted(tool_calls.items())
+            ]
+            message.content = None
+        else:
+            message.content = content
+        response = ChatResponse(
+            id=message_id,
+            model=model,
+            choices=[Choice(index=0, message=message, finish_reason=finish_reason, logprobs=None)],
+            usage=usage,
+        )
+        response.system_fingerprint = "fp"
+        response.object = "chat.completion"
+        response.created = int(time.time())
+        return response
 
-        # Determine if caching should be enabled
-        cache_enabled = ENABLE_PROMPT_CACHING  # Default from ENV
+    def _replay_stream(self, cached: dict, message_id: str) -> Iterable[ChatStreamResponse]:
+        """Synthesize the chunk sequence of a live stream from a cached ChatResponse."""
+        response = ChatResponse.model_validate(cached)
+        choice = response.choices[0]
+        message = choice.message
 
-        # Check for extra_body override
-        if chat_request.extra_body and isinstance(chat_request.extra_body, dict):
-            prompt_caching = chat_request.extra_body.get("prompt_caching", {})
-            if "system" in prompt_caching:
-                # extra_body explicitly controls caching
-                cache_enabled = prompt_caching.get("system") is True
-
-        if not cache_enabled:
-            return system_prompts
-
-        # Estimate total tokens for limit check
-        total_text = " ".join(p.get("text", "") for p in system_prompts)
-        estimated_tokens = len(total_text.split()) * 1.3  # Rough estimate
-
-        # Check token limits (Nova has 20K limit)
-        max_tokens = self._get_max_cache_tokens(chat_request.model)
-        if max_tokens and estimated_tokens > max_tokens:
-            logger.warning(
-                f"System prompts (~{estimated_tokens:.0f} tokens) exceed model cache limit ({max_tokens} tokens). "
-                f"Caching will still be attempted but may not work optimally."
+        def chunk(delta: ChatResponseMessage, finish_reason: str | None = None) -> ChatStreamResponse:
+            return ChatStreamResponse(
+                id=message_id,
+                model=response.model,
+                choices=[ChoiceDelta(index=0, delta=delta, logprobs=None, finish_reason=finish_reason)],
+                usage=None,
             )
-            # Still add cachePoint - let Bedrock handle the limit
 
-        # Add cache checkpoint after system prompts
-        system_prompts.append({"cachePoint": {"type": "default"}})
+        yield chunk(ChatResponseMessage(role="assistant", content=""))
+        if message.content:
+            yield chunk(ChatResponseMessage(content=message.content))
+        for index, tool_call in enumerate(message.tool_calls or []):
+            yield chunk(
+                ChatResponseMessage(
+                    tool_calls=[
+                        ToolCall(index=index, type="function", id=tool_call.id, function=tool_call.function)
+                    ]
+                )
+            )
+        yield chunk(ChatResponseMessage(), choice.finish_reason)
+        yield ChatStreamResponse(id=message_id, model=response.model, choices=[], usage=response.usage)
 
-        if DEBUG:
-            logger.info(f"Added cachePoint to system prompts for model {chat_request.model}")
+    def _estimate_request_tokens(self, chat_request: ChatRequest) -> int:
+        """Rough input + maximum output tokens, for token-per-minute admission budgets."""
+        input_tokens = 0
+        for message in chat_request.messages:
+            if isinstance(message.content, str):
+                input_tokens += estimate_tokens(message.content)
+            elif isinstance(message.content, list):
+                for part in message.content:
+                    if isinstance(part, (TextContent, ToolContent)):
+                        input_tokens += estimate_tokens(part.text)
+        return input_tokens + (chat_request.max_completion_tokens or chat_request.max_tokens or 0)
 
+    def _parse_system_prompts(self, chat_request: ChatRequest) -> list[dict[str, str]]:
+        """Create system prompts.
+
+        Cache points are added later by _plan_cache_points, once the whole request is known.
+
+        Example output: [{"text" : system_prompt}]
+        """
+        system_prompts = []
+        for message in chat_request.messages:
+            if message.role not in ("system", "developer"):
+                continue
+            if not isinstance(message.content, str):
+                raise TypeError(f"System message content must be a string, got {type(message.content).__name__}")
+            system_prompts.append({"text": message.content})
         return system_prompts
 
     def _parse_messages(self, chat_request: ChatRequest) -> list[dict]:
@@ -612,7 +1057,7 @@ class BedrockModel(BaseChatModel):
             else:
                 # ignore others, such as system messages
                 continue
-        return self._reframe_multi_payloard(messages, chat_request)
+        return self._reframe_multi_payloard(messages)
 
     def _extract_tool_content(self, content) -> str:
         """Extract text content from various OpenAI SDK tool message formats.
@@ -665,7 +1110,7 @@ class BedrockModel(BaseChatModel):
             # Return a safe fallback
             return str(content) if content is not None else ""
 
-    def _reframe_multi_payloard(self, messages: list, chat_request: ChatRequest = None) -> list:
+    def _reframe_multi_payloard(self, messages: list) -> list:
         """Receive messages and reformat them to comply with the Claude format
 
         With OpenAI format requests, it's not a problem to repeatedly receive messages from the same role, but
@@ -720,29 +1165,6 @@ class BedrockModel(BaseChatModel):
                 {"role": current_role, "content": current_content}
             )
 
-        # Add cachePoint to messages if enabled and supported
-        if chat_request and reformatted_messages:
-            if not self._supports_prompt_caching(chat_request.model):
-                return reformatted_messages
-
-            # Determine if messages caching should be enabled
-            cache_enabled = ENABLE_PROMPT_CACHING
-
-            if chat_request.extra_body and isinstance(chat_request.extra_body, dict):
-                prompt_caching = chat_request.extra_body.get("prompt_caching", {})
-                if "messages" in prompt_caching:
-                    cache_enabled = prompt_caching.get("messages") is True
-
-            if cache_enabled:
-                # Add cachePoint to the last user message content
-                for msg in reversed(reformatted_messages):
-                    if msg["role"] == "user" and msg.get("content"):
-                        # Add cachePoint at the end of user message content
-                        msg["content"].append({"cachePoint": {"type": "default"}})
-                        if DEBUG:
-                            logger.info(f"Added cachePoint to last user message for model {chat_request.model}")
-                        break
-
         return reformatted_messages
 
     def _parse_request(self, chat_request: ChatRequest) -> dict:
@@ -864,8 +1286,129 @@ class BedrockModel(BaseChatModel):
                 if "thinking" in additional_fields:
                     inference_config.pop("topP", None)
 
+        self._plan_cache_points(chat_request, args)
         return args
 
+    def _prompt_cache_enabled(self, chat_request: ChatRequest, section: str) -> bool:
+        """Whether cache points may be placed in a section ("system" or "messages").
+
+        Prompt caching can be enabled via:
+        1. ENABLE_PROMPT_CACHING environment variable (global default)
+        2. extra_body.prompt_caching.system / .messages = True/False (per-request override)
+
+        The "system" switch also covers tool specs, which precede the system prompt in the cached prefix.
+        """
+        cache_enabled = ENABLE_PROMPT_CACHING
+        if chat_request.extra_body and isinstance(chat_request.extra_body, dict):
+            prompt_caching = chat_request.extra_body.get("prompt_caching", {})
+            if section in prompt_caching:
+                cache_enabled = prompt_caching.get(section) is True
+        return cache_enabled
+
+    def _get_cache_limits(self, model_id: str) -> tuple[int, int, bool]:
+        """Minimum tokens per cache checkpoint, maximum checkpoints per request, and whether
+        tool specs can be cached.
+
+        See: https://docs.aws.amazon.com/bedrock/latest/userguide/prompt-caching.html
+        """
+        model_lower = self._resolve_to_foundation_model(model_id).lower()
+        if "amazon.nova" in model_lower:
+            return 1000, 4, False
+        if "claude-haiku-4-5" in model_lower:
+            return 4096, 4, True
+        if "claude-3-5-haiku" in model_lower:
+            return 2048, 4, True
+        return 1024, 4, True
+
+    @staticmethod
+    def _estimate_block_tokens(block: dict) -> int:
+        if "text" in block:
+            return estimate_tokens(block["text"])
+        if "toolSpec" in block or "toolUse" in block or "toolResult" in block:
+            return estimate_tokens(json.dumps(block, default=str))
+        # Images and documents: a flat guess, enough to rank candidates
+        return 1000 if ("image" in block or "document" in block) else 0
+
+    def _plan_cache_points(self, chat_request: ChatRequest, args: dict):
+        """Place cachePoint blocks on the stable prefixes of a converse request.
+
+        Bedrock caches the prefix in the order tools -> system -> messages. Candidate
+        checkpoints, in priority order:
+        1. end of the tool specs and end of the system prompt (stable across all requests)
+        2. end of long early documents (a user block at least min_tokens long, before the last turn)
+        3. end of the previous user turn (written by the previous request, read by this one)
+           and end of the last user turn (written for the next request)
+
+        A candidate is kept only if its prefix reaches the model's minimum cacheable size and
+        adds at least min_tokens over the nearest kept checkpoint before it (conversation tail
+        points excepted, since they pay off on the next turn), up to the model's maximum
+        number of checkpoints and, for Nova, its 20K cacheable token limit.
+        """
+        if not self._supports_prompt_caching(chat_request.model):
+            return
+        cache_system = self._prompt_cache_enabled(chat_request, "system")
+        cache_messages = self._prompt_cache_enabled(chat_request, "messages")
+        if not (cache_system or cache_messages):
+            return
+        min_tokens, max_points, cache_tools = self._get_cache_limits(chat_request.model)
+        max_cache_tokens = self._get_max_cache_tokens(chat_request.model)
+
+        # Candidates: (priority, prefix position, prefix tokens, container list, insert index, tail point)
+        candidates = []
+        position = 0
+        prefix_tokens = 0
+        tools = args.get("toolConfig", {}).get("tools", [])
+        if tools:
+            prefix_tokens += sum(self._estimate_block_tokens(t) for t in tools)
+            if cache_system and cache_tools:
+                candidates.append((0, position, prefix_tokens, tools, len(tools), False))
+        position += 1
+        system = args.get("system", [])
+        if system:
+            prefix_tokens += sum(self._estimate_block_tokens(b) for b in system)
+            if cache_system:
+                candidates.append((0, position, prefix_tokens, system, len(system), False))
+        position += 1
+
+        messages = args.get("messages", [])
+        user_turns = [i for i, m in enumerate(messages) if m["role"] == "user"]
+        last_user = user_turns[-1] if user_turns else -1
+        previous_user = user_turns[-2] if len(user_turns) > 1 else -1
+        for i, message in enumerate(messages):
+            content = message.get("content", [])
+            for j, block in enumerate(content):
+                block_tokens = self._estimate_block_tokens(block)
+                prefix_tokens += block_tokens
+                position += 1
+                if not cache_messages or message["role"] != "user":
+                    continue
+                if i < last_user and block_tokens >= min_tokens:
+                    candidates.append((1, position, prefix_tokens, content, j + 1, False))
+                if j == len(content) - 1 and i in (previous_user, last_user):
+                    candidates.append((2, position, prefix_tokens, content, j + 1, True))
+
+        chosen = []
+        for priority, position, tokens, container, index, tail in sorted(candidates, key=lambda c: (c[0], c[1])):
+            if len(chosen) >= max_points:
+                break
+            if tokens < min_tokens or (max_cache_tokens and tokens > max_cache_tokens):
+                continue
+            before = [c[2] for c in chosen if c[1] < position]
+            if not tail and tokens - max(before, default=0) < min_tokens:
+                continue
+            if any(c[1] == position for c in chosen):
+                continue
+            chosen.append((priority, position, tokens, container, index, tail))
+
+        # Insert from the back so earlier indexes in the same container stay valid
+        for _, _, _, container, index, _ in sorted(chosen, key=lambda c: c[1], reverse=True):
+            container.insert(index, {"cachePoint": {"type": "default"}})
+        if DEBUG and chosen:
+            logger.info(
+                "Placed %d cache points for model %s at ~%s tokens",
+                len(chosen), chat_request.model, sorted(c[2] for c in chosen),
+            )
+
     def _estimate_reasoning_tokens(self, content: list[dict]) -> int:
         """
         Estimate reasoning tokens from reasoningContent blocks.
@@ -1259,18 +1802,72 @@ class BedrockEmbeddingsModel(BaseEmbeddingsModel, ABC):
     accept = "application/json"
     content_type = "application/json"
 
-    def _invoke_model(self, args: dict, model_id: str):
+    def _create_response(
+        self,
+        embeddings: list[list[float]],
+        model: str,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        encoding_format: Literal["float", "base64"] = "float",
+    ) -> Response:
+        """Build the embeddings response body directly, bypassing per-float Pydantic validation.
+
+        All vectors are converted once into a float32 matrix. Base64 rows are encoded straight
+        from views of that matrix and float rows are written by orjson's native NumPy support.
+        The body follows the EmbeddingsResponse schema.
+        """
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if encoding_format == "base64":
+            data = [
+                {"object": "embedding", "embedding": base64.b64encode(row).decode("ascii"), "index": i}
+                for i, row in enumerate(matrix)
+            ]
+        else:
+            data = [{"object": "embedding", "embedding": row, "index": i} for i, row in enumerate(matrix)]
+        body = orjson.dumps(
+            {
+                "object": "list",
+                "data": data,
+                "model": model,
+                "usage": {"prompt_tokens": input_tokens, "total_tokens": input_tokens + output_tokens},
+            },
+            option=orjson.OPT_SERIALIZE_NUMPY,
+        )
+        if DEBUG:
+            logger.info("Proxy response :" + body.decode("utf-8"))
+        return Response(content=body, media_type="application/json")
+
+    async def _invoke_model_async(self, args: dict, model_id: str) -> tuple[dict, int]:
+        """Run the blocking invoke_model call in a thread pool, hedged across regions if enabled.
+
+        Returns the decoded body and the input token count reported by Bedrock in the
+        response headers (0 if absent).
+        """
         body = json.dumps(args)
         if DEBUG:
             logger.info("Invoke Bedrock Model: " + model_id)
             logger.info("Bedrock request body: " + body)
-        try:
-            return bedrock_runtime.invoke_model(
+
+        def invoke(client) -> tuple[dict, int]:
+            response = client.invoke_model(
                 body=body,
                 modelId=model_id,
                 accept=self.accept,
                 contentType=self.content_type,
             )
+            headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+            input_tokens = int(headers.get("x-amzn-bedrock-input-token-count", 0))
+            return orjson.loads(response.get("body").read()), input_tokens
+
+        async def call() -> tuple[dict, int]:
+            return await embeddings_pool.run(invoke, hedge=ENABLE_HEDGED_REQUESTS)
+
+        try:
+            if ENABLE_REQUEST_COALESCING:
+                # The same text embedded by concurrent requests is sent to Bedrock once
+                response_body, input_tokens = await embeddings_flight.do(canonical_hash([model_id, body]), call)
+            else:
+                response_body, input_tokens = await call()
         except bedrock_runtime.exceptions.ValidationException as e:
             logger.error("Validation Error: " + str(e))
             raise HTTPException(status_code=400, detail=str(e))
@@ -1280,39 +1877,12 @@ class BedrockEmbeddingsModel(BaseEmbeddingsModel, ABC):
         except Exception as e:
             logger.error(e)
             raise HTTPException(status_code=500, detail=str(e))
-
-    def _create_response(
-        self,
-        embeddings: list[float],
-        model: str,
-        input_tokens: int = 0,
-        output_tokens: int = 0,
-        encoding_format: Literal["float", "base64"] = "float",
-    ) -> EmbeddingsResponse:
-        data = []
-        for i, embedding in enumerate(embeddings):
-            if encoding_format == "base64":
-                arr = np.array(embedding, dtype=np.float32)
-                arr_bytes = arr.tobytes()
-                encoded_embedding = base64.b64encode(arr_bytes)
-                data.append(Embedding(index=i, embedding=encoded_embedding))
-            else:
-                data.append(Embedding(index=i, embedding=embedding))
-        response = EmbeddingsResponse(
-            data=data,
-            model=model,
-            usage=EmbeddingsUsage(
-                prompt_tokens=input_tokens,
-                total_tokens=input_tokens + output_tokens,
-            ),
-        )
         if DEBUG:
-            logger.info("Proxy response :" + response.model_dump_json())
-        return response
-
+            logger.info("Bedrock response body: " + str(response_body))
+        return response_body, input_tokens
 
-class CohereEmbeddingsModel(BedrockEmbeddingsModel):
-    def _parse_args(self, embeddings_request: EmbeddingsRequest) -> dict:
+    @staticmethod
+    def _parse_texts(embeddings_request: EmbeddingsRequest) -> list[str]:
         texts = []
         if isinstance(embeddings_request.input, str):
             texts = [embeddings_request.input]
@@ -1332,48 +1902,87 @@ class CohereEmbeddingsModel(BedrockEmbeddingsModel):
                     texts.append(text)
             if encodings:
                 texts.append(ENCODER.decode(encodings))
+        return texts
+
+    @staticmethod
+    def _validate_dimensions(embeddings_request: EmbeddingsRequest, supported: tuple[int, ...]):
+        if embeddings_request.dimensions is not None and embeddings_request.dimensions not in supported:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported dimensions {embeddings_request.dimensions} for {embeddings_request.model}, "
+                f"supported values are {', '.join(str(d) for d in supported)}",
+            )
 
+
+class CohereEmbeddingsModel(BedrockEmbeddingsModel):
+    def _parse_args(self, embeddings_request: EmbeddingsRequest, texts: list[str]) -> dict:
         # Maximum of 2048 characters
         args = {
             "texts": texts,
             "input_type": "search_document",
             "truncate": "END",  # "NONE|START|END"
         }
+        if embeddings_request.model == "cohere.embed-v4:0":
+            args["embedding_types"] = ["float"]
+            if embeddings_request.dimensions:
+                args["output_dimension"] = embeddings_request.dimensions
         return args
 
-    def embed(self, embeddings_request: EmbeddingsRequest) -> EmbeddingsResponse:
-        response = self._invoke_model(
-            args=self._parse_args(embeddings_request), model_id=embeddings_request.model
-        )
-        response_body = json.loads(response.get("body").read())
-        if DEBUG:
-            logger.info("Bedrock response body: " + str(response_body))
+    async def embed(self, embeddings_request: EmbeddingsRequest) -> Response:
+        """Cohere accepts at most COHERE_MAX_TEXTS_PER_CALL texts per call.
+
+        Larger inputs are split into sub-batches that run concurrently (at most
+        EMBEDDINGS_MAX_CONCURRENCY in flight). Embeddings are concatenated in input order
+        and usage is summed, so the response matches a single call.
+        """
+        if embeddings_request.model == "cohere.embed-v4:0":
+            self._validate_dimensions(embeddings_request, COHERE_V4_DIMENSIONS)
+        else:
+            self._validate_dimensions(embeddings_request, COHERE_V3_DIMENSIONS)
+        texts = self._parse_texts(embeddings_request)
+        if not texts:
+            raise HTTPException(status_code=400, detail="Input must contain at least one text")
+
+        semaphore = asyncio.Semaphore(EMBEDDINGS_MAX_CONCURRENCY)
+
+        async def embed_batch(batch: list[str]) -> tuple[list, int]:
+            async with semaphore:
+                response_body, input_tokens = await self._invoke_model_async(
+                    args=self._parse_args(embeddings_request, batch), model_id=embeddings_request.model
+                )
+            embeddings = response_body["embeddings"]
+            if isinstance(embeddings, dict):
+                # Embed v4 returns embeddings by type when embedding_types is set
+                embeddings = embeddings["float"]
+            return embeddings, input_tokens
+
+        batches = [
+            texts[i : i + COHERE_MAX_TEXTS_PER_CALL] for i in range(0, len(texts), COHERE_MAX_TEXTS_PER_CALL)
+        ]
+        estimated_tokens = sum(estimate_tokens(text) for text in texts)
+        async with admission.admit(embeddings_request.model, estimated_tokens, embeddings_request.user):
+            results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
 
         return self._create_response(
-            embeddings=response_body["embeddings"],
+            embeddings=[embedding for embeddings, _ in results for embedding in embeddings],
             model=embeddings_request.model,
+            input_tokens=sum(input_tokens for _, input_tokens in results),
             encoding_format=embeddings_request.encoding_format,
         )
 
 
 class TitanEmbeddingsModel(BedrockEmbeddingsModel):
-    def _parse_args(self, embeddings_request: EmbeddingsRequest) -> dict:
-        if isinstance(embeddings_request.input, str):
-            input_text = embeddings_request.input
-        elif (
-            isinstance(embeddings_request.input, list)
-            and len(embeddings_request.input) == 1
-        ):
-            input_text = embeddings_request.input[0]
-        else:
-            raise ValueError(
-                "Amazon Titan Embeddings models support only single strings as input."
-            )
+    def _parse_args(self, embeddings_request: EmbeddingsRequest, input_text: str) -> dict:
         args = {
             "inputText": input_text,
             # Note: inputImage is not supported!
         }
-        if embeddings_request.model == "amazon.titan-embed-image-v1":
+        if embeddings_request.model == "amazon.titan-embed-text-v2:0":
+            if embeddings_request.dimensions:
+                args["dimensions"] = embeddings_request.dimensions
+            # Unit-length vectors, so cosine and dot product rank the same at any size
+            args["normalize"] = True
+        elif embeddings_request.model == "amazon.titan-embed-image-v1":
             args["embeddingConfig"] = (
                 embeddings_request.embedding_config
                 if embeddings_request.embedding_config
@@ -1381,18 +1990,37 @@ class TitanEmbeddingsModel(BedrockEmbeddingsModel):
             )
         return args
 
-    def embed(self, embeddings_request: EmbeddingsRequest) -> EmbeddingsResponse:
-        response = self._invoke_model(
-            args=self._parse_args(embeddings_request), model_id=embeddings_request.model
-        )
-        response_body = json.loads(response.get("body").read())
-        if DEBUG:
-            logger.info("Bedrock response body: " + str(response_body))
+    async def embed(self, embeddings_request: EmbeddingsRequest) -> Response:
+        """Titan only embeds one text per call, so a list input is fanned out concurrently.
+
+        At most EMBEDDINGS_MAX_CONCURRENCY calls are in flight per request. Results keep the
+        input order and token usage is summed across calls.
+        """
+        if embeddings_request.model == "amazon.titan-embed-text-v2:0":
+            self._validate_dimensions(embeddings_request, TITAN_V2_DIMENSIONS)
+        texts = self._parse_texts(embeddings_request)
+        if not texts:
+            raise HTTPException(status_code=400, detail="Input must contain at least one text")
+
+        semaphore = asyncio.Semaphore(EMBEDDINGS_MAX_CONCURRENCY)
+
+        async def embed_one(text: str) -> tuple[list[float], int]:
+            async with semaphore:
+                response_body, input_tokens = await self._invoke_model_async(
+                    args=self._parse_args(embeddings_request, text), model_id=embeddings_request.model
+                )
+            return response_body["embedding"], response_body.get("inputTextTokenCount", input_tokens)
+
+        # gather returns results in input order
+        estimated_tokens = sum(estimate_tokens(text) for text in texts)
+        async with admission.admit(embeddings_request.model, estimated_tokens, embeddings_request.user):
+            results = await asyncio.gather(*(embed_one(text) for text in texts))
 
         return self._create_response(
-            embeddings=[response_body["embedding"]],
+            embeddings=[embedding for embedding, _ in results],
             model=embeddings_request.model,
-            input_tokens=response_body["inputTextTokenCount"],
+            input_tokens=sum(input_tokens for _, input_tokens in results),
+            encoding_format=embeddings_request.encoding_format,
         )
 
 
@@ -1401,7 +2029,7 @@ def get_embeddings_model(model_id: str) -> BedrockEmbeddingsModel:
     if DEBUG:
         logger.info("model name is " + model_name)
     match model_name:
-        case "Cohere Embed Multilingual" | "Cohere Embed English":
+        case "Cohere Embed Multilingual" | "Cohere Embed English" | "Cohere Embed v4":
             return CohereEmbeddingsModel()
         case "Titan Embeddings G2 - Text":
             return TitanEmbeddingsModel()
@@ -1414,34 +2042,43 @@ def get_embeddings_model(model_id: str) -> BedrockEmbeddingsModel:
 
 
 class CohereRerankModel:
-    """Handles Cohere Rerank requests via AWS Bedrock in RERANK_REGION."""
+    """Handles Cohere Rerank requests via AWS Bedrock in RERANK_REGIONS (with failover).
+
+    Scores are cached per (model, query, set of unique documents) with TTL and LRU eviction.
+    Duplicate documents within a request are scored once and mapped back to every original index.
+    """
     accept = "application/json"
     content_type = "application/json"
 
-    def rerank(self, rerank_request: RerankRequest) -> RerankResponse:
-        model_id = rerank_request.model or DEFAULT_RERANK_MODEL
-
+    async def _invoke_rerank(self, model_id: str, query: str, documents: list[str]) -> tuple[dict, int, str]:
+        """Call Bedrock and return the decoded body, the input token count from the response
+        headers (0 if absent) and the region that answered."""
+        # top_n is applied locally so a cached ranking serves any top_n
         args = {
             "api_version": 2,
-            "query": rerank_request.query,
-            "documents": rerank_request.documents,
+            "query": query,
+            "documents": documents,
         }
-        if rerank_request.top_n is not None:
-            args["top_n"] = rerank_request.top_n
 
         body = json.dumps(args)
 
         if DEBUG:
-            logger.info("Invoke Bedrock Rerank Model (%s): %s", RERANK_REGION, model_id)
+            logger.info("Invoke Bedrock Rerank Model (%s): %s", ",".join(RERANK_REGIONS), model_id)
             logger.info("Bedrock rerank request body: " + body)
 
-        try:
-            response = bedrock_rerank_runtime.invoke_model(
+        def invoke(client) -> tuple[dict, int, str]:
+            response = client.invoke_model(
                 body=body,
                 modelId=model_id,
                 accept=self.accept,
                 contentType=self.content_type,
             )
+            headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+            input_tokens = int(headers.get("x-amzn-bedrock-input-token-count", 0))
+            return json.loads(response.get("body").read()), input_tokens, client.meta.region_name
+
+        try:
+            response_body, input_tokens, region = await rerank_pool.run(invoke, hedge=ENABLE_HEDGED_REQUESTS)
         except bedrock_rerank_runtime.exceptions.ValidationException as e:
             logger.error("Rerank Validation Error: " + str(e))
             raise HTTPException(status_code=400, detail=str(e))
@@ -1452,26 +2089,72 @@ class CohereRerankModel:
             logger.error("Rerank error: " + str(e))
             raise HTTPException(status_code=500, detail=str(e))
 
-        response_body = json.loads(response.get("body").read())
         if DEBUG:
             logger.info("Bedrock rerank response body: " + str(response_body))
+        return response_body, input_tokens, region
+
+    async def _count_tokens(self, query: str, documents: list[str]) -> int:
+        """Token usage when Bedrock doesn't report it.
+
+        RERANK_USAGE_MODE=estimate (default) uses a length-based estimate and never touches the
+        tokenizer. RERANK_USAGE_MODE=exact uses tiktoken with a per-text cache, off the event loop.
+        """
+        if RERANK_USAGE_MODE == "exact":
+            return await run_in_threadpool(
+                lambda: count_tokens_cached(query) + sum(count_tokens_cached(d) for d in documents)
+            )
+        return estimate_tokens(query) + sum(estimate_tokens(d) for d in documents)
+
+    async def rerank(self, rerank_request: RerankRequest) -> RerankResponse:
+        model_id = rerank_request.model or DEFAULT_RERANK_MODEL
+        documents = rerank_request.documents
+
+        # Deduplicate documents, keeping the first index of each
+        doc_hashes = [hash_text(d) for d in documents]
+        unique_docs: dict[str, int] = {}
+        for i, doc_hash in enumerate(doc_hashes):
+            unique_docs.setdefault(doc_hash, i)
+
+        # Relevance scores don't depend on document order, so the key uses the sorted hashes
+        cache_key = hash_text(json.dumps([model_id, hash_text(rerank_request.query), sorted(unique_docs)]))
+        cached = rerank_cache.get(cache_key)
+        if cached is None:
+            unique_hashes = list(unique_docs)
+            unique_texts = [documents[unique_docs[h]] for h in unique_hashes]
+            estimated_tokens = estimate_tokens(rerank_request.query) + sum(estimate_tokens(d) for d in unique_texts)
+            async with admission.admit(model_id, estimated_tokens):
+                response_body, input_tokens, region = await self._invoke_rerank(
+                    model_id, rerank_request.query, unique_texts
+                )
+            scores = {unique_hashes[r["index"]]: r["relevance_score"] for r in response_body.get("results", [])}
+            rerank_cache.set(cache_key, (scores, input_tokens, region))
+        else:
+            # region is where the cached scores were computed
+            scores, input_tokens, region = cached
+            if DEBUG:
+                logger.info("Rerank cache hit for %d documents", len(documents))
+
+        ranked = sorted(
+            (i for i, doc_hash in enumerate(doc_hashes) if doc_hash in scores),
+            key=lambda i: (-scores[doc_hashes[i]], i),
+        )
+        if rerank_request.top_n is not None:
+            ranked = ranked[: rerank_request.top_n]
 
         results = [
             RerankResult(
-                index=r["index"],
-                relevance_score=r["relevance_score"],
+                index=i,
+                relevance_score=scores[doc_hashes[i]],
             )
-            for r in response_body.get("results", [])
+            for i in ranked
         ]
 
-        query_tokens = len(ENCODER.encode(rerank_request.query))
-        doc_tokens = sum(len(ENCODER.encode(d)) for d in rerank_request.documents)
-        total_tokens = query_tokens + doc_tokens
+        total_tokens = input_tokens or await self._count_tokens(rerank_request.query, rerank_request.documents)
 
         return RerankResponse(
             id="rerank-" + str(uuid.uuid4())[:8],
             results=results,
-            meta={"model": model_id, "region": RERANK_REGION},
+            meta={"model": model_id, "region": region},
             usage={"prompt_tokens": total_tokens, "total_tokens": total_tokens},
         )
 
@@ -1,6 +1,6 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Body, Depends
+from fastapi import APIRouter, Body, Depends, Header
 from fastapi.responses import StreamingResponse
 
 from api.auth import api_key_auth
@@ -33,6 +33,9 @@ async def chat_completions(
             ],
         ),
     ],
+    x_completion_cache: Annotated[
+        str | None, Header(description="'on' to force or 'off' to bypass the completion cache")
+    ] = None,
 ):
     if chat_request.model.lower().startswith("gpt-"):
         chat_request.model = DEFAULT_MODEL
@@ -40,6 +43,9 @@ async def chat_completions(
     # Exception will be raised if model not supported.
     model = BedrockModel()
     model.validate(chat_request)
+    cache_mode = x_completion_cache.lower() if x_completion_cache else None
     if chat_request.stream:
-        return StreamingResponse(content=model.chat_stream(chat_request), media_type="text/event-stream")
-    return await model.chat(chat_request)
+        return StreamingResponse(
+            content=model.chat_stream(chat_request, cache_mode=cache_mode), media_type="text/event-stream"
+        )
+    return await model.chat(chat_request, cache_mode=cache_mode)
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends
+
+from api.admission import admission
+from api.auth import api_key_auth
+from api.models.bedrock import coalescing_metrics, completion_cache, pool_metrics, prompt_cache_stats
+
+router = APIRouter(
+    prefix="/metrics",
+    dependencies=[Depends(api_key_auth)],
+)
+
+
+@router.get("")
+async def get_metrics():
+    """Thread pool, admission, completion cache, coalescing and prompt cache counters, for dashboards and load tests."""
+    return {
+        "pools": pool_metrics(),
+        "admission": admission.stats(),
+        "completion_cache": completion_cache.stats(),
+        "coalescing": coalescing_metrics(),
+        "prompt_cache": prompt_cache_stats.stats(),
+    }
@@ -33,4 +33,4 @@ async def rerank(
     ],
 ):
     model = get_rerank_model()
-    return model.rerank(rerank_request)
+    return await model.rerank(rerank_request)
@@ -182,7 +182,7 @@ class EmbeddingsRequest(BaseModel):
     input: str | list[str] | Iterable[int | Iterable[int]]
     model: str
     encoding_format: Literal["float", "base64"] = "float"
-    dimensions: int | None = None  # not used.
+    dimensions: int | None = None  # Titan v2 and Cohere v4 only.
     user: str | None = None  # not used.
 
 
@@ -18,3 +18,52 @@ ENABLE_APPLICATION_INFERENCE_PROFILES = os.environ.get("ENABLE_APPLICATION_INFER
 ENABLE_PROMPT_CACHING = os.environ.get("ENABLE_PROMPT_CACHING", "false").lower() != "false"
 RERANK_REGION = os.environ.get("RERANK_REGION", "us-east-1")
 DEFAULT_RERANK_MODEL = os.environ.get("DEFAULT_RERANK_MODEL", "cohere.rerank-v3-5:0")
+EMBEDDINGS_MAX_CONCURRENCY = int(os.environ.get("EMBEDDINGS_MAX_CONCURRENCY", "8"))
+RERANK_CACHE_SIZE = int(os.environ.get("RERANK_CACHE_SIZE", "1024"))  # 0 disables the cache
+RERANK_CACHE_TTL = int(os.environ.get("RERANK_CACHE_TTL", "600"))  # seconds
+RERANK_USAGE_MODE = os.environ.get("RERANK_USAGE_MODE", "estimate").lower()  # estimate | exact
+# Comma-separated regions; the first one is preferred until health scores say otherwise
+BEDROCK_REGIONS = [r.strip() for r in os.environ.get("BEDROCK_REGIONS", AWS_REGION).split(",") if r.strip()]
+RERANK_REGIONS = [r.strip() for r in os.environ.get("RERANK_REGIONS", RERANK_REGION).split(",") if r.strip()]
+# Optional per-region endpoint overrides, e.g. local stubs: "us-east-1=http://localhost:9001,..."
+BEDROCK_ENDPOINT_URLS = dict(
+    item.split("=", 1) for item in os.environ.get("BEDROCK_ENDPOINT_URLS", "").split(",") if "=" in item
+)
+ENABLE_HEDGED_REQUESTS = os.environ.get("ENABLE_HEDGED_REQUESTS", "false").lower() != "false"
+HEDGE_DEFAULT_DELAY_MS = int(os.environ.get("HEDGE_DEFAULT_DELAY_MS", "1000"))  # until p95 is known
+HEDGE_MIN_DELAY_MS = int(os.environ.get("HEDGE_MIN_DELAY_MS", "50"))
+# After a retryable failure a region is ranked down for this long, then its error rate is forgotten
+REGION_COOLDOWN_SECONDS = float(os.environ.get("REGION_COOLDOWN_SECONDS", "30"))
+
+# Per-model admission control (AIMD concurrency limit + optional token budget + fair queue)
+ENABLE_ADMISSION_CONTROL = os.environ.get("ENABLE_ADMISSION_CONTROL", "false").lower() != "false"
+ADMISSION_INITIAL_LIMIT = int(os.environ.get("ADMISSION_INITIAL_LIMIT", "16"))
+ADMISSION_MIN_LIMIT = int(os.environ.get("ADMISSION_MIN_LIMIT", "1"))
+ADMISSION_MAX_LIMIT = int(os.environ.get("ADMISSION_MAX_LIMIT", "64"))
+ADMISSION_LATENCY_TARGET_MS = int(os.environ.get("ADMISSION_LATENCY_TARGET_MS", "0"))  # 0 disables
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", "100"))
+ADMISSION_QUEUE_TIMEOUT_MS = int(os.environ.get("ADMISSION_QUEUE_TIMEOUT_MS", "5000"))
+# "200000" for every model, or "*=200000,us.anthropic.claude-sonnet-4-20250514-v1:0=400000"; 0 disables
+ADMISSION_TOKENS_PER_MINUTE = {}
+for _item in os.environ.get("ADMISSION_TOKENS_PER_MINUTE", "").split(","):
+    if _item.strip():
+        _model_id, _, _amount = _item.strip().rpartition("=")
+        ADMISSION_TOKENS_PER_MINUTE[_model_id or "*"] = int(_amount)
+
+# Thread pool (and matching HTTP connection pool) size per Bedrock operation class
+CHAT_STREAM_POOL_SIZE = int(os.environ.get("CHAT_STREAM_POOL_SIZE", "32"))
+CHAT_POOL_SIZE = int(os.environ.get("CHAT_POOL_SIZE", "16"))
+EMBEDDINGS_POOL_SIZE = int(os.environ.get("EMBEDDINGS_POOL_SIZE", "16"))
+RERANK_POOL_SIZE = int(os.environ.get("RERANK_POOL_SIZE", "8"))
+
+# Completion cache for deterministic non-streaming chat requests (temperature 0, or the
+# X-Completion-Cache: on header). X-Completion-Cache: off bypasses it for a request.
+ENABLE_COMPLETION_CACHE = os.environ.get("ENABLE_COMPLETION_CACHE", "false").lower() != "false"
+COMPLETION_CACHE_SIZE = int(os.environ.get("COMPLETION_CACHE_SIZE", "1000"))
+COMPLETION_CACHE_TTL = int(os.environ.get("COMPLETION_CACHE_TTL", "3600"))  # seconds
+# Optional shared tier, e.g. redis://redis-service:6379/2 (DB 0 and 1 are used by Open WebUI)
+COMPLETION_CACHE_REDIS_URL = os.environ.get("COMPLETION_CACHE_REDIS_URL", "")
+
+# Share one Bedrock call between identical concurrent embeddings requests, and chat requests
+# with temperature 0 (sampled requests always get their own call)
+ENABLE_REQUEST_COALESCING = os.environ.get("ENABLE_REQUEST_COALESCING", "false").lower() != "false"
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls: the first caller (leader) runs the call, callers
+    arriving with the same key while it is in flight (followers) await the leader's result.
+
+    All methods run on the event loop, so no locking is needed.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.inflight: dict[str, asyncio.Future] = {}
+        self.calls = 0
+        self.saved = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            future = self.inflight.get(key)
+            if future is None:
+                break
+            self.saved += 1
+            try:
+                # shield: a follower going away must not cancel the leader's call
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled, not us: try again, possibly as the new leader
+                self.saved -= 1
+
+        future = asyncio.get_running_loop().create_future()
+        # Avoid "exception was never retrieved" warnings when nobody followed
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.inflight[key] = future
+        self.calls += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self.inflight[key]
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "saved": self.saved, "inflight": len(self.inflight)}
+
+
+class SharedStream:
+    """Events of one Bedrock stream, replayed from the start to every consumer."""
+
+    def __init__(self):
+        self.events: list = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.consumers = 0
+        self.task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+
+    def append(self, event):
+        self.events.append(event)
+        self._notify()
+
+    def finish(self, error: BaseException | None = None):
+        if not self.done:
+            self.done = True
+            self.error = error
+            self._notify()
+
+    def _notify(self):
+        # Wake current waiters; later waiters use a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def __aiter__(self) -> AsyncIterator:
+        index = 0
+        while True:
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class StreamFlight:
+    """Single-flight for event streams.
+
+    The stream is produced by a task of its own rather than by the request that started it,
+    and every request (the first one included) consumes it through consume(). A client going
+    away, even the first one, doesn't end the stream for the others; it is cancelled only
+    when no consumer is left.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.inflight: dict[str, SharedStream] = {}
+        self.calls = 0
+        self.saved = 0
+
+    def follow(self, key: str) -> SharedStream | None:
+        shared = self.inflight.get(key)
+        if shared is not None:
+            self.saved += 1
+        return shared
+
+    def lead(self, key: str, produce: Callable[[SharedStream], Awaitable[None]]) -> SharedStream:
+        """Start produce(shared) in a task; it appends events to shared until the stream ends."""
+        shared = self.inflight[key] = SharedStream()
+        self.calls += 1
+        shared.task = asyncio.create_task(self._produce(key, shared, produce))
+        return shared
+
+    async def _produce(self, key: str, shared: SharedStream, produce: Callable[[SharedStream], Awaitable[None]]):
+        error = None
+        try:
+            await produce(shared)
+        except asyncio.CancelledError:
+            # Only consume() cancels, once nobody is reading: there is no one to tell
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            self._release(key, shared, error)
+
+    async def consume(self, key: str, shared: SharedStream) -> AsyncIterator:
+        shared.consumers += 1
+        try:
+            async for event in shared:
+                yield event
+        finally:
+            shared.consumers -= 1
+            if not shared.consumers and not shared.done:
+                # The last consumer went away: stop reading from Bedrock
+                self._release(key, shared)
+                shared.task.cancel()
+
+    def _release(self, key: str, shared: SharedStream, error: BaseException | None = None):
+        shared.finish(error)
+        if self.inflight.get(key) is shared:
+            del self.inflight[key]
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "saved": self.saved, "inflight": len(self.inflight)}
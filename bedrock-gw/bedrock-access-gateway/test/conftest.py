@@ -0,0 +1,54 @@
+"""One local Bedrock stub (benchmark/bedrock_stub.py) per region.
+
+Settings are read when api.* is imported, so the stubs are started and the environment is
+set here, before any test module imports the gateway.
+
+Run from the repository root of the gateway: python -m pytest test
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmark"))
+
+from bedrock_stub import BedrockStub, StubConfig  # noqa: E402
+
+REGIONS = ("us-east-1", "us-west-2")
+HEDGE_DEFAULT_DELAY_MS = 200
+
+_stubs = {region: BedrockStub(StubConfig(invoke_latency_ms=0)) for region in REGIONS}
+for _stub in _stubs.values():
+    _stub.start()
+
+os.environ.update(
+    {
+        "API_KEY": "test",
+        "AWS_REGION": REGIONS[0],
+        "BEDROCK_REGIONS": ",".join(REGIONS),
+        "RERANK_REGIONS": ",".join(REGIONS),
+        "BEDROCK_ENDPOINT_URLS": ",".join(f"{region}={stub.url}" for region, stub in _stubs.items()),
+        # Control plane client (list_foundation_models on import)
+        "AWS_ENDPOINT_URL_BEDROCK": _stubs[REGIONS[0]].url,
+        "AWS_ACCESS_KEY_ID": "test",
+        "AWS_SECRET_ACCESS_KEY": "test",
+        "AWS_EC2_METADATA_DISABLED": "true",
+        "HEDGE_DEFAULT_DELAY_MS": str(HEDGE_DEFAULT_DELAY_MS),
+    }
+)
+for _name in ("AWS_PROFILE", "AWS_SESSION_TOKEN"):
+    os.environ.pop(_name, None)
+
+
+@pytest.fixture
+def stubs() -> dict[str, BedrockStub]:
+    """The per-region stubs, with default behaviour and zeroed counters."""
+    for stub in _stubs.values():
+        stub.config = StubConfig(invoke_latency_ms=0)
+        with stub._lock:
+            stub.stats = dict.fromkeys(stub.stats, 0)
+    return _stubs
+
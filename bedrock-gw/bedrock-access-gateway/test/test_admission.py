@@ -0,0 +1,186 @@
+"""ModelLimiter / AdmissionController: token bucket, queue rejections and AIMD limits."""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import api.admission as admission_module
+from api.admission import AdmissionController, ModelLimiter
+
+MODEL = "test-model"
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    """Small, fast defaults; tests override what they exercise."""
+    monkeypatch.setattr(admission_module, "ENABLE_ADMISSION_CONTROL", True)
+    monkeypatch.setattr(admission_module, "ADMISSION_INITIAL_LIMIT", 1)
+    monkeypatch.setattr(admission_module, "ADMISSION_MIN_LIMIT", 1)
+    monkeypatch.setattr(admission_module, "ADMISSION_MAX_LIMIT", 64)
+    monkeypatch.setattr(admission_module, "ADMISSION_MAX_QUEUE", 10)
+    monkeypatch.setattr(admission_module, "ADMISSION_QUEUE_TIMEOUT_MS", 100)
+    monkeypatch.setattr(admission_module, "ADMISSION_LATENCY_TARGET_MS", 0)
+
+
+def test_token_bucket_refills_over_time(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(admission_module.time, "monotonic", lambda: clock[0])
+    limiter = ModelLimiter(MODEL, tokens_per_minute=600)
+
+    assert limiter._take_tokens(600)
+    assert not limiter._take_tokens(100)
+
+    clock[0] += 10  # 10 tokens per second
+    assert limiter._take_tokens(100)
+    assert not limiter._take_tokens(1)
+
+
+def test_request_larger_than_the_budget_still_fits_an_empty_bucket():
+    limiter = ModelLimiter(MODEL, tokens_per_minute=100)
+
+    assert limiter._take_tokens(5000)
+    assert limiter.tokens == 0
+
+
+def test_queue_full_rejects_and_refunds_tokens(monkeypatch):
+    monkeypatch.setattr(admission_module, "ADMISSION_MAX_QUEUE", 0)
+
+    async def scenario(limiter: ModelLimiter):
+        await limiter.acquire(100, "a")
+        tokens = limiter.tokens
+        with pytest.raises(HTTPException) as error:
+            await limiter.acquire(100, "b")
+        return tokens, error.value
+
+    limiter = ModelLimiter(MODEL, tokens_per_minute=60_000)
+    tokens, error = asyncio.run(scenario(limiter))
+
+    assert error.status_code == 429
+    assert "Too many queued" in error.detail
+    assert limiter.tokens == pytest.approx(tokens, abs=50)
+    assert limiter.rejected == 1
+
+
+def test_queue_timeout_rejects_and_refunds_tokens():
+    async def scenario(limiter: ModelLimiter):
+        await limiter.acquire(100, "a")
+        tokens = limiter.tokens
+        with pytest.raises(HTTPException) as error:
+            await limiter.acquire(1000, "b")
+        return tokens, error.value
+
+    limiter = ModelLimiter(MODEL, tokens_per_minute=60_000)
+    tokens, error = asyncio.run(scenario(limiter))
+
+    assert error.status_code == 429
+    assert "timed out" in error.detail
+    # Only the refill during the 100ms wait, not minus the 1000 taken on arrival
+    assert limiter.tokens >= tokens
+    assert limiter.queued == 0
+    assert limiter.inflight == 1
+
+
+def test_cancelled_wait_refunds_tokens():
+    async def scenario(limiter: ModelLimiter):
+        await limiter.acquire(100, "a")
+        tokens = limiter.tokens
+        waiting = asyncio.create_task(limiter.acquire(1000, "b"))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        return tokens
+
+    limiter = ModelLimiter(MODEL, tokens_per_minute=60_000)
+    tokens = asyncio.run(scenario(limiter))
+
+    assert limiter.tokens >= tokens
+    assert limiter.queued == 0
+
+
+def test_waiters_are_admitted_in_turn_as_slots_free():
+    async def scenario(limiter: ModelLimiter):
+        await limiter.acquire(0, "a")
+        waiting = asyncio.create_task(limiter.acquire(0, "b"))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        limiter.release(0.01, throttled=False)
+        await waiting
+
+    limiter = ModelLimiter(MODEL)
+    asyncio.run(scenario(limiter))
+
+    assert limiter.inflight == 1
+    assert limiter.admitted == 2
+
+
+def test_throttling_halves_the_limit():
+    limiter = ModelLimiter(MODEL)
+    limiter.limit = 16.0
+    limiter.inflight = 1
+
+    limiter.release(0.1, throttled=True)
+
+    assert limiter.limit == 8.0
+    assert limiter.throttled == 1
+
+
+def test_limit_never_drops_below_the_minimum():
+    limiter = ModelLimiter(MODEL)
+    limiter.limit = 1.5
+    limiter.inflight = 1
+
+    limiter.release(0.1, throttled=True)
+
+    assert limiter.limit == 1
+
+
+def test_success_grows_the_limit_additively():
+    limiter = ModelLimiter(MODEL)
+    limiter.limit = 4.0
+    limiter.inflight = 1
+
+    limiter.release(0.1, throttled=False)
+
+    assert limiter.limit == 4.25
+
+
+def test_errors_leave_the_limit_unchanged():
+    limiter = ModelLimiter(MODEL)
+    limiter.limit = 4.0
+    limiter.inflight = 1
+
+    limiter.release(0.1, throttled=False, failed=True)
+
+    assert limiter.limit == 4.0
+    assert limiter.inflight == 0
+
+
+@pytest.mark.parametrize(
+    "raised, expected_limit",
+    [
+        (None, 4.25),
+        (HTTPException(status_code=429), 2.0),
+        (HTTPException(status_code=500), 4.0),
+        (HTTPException(status_code=400), 4.0),
+        (RuntimeError("boom"), 4.0),
+    ],
+)
+def test_admit_adapts_the_limit_to_the_outcome(raised, expected_limit):
+    controller = AdmissionController()
+
+    async def scenario():
+        async with controller.admit(MODEL):
+            controller.limiters[MODEL].limit = 4.0
+            if raised is not None:
+                raise raised
+
+    if raised is None:
+        asyncio.run(scenario())
+    else:
+        with pytest.raises(type(raised)):
+            asyncio.run(scenario())
+
+    assert controller.limiters[MODEL].limit == expected_limit
+    assert controller.limiters[MODEL].inflight == 0
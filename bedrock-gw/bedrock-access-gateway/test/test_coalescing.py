@@ -0,0 +1,67 @@
+"""Request coalescing of identical concurrent chat requests against the local stub."""
+
+import asyncio
+
+import pytest
+from bedrock_stub import CHAT_MODEL_ID
+
+import api.models.bedrock as bedrock
+from api.schema import ChatRequest, UserMessage
+
+CONCURRENT = 3
+
+
+@pytest.fixture
+def coalescing(monkeypatch, stubs):
+    """Bedrock calls per operation, summed over the regions (the chat pool picks one by health)"""
+    monkeypatch.setattr(bedrock, "ENABLE_REQUEST_COALESCING", True)
+    for stub in stubs.values():
+        # Long enough for every request to join the first one in flight
+        stub.config.latency_ms = 300
+        stub.config.tokens_per_second = 10_000
+    return lambda operation: sum(stub.stats[operation] for stub in stubs.values())
+
+
+def make_request(temperature: float | None, stream: bool = False) -> ChatRequest:
+    return ChatRequest(
+        model=CHAT_MODEL_ID,
+        messages=[UserMessage(content="hello")],
+        temperature=temperature,
+        stream=stream,
+    )
+
+
+async def chat_concurrently(temperature: float | None):
+    await asyncio.gather(*(bedrock.BedrockModel().chat(make_request(temperature)) for _ in range(CONCURRENT)))
+
+
+async def chat_stream_concurrently(temperature: float | None):
+    async def consume():
+        return [chunk async for chunk in bedrock.BedrockModel().chat_stream(make_request(temperature, stream=True))]
+
+    await asyncio.gather(*(consume() for _ in range(CONCURRENT)))
+
+
+def test_deterministic_requests_share_one_call(coalescing):
+    asyncio.run(chat_concurrently(0))
+
+    assert coalescing("converse") == 1
+
+
+@pytest.mark.parametrize("temperature", [0.7, None])
+def test_sampled_requests_are_not_coalesced(coalescing, temperature):
+    asyncio.run(chat_concurrently(temperature))
+
+    assert coalescing("converse") == CONCURRENT
+
+
+def test_deterministic_streams_share_one_call(coalescing):
+    asyncio.run(chat_stream_concurrently(0))
+
+    assert coalescing("converse_stream") == 1
+
+
+def test_sampled_streams_are_not_coalesced(coalescing):
+    asyncio.run(chat_stream_concurrently(0.7))
+
+    assert coalescing("converse_stream") == CONCURRENT
@@ -0,0 +1,136 @@
+"""RegionalClientPool failover, hedging and region health against one local stub per region."""
+
+import asyncio
+import json
+import time
+
+import pytest
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from conftest import HEDGE_DEFAULT_DELAY_MS, REGIONS
+
+from api.models.bedrock import CohereRerankModel, RegionalClientPool
+from api.schema import RerankRequest
+
+EAST, WEST = REGIONS
+RERANK_BODY = json.dumps(
+    {"api_version": 2, "query": "capital of france", "documents": ["berlin", "paris is the capital of france"]}
+)
+
+
+def rerank(client) -> dict:
+    response = client.invoke_model(
+        body=RERANK_BODY, modelId="cohere.rerank-v3-5:0", accept="application/json", contentType="application/json"
+    )
+    return json.loads(response["body"].read())
+
+
+def make_pool() -> RegionalClientPool:
+    # A fresh pool per test, so health scores don't leak between tests
+    return RegionalClientPool("test", list(REGIONS), Config(connect_timeout=5, read_timeout=10), max_workers=4)
+
+
+def test_first_region_serves_when_healthy(stubs):
+    result = asyncio.run(make_pool().run(rerank))
+
+    assert result["results"][0]["index"] == 1
+    assert stubs[EAST].stats["invoke_model"] == 1
+    assert stubs[WEST].stats["invoke_model"] == 0
+
+
+@pytest.mark.parametrize("failure", ["throttle_rate", "error_rate"])
+def test_fails_over_on_throttling_and_5xx(stubs, failure):
+    setattr(stubs[EAST].config, failure, 1.0)
+    pool = make_pool()
+
+    result = asyncio.run(pool.run(rerank))
+
+    assert result["results"][0]["index"] == 1
+    assert stubs[EAST].stats["throttled"] + stubs[EAST].stats["errors"] >= 1
+    assert stubs[WEST].stats["invoke_model"] == 1
+    assert pool.health[EAST].error_rate > 0
+    assert pool.ranked_regions() == [WEST, EAST]
+
+
+def test_non_retryable_error_does_not_fail_over(stubs):
+    def invalid(client):
+        return client.invoke_model(body="{}", modelId="cohere.rerank-v3-5:0", contentType="application/json")
+
+    with pytest.raises(ClientError) as error:
+        asyncio.run(make_pool().run(invalid))
+
+    assert error.value.response["Error"]["Code"] == "ValidationException"
+    assert stubs[WEST].stats["invoke_model"] == 0
+
+
+def test_all_regions_failing_raises_last_error(stubs):
+    for stub in stubs.values():
+        stub.config.error_rate = 1.0
+
+    with pytest.raises(ClientError) as error:
+        asyncio.run(make_pool().run(rerank))
+
+    assert error.value.response["Error"]["Code"] == "ServiceUnavailableException"
+
+
+def test_hedged_request_wins_after_hedge_delay(stubs):
+    stubs[EAST].config.invoke_latency_ms = 3000
+    pool = make_pool()
+
+    started = time.perf_counter()
+    result = asyncio.run(pool.run(rerank, hedge=True))
+    elapsed = time.perf_counter() - started
+
+    assert result["results"][0]["index"] == 1
+    assert stubs[EAST].stats["invoke_model"] == 1
+    assert stubs[WEST].stats["invoke_model"] == 1
+    # Sent to the second region only after the delay, and answered long before the first
+    assert HEDGE_DEFAULT_DELAY_MS / 1000 <= elapsed < 2
+
+
+def test_no_hedge_when_disabled(stubs):
+    stubs[EAST].config.invoke_latency_ms = 500
+
+    asyncio.run(make_pool().run(rerank, hedge=False))
+
+    assert stubs[WEST].stats["invoke_model"] == 0
+
+
+def test_region_health_cooldown():
+    pool = make_pool()
+    for region in REGIONS:
+        pool.health[region].cooldown = 0.2
+        pool.health[region].record(0.05, failed=False)
+
+    pool.health[EAST].record(None, failed=True)
+    assert pool.ranked_regions() == [WEST, EAST]
+
+    # Still demoted during the cooldown, back in front (by latency, then order) after it
+    time.sleep(0.1)
+    assert pool.ranked_regions() == [WEST, EAST]
+    time.sleep(0.15)
+    assert pool.health[EAST].current_error_rate() == 0
+    assert pool.ranked_regions() == [EAST, WEST]
+
+
+def test_failure_during_cooldown_extends_it():
+    pool = make_pool()
+    health = pool.health[EAST]
+    health.cooldown = 0.2
+
+    health.record(None, failed=True)
+    time.sleep(0.15)
+    health.record(None, failed=True)
+    time.sleep(0.1)
+
+    assert health.current_error_rate() > 0
+
+
+def test_rerank_reports_the_region_that_answered(stubs):
+    stubs[EAST].config.error_rate = 1.0
+    request = RerankRequest(query="region failover", documents=["a", "b"])
+
+    response = asyncio.run(CohereRerankModel().rerank(request))
+
+    assert stubs[WEST].stats["invoke_model"] == 1
+    assert response.meta["region"] == WEST
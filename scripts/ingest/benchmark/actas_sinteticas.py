@@ -0,0 +1,223 @@
+"""
+Actas sintéticas para el benchmark de ingesta.
+
+generar_acta() arma un Markdown con el formato que produce Docling (encabezado,
+tablas por sección, temas varios numerados y cierre) con N filas por sección.
+extraer_llamada() es la "extracción" que hace el servidor falso: lee las filas
+de las secciones de una llamada y devuelve el JSON que devolvería el modelo,
+con el esquema de esquemas.py. Generador y extractor comparten el formato, así
+el resultado es exacto y la cantidad de notas se puede verificar.
+"""
+
+import random
+import re
+
+from secciones import SECCIONES, SECCIONES_POR_LLAMADA
+
+# Filas por sección de cada tamaño
+TAMANOS = {"chica": 3, "mediana": 10, "grande": 25}
+
+MESES = ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio", "agosto",
+         "septiembre", "octubre", "noviembre", "diciembre"]
+NOMBRES = ["Juan", "María", "Carlos", "Laura", "Jorge", "Ana", "Miguel", "Silvia", "Pablo", "Graciela"]
+APELLIDOS = ["Pérez", "González", "Rodríguez", "Fernández", "López", "Martínez", "Gómez", "Díaz", "Sosa", "Romero"]
+TEMAS = ["Habilitación profesional", "Cancelación de matrícula", "Reinscripción", "Denuncia por ejercicio ilegal",
+         "Solicitud de certificado", "Consulta sobre incumbencias", "Baja por jubilación", "Cambio de domicilio"]
+RESOLUCIONES = ["Se aprueba", "Se toma conocimiento", "Pase a Asesoría Legal", "Se rechaza por falta de documentación",
+                "Se otorga la matrícula solicitada", "Archívese"]
+TIPOS_RESOLUCION = ["Alta", "Baja", "Suspensión", "Rehabilitación"]
+DISTRITOS = ["I", "II", "III", "IV", "V", "VI", "VII"]
+
+# Prefijo del código de nota de cada sección de notas
+CODIGOS = {"ME": "Me", "MT": "Mt", "AS": "AS", "AT": "AT"}
+
+
+def _persona(rnd: random.Random) -> tuple:
+    nombre = f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)}"
+    matricula = f"T-{rnd.randint(10, 99)}.{rnd.randint(100, 999)}"
+    return nombre, matricula
+
+
+def _numero(rnd: random.Random) -> str:
+    n = rnd.randint(10000, 19999)
+    return f"{n // 1000}.{n % 1000:03d}/24"
+
+
+def generar_acta(numero: int, filas: int, semilla: int = None) -> tuple:
+    """Devuelve (markdown, esperado) con esperado = {"notas": n, "temas_varios": n}"""
+    rnd = random.Random(numero if semilla is None else semilla)
+    dia, mes = rnd.randint(1, 28), rnd.randint(1, 12)
+    participantes = ", ".join(_persona(rnd)[0] for _ in range(5))
+    partes = [
+        "# COLEGIO DE TÉCNICOS DE LA PROVINCIA DE BUENOS AIRES",
+        f"## ACTA N° {numero}",
+        f"En La Plata, a los {dia} días del mes de {MESES[mes - 1]} de 2024, siendo las 18:00 horas, "
+        f"se reúne el Consejo Directivo con la presencia de: {participantes}.",
+    ]
+    notas = 0
+
+    for clave in ("ME", "MT"):
+        partes.append(f"## NOTAS INGRESADAS {clave}")
+        partes.append(_tabla_notas(rnd, clave, filas))
+        notas += filas
+    for distrito in DISTRITOS:
+        partes.append(f"## DISTRITO {distrito}")
+        filas_tabla = ["| Nota | Tema | Técnico | Matrícula | Resolución |", "|---|---|---|---|---|"]
+        for _ in range(filas):
+            nombre, matricula = _persona(rnd)
+            filas_tabla.append(
+                f"| SD {_numero(rnd)} | {rnd.choice(TEMAS)} | {nombre} | {matricula} | "
+                f"Res. {rnd.randint(100, 999)}/24 - {rnd.choice(TIPOS_RESOLUCION)} |"
+            )
+        partes.append("\n".join(filas_tabla))
+        notas += filas
+    for clave in ("AS", "AT"):
+        partes.append(f"## NOTAS {clave}")
+        partes.append(_tabla_notas(rnd, clave, filas))
+        notas += filas
+
+    partes.append("## TEMAS VARIOS")
+    partes.append("\n".join(
+        f"{i}. {rnd.choice(TEMAS)}: se informa sobre el estado del trámite. {rnd.choice(RESOLUCIONES)}."
+        for i in range(1, filas + 1)
+    ))
+    partes.append(
+        f"Siendo las 21:30 horas se da por finalizada la sesión. "
+        f"El acta consta de {max(2, notas // 8)} páginas."
+    )
+    return "\n\n".join(partes) + "\n", {"notas": notas, "temas_varios": filas}
+
+
+def _tabla_notas(rnd: random.Random, clave: str, filas: int) -> str:
+    lineas = ["| Nota | Tema | Descripción | Resolución |", "|---|---|---|---|"]
+    for _ in range(filas):
+        nombre, matricula = _persona(rnd)
+        fecha = f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/2024"
+        lineas.append(
+            f"| {CODIGOS[clave]} {_numero(rnd)} | {rnd.choice(TEMAS)} ({fecha}) | "
+            f"El técnico {nombre}, matrícula {matricula}, presenta la solicitud. Expte. {rnd.randint(1000, 9999)}/24 | "
+            f"{rnd.choice(RESOLUCIONES)} |"
+        )
+    return "\n".join(lineas)
+
+
+# --- Extracción (lo que "responde el modelo" en el servidor falso) ---
+
+def _celdas(linea: str) -> list:
+    return [c.strip() for c in linea.strip().strip("|").split("|")]
+
+
+def _filas(lineas: list) -> list:
+    return [
+        _celdas(l) for l in lineas
+        if l.startswith("|") and not l.startswith("|---") and not l.startswith("| Nota")
+    ]
+
+
+def _fecha_iso(fecha: str) -> str:
+    dia, mes, anio = fecha.split("/")
+    return f"{anio}-{mes}-{dia}"
+
+
+def _nota(celdas: list, seccion: str) -> dict:
+    codigo, tema, descripcion, resolucion = celdas
+    fecha = re.search(r"\((\d\d/\d\d/\d{4})\)", tema)
+    persona = re.search(r"técnico (.+?), matrícula (T-[\d.]+)", descripcion)
+    expediente = re.search(r"Expte\. (\S+)", descripcion)
+    return {
+        "codigo_nota": codigo,
+        "seccion": seccion,
+        "tema": re.sub(r"\s*\(.*\)$", "", tema),
+        "fecha_nota": _fecha_iso(fecha.group(1)) if fecha else None,
+        "descripcion": descripcion,
+        "resolucion": resolucion,
+        "personas": [
+            {"nombre_completo": persona.group(1), "numero_matricula": persona.group(2), "rol_mencion": "solicitante"}
+        ] if persona else [],
+        "expedientes": [{"numero_expediente": expediente.group(1), "referencia_ctd": None}] if expediente else [],
+    }
+
+
+def _nota_distrito(celdas: list, distrito: str) -> dict:
+    codigo, tema, tecnico, matricula, resolucion = celdas
+    numero, _, tipo = resolucion.partition(" - ")
+    return {
+        "codigo_nota": codigo,
+        "seccion": distrito,
+        "tema": tema,
+        "fecha_nota": None,
+        "descripcion": f"{tema} de {tecnico}",
+        "resolucion": resolucion,
+        "personas": [{"nombre_completo": tecnico, "numero_matricula": matricula, "rol_mencion": "involucrado"}],
+        "expedientes": [],
+        "resoluciones_distritales": [{
+            "numero_resolucion": numero.replace("Res. ", ""),
+            "tecnico": tecnico,
+            "matricula": matricula,
+            "tipo_resolucion": tipo,
+            "distrito": distrito,
+        }],
+    }
+
+
+def _acta(texto: str) -> dict:
+    fecha = re.search(r"a los (\d+) días del mes de (\w+) de (\d{4})", texto)
+    participantes = re.search(r"presencia de: (.+?)\.\n", texto)
+    fin = re.search(r"Siendo las (\d\d:\d\d) horas se da por finalizada", texto)
+    paginas = re.search(r"consta de (\d+) páginas", texto)
+    return {
+        "acta_numero": int(re.search(r"ACTA N° (\d+)", texto).group(1)),
+        "fecha": f"{fecha.group(3)}-{MESES.index(fecha.group(2)) + 1:02d}-{int(fecha.group(1)):02d}" if fecha else None,
+        "participantes": participantes.group(1).split(", ") if participantes else [],
+        "hora_inicio": "18:00",
+        "hora_fin": fin.group(1) if fin else None,
+        "total_paginas": int(paginas.group(1)) if paginas else None,
+    }
+
+
+def _secciones(texto: str) -> dict:
+    """{seccion: lineas}. Cada sección termina en el siguiente encabezado o en el
+    "[...]" que agrega recortar() antes del cierre (detectar_secciones no sirve acá:
+    un texto recortado puede tener una sola sección)"""
+    secciones, actual = {}, None
+    for linea in texto.split("\n"):
+        if linea.startswith("## ") or linea.startswith("[...]"):
+            actual = next((clave for clave, patron in SECCIONES if re.fullmatch(rf"## {patron}", linea)), None)
+            if actual:
+                secciones[actual] = []
+        elif actual:
+            secciones[actual].append(linea)
+    return secciones
+
+
+def extraer_llamada(texto: str, llamada: str) -> dict:
+    """JSON de una llamada de extracción a partir del texto del acta (completo o recortado)"""
+    lineas_por_seccion = _secciones(texto)
+
+    def seccion(clave: str) -> list:
+        return _filas(lineas_por_seccion.get(clave, []))
+
+    if llamada == "metadatos y ME/MT":
+        return {
+            "acta": _acta(texto),
+            "notas_me_mt": [_nota(c, clave) for clave in ("ME", "MT") for c in seccion(clave)],
+        }
+    if llamada.startswith("distritos"):
+        return {"notas_distritos": [
+            _nota_distrito(c, f"Distrito {clave.split()[1]}") for clave in SECCIONES_POR_LLAMADA[llamada] for c in seccion(clave)
+        ]}
+    if llamada == "AS y AT":
+        return {"notas_as": [_nota(c, "AS") for c in seccion("AS")], "notas_at": [_nota(c, "AT") for c in seccion("AT")]}
+    if llamada == "temas varios":
+        temas = []
+        for linea in lineas_por_seccion.get("TEMAS VARIOS", []):
+            punto = re.match(r"(\d+)\. (.+?): (.+?\.) (.+)$", linea)
+            if punto:
+                temas.append({
+                    "numero_punto": int(punto.group(1)),
+                    "titulo": punto.group(2),
+                    "descripcion": punto.group(3),
+                    "resolucion": punto.group(4),
+                })
+        return {"temas_varios": temas}
+    raise ValueError(f"Llamada desconocida: {llamada}")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline de la ingesta: extracción, normalización, PostgreSQL y Qdrant
+sin servicios externos.
+
+Uso (desde scripts/ingest):
+    python benchmark/bench_ingesta.py [--tamanos chica,mediana,grande] [--repeticiones 3]
+        [--latencia-ms 500] [--tokens-por-segundo 80] [--latencia-embeddings-ms 30]
+        [--streaming] [--postgres] [--guardar base.json] [--comparar base.json] [--umbral 1.2]
+
+Corre extraer_datos, normalizar_nota, guardar_todo e indexar_acta sobre actas
+sintéticas de distintos tamaños (ver actas_sinteticas.py) contra:
+- un gateway falso compatible con OpenAI, con latencia y velocidad de
+  generación configurables (servicios_falsos.ServidorFalso)
+- SQLite con el esquema de la ingesta (con --postgres, la base de DATABASE_URL,
+  que tiene que ser descartable)
+- Qdrant en modo local, en memoria
+
+Reporta p50/p95 por etapa y por llamada (las mismas líneas de metricas.py).
+Con --guardar escribe los p50 como línea base; con --comparar marca las etapas
+cuyo p50 empeoró más que --umbral veces y termina con código 1.
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+AQUI = Path(__file__).resolve().parent
+sys.path.insert(0, str(AQUI))
+sys.path.insert(0, str(AQUI.parent))
+
+from actas_sinteticas import TAMANOS, generar_acta  # noqa: E402
+from servicios_falsos import ServidorFalso, contar_filas_sqlite, usar_qdrant_local, usar_sqlite  # noqa: E402
+
+SECCIONES_NOTAS = ("notas_me_mt", "notas_distritos", "notas_as", "notas_at")
+# Diferencias menores a esto (segundos) no cuentan como regresión: son ruido
+MINIMO_REGRESION = 0.01
+
+
+def configurar_entorno(url: str, directorio: str, streaming: bool):
+    # Antes de importar los módulos de la ingesta: leen el entorno al importarse
+    os.environ["BEDROCK_URL"] = url
+    os.environ["BEDROCK_API_KEY"] = "bench"
+    os.environ["METRICAS_PATH"] = os.path.join(directorio, "metricas.jsonl")
+    os.environ["PRESUPUESTO_HISTORIAL"] = os.path.join(directorio, "historial_tokens.json")
+    os.environ["QDRANT_COLLECTION"] = "bench_ingesta"
+    os.environ["EXTRACCION_STREAMING"] = "true" if streaming else "false"
+    os.environ["REINTENTOS_MAX"] = "0"
+
+
+def correr(args, directorio: str) -> tuple:
+    servidor = ServidorFalso([], args.latencia_ms, args.tokens_por_segundo, args.latencia_embeddings_ms)
+    configurar_entorno(servidor.url, directorio, args.streaming)
+
+    import extractor
+    import metricas
+    from db import guardar_todo
+    from incremental import IngestaIncremental
+    from normalizer import normalizar_nota
+    from qdrant_index import indexar_acta
+
+    servidor.llamadas = extractor.LLAMADAS
+    sqlite_path = os.path.join(directorio, "bench.sqlite")
+    if not args.postgres:
+        usar_sqlite(sqlite_path)
+    usar_qdrant_local()
+
+    errores = []
+    numero = 9000
+    for tamano in args.tamanos:
+        for repeticion in range(args.repeticiones):
+            numero += 1
+            markdown, esperado = generar_acta(numero, TAMANOS[tamano])
+            print(f"[Bench] {tamano} #{repeticion + 1}: acta {numero}, {len(markdown)} caracteres, "
+                  f"{esperado['notas']} notas")
+            with metricas.contexto(f"{tamano}-{repeticion}"), metricas.medir("total", bytes=len(markdown)):
+                ingesta = IngestaIncremental(markdown) if args.streaming else None
+                with metricas.medir("extraccion", caracteres=len(markdown), streaming=args.streaming):
+                    datos = extractor.extraer_datos(markdown, receptor=ingesta)
+
+                notas = [n for s in SECCIONES_NOTAS for n in datos[s]]
+                copias = copy.deepcopy(notas)
+                with metricas.medir("normalizacion", notas=len(copias)):
+                    for nota in copias:
+                        normalizar_nota(nota, markdown)
+
+                with metricas.medir("db", streaming=args.streaming):
+                    if ingesta:
+                        acta_id, embeddings = ingesta.finalizar()
+                    else:
+                        acta_id, embeddings = guardar_todo(datos), None
+                indexar_acta(markdown, datos, acta_id, embeddings=embeddings)
+
+            if len(notas) != esperado["notas"] or len(datos["temas_varios"]) != esperado["temas_varios"]:
+                errores.append(f"{tamano} #{repeticion + 1}: {len(notas)} notas y {len(datos['temas_varios'])} "
+                               f"temas varios, se esperaban {esperado['notas']} y {esperado['temas_varios']}")
+
+    servidor.cerrar()
+    registros = metricas.cargar(metricas.METRICAS_PATH)
+    resumenes = {}
+    for tamano in args.tamanos:
+        filas = metricas.resumen([r for r in registros if r.get("pdf", "").startswith(f"{tamano}-")])
+        resumenes[tamano] = filas
+        print(f"\n=== Acta {tamano} ({TAMANOS[tamano]} filas por sección) ===")
+        metricas.imprimir_resumen(filas, args.repeticiones)
+
+    print(f"\n[Bench] Pedidos al gateway falso: {servidor.pedidos['chat']} chat, "
+          f"{servidor.pedidos['embeddings']} embeddings")
+    if not args.postgres:
+        print(f"[Bench] SQLite: {contar_filas_sqlite(sqlite_path)}")
+    return resumenes, errores
+
+
+def lineas_base(resumenes: dict) -> dict:
+    return {tamano: {f["etapa"]: f["p50"] for f in filas if f["p50"] is not None}
+            for tamano, filas in resumenes.items()}
+
+
+def comparar(actual: dict, base: dict, umbral: float) -> list:
+    regresiones = []
+    print(f"\n=== Comparación con la línea base (umbral {umbral:.2f}x) ===")
+    for tamano, etapas in actual.items():
+        for etapa, p50 in etapas.items():
+            anterior = base.get(tamano, {}).get(etapa)
+            if anterior is None:
+                continue
+            cociente = p50 / anterior if anterior else float("inf")
+            marca = ""
+            if cociente > umbral and p50 - anterior > MINIMO_REGRESION:
+                marca = "  ← REGRESIÓN"
+                regresiones.append(f"{tamano} / {etapa}: {anterior:.3f}s → {p50:.3f}s ({cociente:.2f}x)")
+            print(f"{tamano:<8} {etapa:<28} {anterior:9.3f} → {p50:9.3f}  {cociente:5.2f}x{marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline de la ingesta con servicios falsos")
+    parser.add_argument("--tamanos", default="chica,mediana,grande",
+                        help=f"Tamaños de acta separados por coma ({', '.join(TAMANOS)})")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--latencia-ms", type=float, default=500, help="Latencia al primer token del gateway falso")
+    parser.add_argument("--tokens-por-segundo", type=float, default=80, help="Velocidad de generación simulada")
+    parser.add_argument("--latencia-embeddings-ms", type=float, default=30)
+    parser.add_argument("--streaming", action="store_true", help="Extracción en streaming (EXTRACCION_STREAMING)")
+    parser.add_argument("--postgres", action="store_true",
+                        help="Usa la base de DATABASE_URL en lugar de SQLite. Las actas sintéticas (9001 en adelante) "
+                             "quedan en la base: usar una base descartable")
+    parser.add_argument("--guardar", help="Guarda los p50 de esta corrida como línea base (JSON)")
+    parser.add_argument("--comparar", help="Compara los p50 con una línea base guardada")
+    parser.add_argument("--umbral", type=float, default=1.2, help="Cociente a partir del cual un p50 es regresión")
+    args = parser.parse_args()
+    args.tamanos = [t.strip() for t in args.tamanos.split(",") if t.strip()]
+    desconocidos = [t for t in args.tamanos if t not in TAMANOS]
+    if desconocidos:
+        parser.error(f"Tamaños desconocidos: {', '.join(desconocidos)}")
+
+    with tempfile.TemporaryDirectory(prefix="bench_ingesta_") as directorio:
+        resumenes, errores = correr(args, directorio)
+    actual = lineas_base(resumenes)
+
+    for error in errores:
+        print(f"[Bench] ERROR de extracción: {error}")
+    if args.guardar:
+        Path(args.guardar).write_text(json.dumps(actual, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n[Bench] Línea base guardada en {args.guardar}")
+    regresiones = []
+    if args.comparar:
+        regresiones = comparar(actual, json.loads(Path(args.comparar).read_text(encoding="utf-8")), args.umbral)
+        for regresion in regresiones:
+            print(f"[Bench] Regresión: {regresion}")
+    sys.exit(1 if errores or regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
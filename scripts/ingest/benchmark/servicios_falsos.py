@@ -0,0 +1,313 @@
+"""
+Servicios locales para correr la ingesta sin gateway, PostgreSQL ni Qdrant.
+
+- ServidorFalso: servidor HTTP compatible con la API de OpenAI del gateway
+  (/api/v1/chat/completions con y sin streaming, con herramientas, y
+  /api/v1/embeddings). Responde con la extracción exacta de las actas
+  sintéticas, con latencia al primer token y velocidad de generación
+  configurables. Respeta max_tokens (finish_reason "length") y las
+  continuaciones con prefill, como Bedrock.
+- usar_sqlite(): reemplaza las conexiones de db.py por SQLite con el mismo
+  esquema, traduciendo los placeholders de psycopg2.
+- usar_qdrant_local(): reemplaza el cliente de qdrant_index por Qdrant en
+  modo local (en memoria).
+"""
+
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from actas_sinteticas import extraer_llamada
+
+# Misma aproximación que secciones.estimar_tokens
+CARACTERES_POR_TOKEN = 4
+# Tamaño de cada fragmento del stream, en tokens
+TOKENS_POR_FRAGMENTO = 8
+
+
+class ServidorFalso:
+    """Gateway falso en 127.0.0.1, en un hilo. llamadas: [(label, prompt)] de extractor.LLAMADAS"""
+
+    def __init__(self, llamadas: list, latencia_ms: float = 500, tokens_por_segundo: float = 80,
+                 latencia_embeddings_ms: float = 30):
+        self.llamadas = llamadas
+        self.latencia = latencia_ms / 1000
+        self.tokens_por_segundo = tokens_por_segundo
+        self.latencia_embeddings = latencia_embeddings_ms / 1000
+        self.pedidos = {"chat": 0, "embeddings": 0}
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                cuerpo = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if self.path.endswith("/chat/completions"):
+                    servidor._chat(self, cuerpo)
+                elif self.path.endswith("/embeddings"):
+                    servidor._embeddings(self, cuerpo)
+                else:
+                    self.send_error(404)
+
+        self.http = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.http.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.http.server_address[1]}"
+        threading.Thread(target=self.http.serve_forever, name="servidor-falso", daemon=True).start()
+
+    def cerrar(self):
+        self.http.shutdown()
+
+    # --- chat ---
+
+    def _llamada(self, mensajes: list) -> str:
+        usuario = next(m["content"] for m in reversed(mensajes) if m["role"] == "user")
+        for label, prompt in self.llamadas:
+            if usuario.startswith(prompt):
+                return label
+        raise ValueError("Pedido de extracción no reconocido")
+
+    def _chat(self, handler, cuerpo: dict):
+        self.pedidos["chat"] += 1
+        mensajes = cuerpo["messages"]
+        sistema = next((m["content"] for m in mensajes if m["role"] == "system"), "")
+        texto = json.dumps(extraer_llamada(sistema, self._llamada(mensajes)), ensure_ascii=False)
+
+        # Continuación: el último mensaje es el prefill del asistente
+        if mensajes[-1]["role"] == "assistant" and texto.startswith(mensajes[-1]["content"]):
+            texto = texto[len(mensajes[-1]["content"]):]
+        finish_reason = "tool_calls" if cuerpo.get("tools") else "stop"
+        limite = cuerpo.get("max_tokens", 4096) * CARACTERES_POR_TOKEN
+        if len(texto) > limite:
+            texto, finish_reason = texto[:limite], "length"
+
+        entrada = sum(len(str(m["content"])) for m in mensajes) // CARACTERES_POR_TOKEN
+        uso = {
+            "prompt_tokens": entrada,
+            "completion_tokens": len(texto) // CARACTERES_POR_TOKEN,
+            "total_tokens": entrada + len(texto) // CARACTERES_POR_TOKEN,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+        herramienta = cuerpo["tool_choice"]["function"]["name"] if cuerpo.get("tools") else None
+        if cuerpo.get("stream"):
+            self._stream(handler, cuerpo, texto, finish_reason, uso, herramienta)
+            return
+
+        time.sleep(self.latencia + len(texto) / CARACTERES_POR_TOKEN / self.tokens_por_segundo)
+        mensaje = {"role": "assistant", "content": None if herramienta else texto}
+        if herramienta:
+            mensaje["tool_calls"] = [{
+                "id": f"call_{uuid.uuid4().hex[:8]}", "type": "function",
+                "function": {"name": herramienta, "arguments": texto},
+            }]
+        self._json(handler, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:8]}", "object": "chat.completion", "created": int(time.time()),
+            "model": cuerpo["model"],
+            "choices": [{"index": 0, "message": mensaje, "finish_reason": finish_reason}],
+            "usage": uso,
+        })
+
+    def _stream(self, handler, cuerpo: dict, texto: str, finish_reason: str, uso: dict, herramienta: str):
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.end_headers()
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:8]}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": cuerpo["model"]}
+
+        def enviar(choices: list, usage: dict = None):
+            handler.wfile.write(f"data: {json.dumps({**base, 'choices': choices, 'usage': usage})}\n\n".encode())
+            handler.wfile.flush()
+
+        time.sleep(self.latencia)
+        if herramienta:
+            enviar([{"index": 0, "delta": {"role": "assistant", "tool_calls": [{
+                "index": 0, "id": f"call_{uuid.uuid4().hex[:8]}", "type": "function",
+                "function": {"name": herramienta, "arguments": ""},
+            }]}, "finish_reason": None}])
+        tamano = TOKENS_POR_FRAGMENTO * CARACTERES_POR_TOKEN
+        for i in range(0, len(texto), tamano):
+            fragmento = texto[i:i + tamano]
+            if herramienta:
+                delta = {"tool_calls": [{"index": 0, "function": {"arguments": fragmento}}]}
+            else:
+                delta = {"content": fragmento}
+            enviar([{"index": 0, "delta": delta, "finish_reason": None}])
+            time.sleep(TOKENS_POR_FRAGMENTO / self.tokens_por_segundo)
+        enviar([{"index": 0, "delta": {}, "finish_reason": finish_reason}])
+        if (cuerpo.get("stream_options") or {}).get("include_usage"):
+            enviar([], uso)
+        handler.wfile.write(b"data: [DONE]\n\n")
+
+    # --- embeddings ---
+
+    def _embeddings(self, handler, cuerpo: dict):
+        self.pedidos["embeddings"] += 1
+        textos = cuerpo["input"] if isinstance(cuerpo["input"], list) else [cuerpo["input"]]
+        dimensiones = cuerpo.get("dimensions") or 1024
+        time.sleep(self.latencia_embeddings)
+        datos = []
+        for i, texto in enumerate(textos):
+            # Vector determinista por texto
+            rnd = random.Random(hashlib.md5(texto.encode()).hexdigest())
+            datos.append({"object": "embedding", "index": i,
+                          "embedding": [rnd.uniform(-1, 1) for _ in range(dimensiones)]})
+        tokens = sum(len(t) for t in textos) // CARACTERES_POR_TOKEN
+        self._json(handler, {"object": "list", "data": datos, "model": cuerpo["model"],
+                             "usage": {"prompt_tokens": tokens, "total_tokens": tokens}})
+
+    @staticmethod
+    def _json(handler, cuerpo: dict):
+        datos = json.dumps(cuerpo).encode()
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(datos)))
+        handler.end_headers()
+        handler.wfile.write(datos)
+
+
+# --- PostgreSQL → SQLite ---
+
+ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS actas (
+    id INTEGER PRIMARY KEY, acta_numero INTEGER UNIQUE, fecha TEXT, participantes TEXT,
+    hora_inicio TEXT, hora_fin TEXT, total_paginas INTEGER
+);
+CREATE TABLE IF NOT EXISTS notas_ingresadas (
+    id INTEGER PRIMARY KEY, acta_id INTEGER, codigo_nota TEXT, seccion TEXT, tema TEXT,
+    fecha_nota TEXT, descripcion TEXT, resolucion TEXT
+);
+CREATE TABLE IF NOT EXISTS personas_mencionadas (
+    id INTEGER PRIMARY KEY, nota_id INTEGER, nombre_completo TEXT, numero_matricula TEXT, rol_mencion TEXT
+);
+CREATE TABLE IF NOT EXISTS expedientes_mencionados (
+    id INTEGER PRIMARY KEY, nota_id INTEGER, numero_expediente TEXT, referencia_ctd TEXT
+);
+CREATE TABLE IF NOT EXISTS resoluciones_distritales (
+    id INTEGER PRIMARY KEY, nota_id INTEGER, numero_resolucion TEXT, tecnico TEXT, matricula TEXT,
+    tipo_resolucion TEXT, distrito TEXT
+);
+CREATE TABLE IF NOT EXISTS temas_varios (
+    id INTEGER PRIMARY KEY, acta_id INTEGER, numero_punto INTEGER, titulo TEXT, descripcion TEXT, resolucion TEXT
+);
+"""
+
+
+def _parametro(valor):
+    # Los arrays de PostgreSQL (participantes) se guardan como JSON
+    return json.dumps(valor, ensure_ascii=False) if isinstance(valor, (list, dict)) else valor
+
+
+class CursorSQLite:
+    def __init__(self, conexion: "ConexionSQLite"):
+        self.conexion = conexion
+        self.cursor = conexion.conn.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.cursor.close()
+
+    def execute(self, sql: str, parametros=()):
+        self.conexion._iniciar()
+        self.cursor.execute(sql.replace("%s", "?"), [_parametro(p) for p in parametros or ()])
+
+    def executemany(self, sql: str, filas: list):
+        self.conexion._iniciar()
+        self.cursor.executemany(sql.replace("%s", "?"), [[_parametro(p) for p in fila] for fila in filas])
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+
+class ConexionSQLite:
+    """Lo que db.py e incremental.py usan de una conexión psycopg2: transacción implícita,
+    commit/rollback, cursor como context manager y `with conn:` que confirma al salir"""
+
+    def __init__(self, path: str):
+        # Transacciones manuales (como psycopg2): BEGIN antes de la primera sentencia
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=30)
+
+    def _iniciar(self):
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+
+    def cursor(self):
+        return CursorSQLite(self)
+
+    def commit(self):
+        if self.conn.in_transaction:
+            self.conn.execute("COMMIT")
+
+    def rollback(self):
+        if self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *_):
+        if tipo is None:
+            self.commit()
+        else:
+            self.rollback()
+
+
+def execute_values(cur: CursorSQLite, sql: str, filas: list):
+    """Reemplazo de psycopg2.extras.execute_values: un executemany con una fila por sentencia"""
+    filas = list(filas)
+    if filas:
+        marcadores = "(" + ", ".join("?" for _ in filas[0]) + ")"
+        cur.executemany(re.sub(r"VALUES\s+%s", f"VALUES {marcadores}", sql), filas)
+
+
+def usar_sqlite(path: str):
+    """Redirige db.py (y la ingesta incremental) a una base SQLite en path"""
+    import db
+    import incremental
+
+    conn = sqlite3.connect(path)
+    conn.executescript(ESQUEMA_SQLITE)
+    conn.close()
+
+    def conectar():
+        return ConexionSQLite(path)
+
+    db.get_connection = conectar
+    db.execute_values = execute_values
+    incremental.get_connection = conectar
+
+
+def contar_filas_sqlite(path: str) -> dict:
+    conn = sqlite3.connect(path)
+    try:
+        return {
+            tabla: conn.execute(f"SELECT count(*) FROM {tabla}").fetchone()[0]
+            for tabla in ("actas", "notas_ingresadas", "temas_varios")
+        }
+    finally:
+        conn.close()
+
+
+def usar_qdrant_local():
+    """Reemplaza el cliente de qdrant_index por Qdrant en modo local, en memoria"""
+    import qdrant_index
+    from qdrant_client import QdrantClient
+
+    qdrant_index.qdrant = QdrantClient(location=":memory:")
@@ -0,0 +1,179 @@
+"""
+Cola durable de trabajos de ingesta en PostgreSQL (tabla ingest_jobs).
+
+Cada trabajo es un PDF a ingestar. Los workers toman trabajos con
+SELECT ... FOR UPDATE SKIP LOCKED, así varios workers (hilos o pods) comparten
+la cola sin tomar dos veces el mismo trabajo. Un trabajo tomado queda
+"en_curso" con un lease que el worker renueva mientras lo procesa; si el
+worker muere, el lease vence y otro worker lo retoma (la ingesta continúa
+desde su checkpoint, ver estado.py). Los fallos se reintentan con backoff
+hasta COLA_MAX_INTENTOS y después quedan en estado "error".
+
+Un PDF tiene a lo sumo un trabajo pendiente o en curso (índice único parcial):
+encolar una ruta que ya está en la cola devuelve el trabajo existente. Así dos
+workers no ingestan el mismo PDF a la vez (ver también el lock de ingest.py).
+
+Se usa la misma base que la ingesta (DATABASE_URL). El Redis del cluster
+(08-redis.yaml) no sirve como cola: no tiene persistencia y desaloja claves
+con allkeys-lru.
+"""
+
+import os
+import random
+
+from dotenv import load_dotenv
+
+from db import get_connection
+
+load_dotenv()
+
+COLA_MAX_INTENTOS = int(os.getenv("COLA_MAX_INTENTOS", "3"))
+# Un trabajo en curso sin renovar su lease durante este tiempo se considera abandonado
+COLA_LEASE_SEGUNDOS = int(os.getenv("COLA_LEASE_SEGUNDOS", "300"))
+COLA_BACKOFF_SEGUNDOS = float(os.getenv("COLA_BACKOFF_SEGUNDOS", "60"))
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    pdf_path TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+    intentos INTEGER NOT NULL DEFAULT 0,
+    disponible_en TIMESTAMPTZ NOT NULL DEFAULT now(),
+    lease_hasta TIMESTAMPTZ,
+    worker TEXT,
+    error TEXT,
+    creado_en TIMESTAMPTZ NOT NULL DEFAULT now(),
+    terminado_en TIMESTAMPTZ
+);
+CREATE INDEX IF NOT EXISTS ingest_jobs_pendientes ON ingest_jobs (disponible_en, id)
+    WHERE estado IN ('pendiente', 'en_curso');
+CREATE UNIQUE INDEX IF NOT EXISTS ingest_jobs_pdf_activo ON ingest_jobs (pdf_path)
+    WHERE estado IN ('pendiente', 'en_curso');
+"""
+
+
+def conectar():
+    """Conexión en autocommit: cada operación de la cola es su propia transacción"""
+    conn = get_connection()
+    conn.autocommit = True
+    return conn
+
+
+def crear_tabla(conn):
+    with conn.cursor() as cur:
+        cur.execute(ESQUEMA)
+
+
+def encolar(conn, pdf_path: str) -> tuple:
+    """Encola el PDF. Devuelve (id, nuevo): si ya tiene un trabajo pendiente o en curso, ese id y False"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO ingest_jobs (pdf_path) VALUES (%s)
+            ON CONFLICT (pdf_path) WHERE estado IN ('pendiente', 'en_curso') DO NOTHING
+            RETURNING id
+        """, (pdf_path,))
+        fila = cur.fetchone()
+        if fila is not None:
+            return fila[0], True
+        cur.execute("""
+            SELECT id FROM ingest_jobs WHERE pdf_path = %s AND estado IN ('pendiente', 'en_curso')
+        """, (pdf_path,))
+        fila = cur.fetchone()
+    if fila is None:
+        # El trabajo activo terminó entre el INSERT y el SELECT: ahora sí entra
+        return encolar(conn, pdf_path)
+    return fila[0], False
+
+
+def tomar(conn, worker: str):
+    """Toma el próximo trabajo disponible (o con lease vencido). Devuelve (id, pdf_path, intentos) o None"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE ingest_jobs
+            SET estado = 'en_curso', intentos = intentos + 1, worker = %s,
+                lease_hasta = now() + make_interval(secs => %s)
+            WHERE id = (
+                SELECT id FROM ingest_jobs
+                WHERE (estado = 'pendiente' AND disponible_en <= now())
+                   OR (estado = 'en_curso' AND lease_hasta < now())
+                ORDER BY id
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING id, pdf_path, intentos
+        """, (worker, COLA_LEASE_SEGUNDOS))
+        return cur.fetchone()
+
+
+def renovar(conn, job_ids: list, worker: str):
+    """Extiende el lease de los trabajos en curso de este worker"""
+    if not job_ids:
+        return
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE ingest_jobs SET lease_hasta = now() + make_interval(secs => %s)
+            WHERE id = ANY(%s) AND estado = 'en_curso' AND worker = %s
+        """, (COLA_LEASE_SEGUNDOS, list(job_ids), worker))
+
+
+# completar y fallar solo tocan el trabajo si sigue siendo de este worker
+# (con el lease vencido, otro worker pudo haberlo retomado)
+
+def completar(conn, job_id: int, worker: str):
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE ingest_jobs SET estado = 'hecho', terminado_en = now(), lease_hasta = NULL, error = NULL
+            WHERE id = %s AND worker = %s
+        """, (job_id, worker))
+
+
+def fallar(conn, job_id: int, worker: str, intentos: int, error: str, reintentar: bool = True):
+    """Vuelve a encolar el trabajo con backoff (con jitter), o lo deja en error si no quedan intentos"""
+    if reintentar and intentos < COLA_MAX_INTENTOS:
+        demora = random.uniform(0.5, 1.5) * COLA_BACKOFF_SEGUNDOS * 2 ** (intentos - 1)
+        with conn.cursor() as cur:
+            cur.execute("""
+                UPDATE ingest_jobs
+                SET estado = 'pendiente', error = %s, lease_hasta = NULL,
+                    disponible_en = now() + make_interval(secs => %s)
+                WHERE id = %s AND worker = %s
+            """, (error, demora, job_id, worker))
+        return demora
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE ingest_jobs SET estado = 'error', error = %s, terminado_en = now(), lease_hasta = NULL
+            WHERE id = %s AND worker = %s
+        """, (error, job_id, worker))
+    return None
+
+
+def resumen(conn) -> dict:
+    with conn.cursor() as cur:
+        cur.execute("SELECT estado, count(*) FROM ingest_jobs GROUP BY estado ORDER BY estado")
+        return dict(cur.fetchall())
+
+
+def errores(conn, limite: int = 20) -> list:
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT id, pdf_path, intentos, error FROM ingest_jobs
+            WHERE estado = 'error' ORDER BY terminado_en DESC LIMIT %s
+        """, (limite,))
+        return cur.fetchall()
+
+
+def reencolar_errores(conn) -> int:
+    """Reencola el último trabajo con error de cada PDF que no tenga ya uno pendiente o en curso"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            UPDATE ingest_jobs SET estado = 'pendiente', intentos = 0, disponible_en = now(), terminado_en = NULL
+            WHERE id IN (
+                SELECT DISTINCT ON (pdf_path) id FROM ingest_jobs e
+                WHERE estado = 'error' AND NOT EXISTS (
+                    SELECT 1 FROM ingest_jobs a
+                    WHERE a.pdf_path = e.pdf_path AND a.estado IN ('pendiente', 'en_curso')
+                )
+                ORDER BY pdf_path, id DESC
+            )
+        """)
+        return cur.rowcount
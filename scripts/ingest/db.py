@@ -7,9 +7,45 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# PDFs ya insertados (huella SHA-256, ver estado.py) y su acta. La marca se escribe en la
+# misma transacción que las notas: si la ingesta se corta antes de guardar el checkpoint
+# local, al retomarla la base dice que ya está y no se vuelve a insertar
+ESQUEMA_INGESTADAS = """
+CREATE TABLE IF NOT EXISTS actas_ingestadas (
+    huella TEXT PRIMARY KEY,
+    acta_id INTEGER NOT NULL,
+    ingestada_en TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
 def get_connection():
     return psycopg2.connect(DATABASE_URL)
 
+def crear_tabla_ingestadas(conn):
+    with conn.cursor() as cur:
+        cur.execute(ESQUEMA_INGESTADAS)
+
+def acta_ingestada(huella: str) -> int | None:
+    """Id del acta si el PDF con esta huella ya se insertó, o None"""
+    conn = get_connection()
+    try:
+        with conn:
+            crear_tabla_ingestadas(conn)
+            with conn.cursor() as cur:
+                cur.execute("SELECT acta_id FROM actas_ingestadas WHERE huella = %s", (huella,))
+                fila = cur.fetchone()
+        return fila[0] if fila else None
+    finally:
+        conn.close()
+
+def marcar_ingestada(conn, huella: str, acta_id: int):
+    """Registra el PDF como insertado, dentro de la transacción de sus notas"""
+    with conn.cursor() as cur:
+        cur.execute("""
+            INSERT INTO actas_ingestadas (huella, acta_id) VALUES (%s, %s)
+            ON CONFLICT (huella) DO UPDATE SET acta_id = EXCLUDED.acta_id
+        """, (huella, acta_id))
+
 def insertar_acta(conn, acta: dict) -> int:
     """Inserta el acta y devuelve su id. Si ya existe, devuelve el id existente."""
     with conn.cursor() as cur:
@@ -121,8 +157,9 @@ def insertar_temas_varios(conn, temas: list, acta_id: int):
             for t in temas
         ])
 
-def guardar_todo(datos: dict):
-    """Inserta todos los datos extraídos en PostgreSQL de forma transaccional"""
+def guardar_todo(datos: dict, huella: str = None):
+    """Inserta todos los datos extraídos en PostgreSQL de forma transaccional.
+    Con huella, marca el PDF como insertado en la misma transacción (ver acta_ingestada)."""
     conn = get_connection()
     try:
         with conn:  # transaction
@@ -147,6 +184,8 @@ def guardar_todo(datos: dict):
                 contador += 1
             
             insertar_temas_varios(conn, datos["temas_varios"], acta_id)
+            if huella:
+                marcar_ingestada(conn, huella, acta_id)
             
             print(f"[DB] OK — {contador} notas insertadas, {len(datos['temas_varios'])} temas varios")
             return acta_id
@@ -0,0 +1,128 @@
+"""
+Esquemas JSON de la salida de cada llamada de extracción.
+
+Se envían como herramienta (tool) al modelo, así la respuesta llega como
+argumentos de la herramienta y no como texto libre, y se validan localmente
+con jsonschema antes de aceptar la sección.
+"""
+
+from jsonschema import Draft7Validator
+
+TEXTO = {"type": "string"}
+TEXTO_O_NULL = {"type": ["string", "null"]}
+
+PERSONA = {
+    "type": "object",
+    "properties": {
+        "nombre_completo": TEXTO,
+        "numero_matricula": TEXTO_O_NULL,
+        "rol_mencion": TEXTO_O_NULL,
+    },
+    "required": ["nombre_completo"],
+}
+
+EXPEDIENTE = {
+    "type": "object",
+    "properties": {
+        "numero_expediente": TEXTO,
+        "referencia_ctd": TEXTO_O_NULL,
+    },
+    "required": ["numero_expediente"],
+}
+
+RESOLUCION_DISTRITAL = {
+    "type": "object",
+    "properties": {
+        "numero_resolucion": TEXTO,
+        "tecnico": TEXTO_O_NULL,
+        "matricula": TEXTO_O_NULL,
+        "tipo_resolucion": TEXTO_O_NULL,
+        "distrito": TEXTO_O_NULL,
+    },
+    "required": ["numero_resolucion"],
+}
+
+NOTA = {
+    "type": "object",
+    "properties": {
+        "codigo_nota": TEXTO,
+        "seccion": TEXTO,
+        "tema": TEXTO_O_NULL,
+        "fecha_nota": {"type": ["string", "null"], "pattern": r"^\d{4}-\d{2}-\d{2}$"},
+        "descripcion": TEXTO_O_NULL,
+        "resolucion": TEXTO_O_NULL,
+        "personas": {"type": "array", "items": PERSONA},
+        "expedientes": {"type": "array", "items": EXPEDIENTE},
+    },
+    "required": ["codigo_nota", "seccion"],
+}
+
+NOTA_DISTRITO = {
+    **NOTA,
+    "properties": {
+        **NOTA["properties"],
+        "resoluciones_distritales": {"type": "array", "items": RESOLUCION_DISTRITAL},
+    },
+}
+
+TEMA_VARIO = {
+    "type": "object",
+    "properties": {
+        "numero_punto": {"type": "integer"},
+        "titulo": TEXTO,
+        "descripcion": TEXTO_O_NULL,
+        "resolucion": TEXTO_O_NULL,
+    },
+    "required": ["numero_punto", "titulo"],
+}
+
+ACTA = {
+    "type": "object",
+    "properties": {
+        "acta_numero": {"type": "integer"},
+        "fecha": {"type": ["string", "null"], "pattern": r"^\d{4}-\d{2}-\d{2}$"},
+        "participantes": {"type": "array", "items": TEXTO},
+        "hora_inicio": TEXTO_O_NULL,
+        "hora_fin": TEXTO_O_NULL,
+        "total_paginas": {"type": ["integer", "null"]},
+    },
+    "required": ["acta_numero"],
+}
+
+
+def _objeto(**propiedades) -> dict:
+    return {"type": "object", "properties": propiedades, "required": list(propiedades)}
+
+
+def _lista(items: dict) -> dict:
+    return {"type": "array", "items": items}
+
+
+# Herramienta (nombre, esquema de argumentos) de cada llamada de extracción
+HERRAMIENTAS = {
+    "metadatos y ME/MT": ("guardar_metadatos_y_me", _objeto(acta=ACTA, notas_me_mt=_lista(NOTA))),
+    "distritos I-IV": ("guardar_distritos", _objeto(notas_distritos=_lista(NOTA_DISTRITO))),
+    "distritos V-VII": ("guardar_distritos", _objeto(notas_distritos=_lista(NOTA_DISTRITO))),
+    "AS y AT": ("guardar_notas_as_at", _objeto(notas_as=_lista(NOTA), notas_at=_lista(NOTA))),
+    "temas varios": ("guardar_temas_varios", _objeto(temas_varios=_lista(TEMA_VARIO))),
+}
+
+
+def herramienta(llamada: str) -> dict:
+    """Definición OpenAI de la herramienta de una llamada"""
+    nombre, esquema = HERRAMIENTAS[llamada]
+    return {
+        "type": "function",
+        "function": {
+            "name": nombre,
+            "description": f"Guarda los datos extraídos del acta ({llamada})",
+            "parameters": esquema,
+        },
+    }
+
+
+def validar(llamada: str, datos) -> list:
+    """Errores de validación (vacío si los datos cumplen el esquema), con la ruta de cada uno"""
+    _, esquema = HERRAMIENTAS[llamada]
+    errores = sorted(Draft7Validator(esquema).iter_errors(datos), key=lambda e: list(e.absolute_path))
+    return [f"{'/'.join(str(p) for p in e.absolute_path) or '(raíz)'}: {e.message}" for e in errores]
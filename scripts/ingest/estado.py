@@ -0,0 +1,74 @@
+"""
+Checkpoint de la ingesta de un acta, para retomar una ingesta interrumpida.
+
+El estado se guarda junto al PDF (ACTA_875.estado.json) después de cada paso:
+Docling (el Markdown queda en ACTA_875.md), cada llamada de extracción (con
+su resultado ya validado), PostgreSQL (con el acta_id) y Qdrant. Al volver a
+correr ingest.py sobre el mismo PDF se saltean los pasos completos.
+
+El estado se descarta si el PDF cambió (otra huella SHA-256) o con --desde-cero.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+PASOS = ["docling", "extraccion", "db", "qdrant"]
+
+
+def huella(path: Path) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+class EstadoIngesta:
+    def __init__(self, pdf_path: Path, desde_cero: bool = False):
+        self.path = pdf_path.with_suffix(".estado.json")
+        self.huella = huella(pdf_path)
+        self.datos = {"huella": self.huella, "pasos": {}, "secciones": {}}
+        if desde_cero or not self.path.exists():
+            return
+        try:
+            guardado = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[Estado] AVISO: estado ilegible ({e}), se empieza de cero")
+            return
+        if guardado.get("huella") != self.huella:
+            print("[Estado] El PDF cambió desde la última ingesta, se empieza de cero")
+            return
+        self.datos = guardado
+
+    def hecho(self, paso: str) -> bool:
+        return paso in self.datos["pasos"]
+
+    def paso(self, paso: str) -> dict:
+        return self.datos["pasos"].get(paso, {})
+
+    def marcar(self, paso: str, **datos):
+        self.datos["pasos"][paso] = datos
+        self._guardar()
+
+    def seccion(self, llamada: str):
+        """Resultado validado de una llamada de extracción, o None si no se completó"""
+        return self.datos["secciones"].get(llamada)
+
+    def guardar_seccion(self, llamada: str, resultado: dict):
+        self.datos["secciones"][llamada] = resultado
+        self._guardar()
+
+    def resumen(self) -> str:
+        pasos = [p for p in PASOS if self.hecho(p)]
+        secciones = list(self.datos["secciones"])
+        if not self.hecho("extraccion") and secciones:
+            pasos.append(f"extracción parcial ({', '.join(secciones)})")
+        return ", ".join(pasos)
+
+    def _guardar(self):
+        # Escritura atómica: un corte a mitad de escritura no deja un estado roto
+        temporal = self.path.with_suffix(".tmp")
+        temporal.write_text(json.dumps(self.datos, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(temporal, self.path)
@@ -2,6 +2,7 @@ import requests
 import json
 from openai import OpenAI
 from prompts import (
+    PROMPT_SISTEMA_ACTA,
     PROMPT_METADATOS_Y_ME,
     PROMPT_DISTRITOS_1_4,
     PROMPT_DISTRITOS_5_7,
@@ -9,6 +10,13 @@ from prompts import (
     PROMPT_TEMAS_VARIOS
 )
 from normalizer import normalizar_nota
+from secciones import detectar_secciones, estimar_tokens, recortar
+from presupuesto import cargar_historial, contar_filas, estimar_max_tokens, registrar
+from esquemas import HERRAMIENTAS, herramienta, validar
+from incremental import ParserIncremental
+from reintentos import con_reintentos
+from metricas import medir, registrar as registrar_metrica
+import time
 import os
 from dotenv import load_dotenv
 
@@ -18,10 +26,40 @@ DOCLING_URL = os.getenv("DOCLING_URL", "http://localhost:5001")
 BEDROCK_URL = os.getenv("BEDROCK_URL", "http://localhost:8080")
 BEDROCK_API_KEY = os.getenv("BEDROCK_API_KEY")
 BEDROCK_MODEL = os.getenv("BEDROCK_MODEL", "us.anthropic.claude-sonnet-4-20250514-v1:0")
+# Cada llamada recibe solo sus secciones del acta (false: el acta completa, cacheada entre llamadas)
+EXTRACCION_POR_SECCIONES = os.getenv("EXTRACCION_POR_SECCIONES", "true").lower() != "false"
+# Continuaciones permitidas cuando una respuesta se corta por max_tokens
+MAX_CONTINUACIONES = int(os.getenv("MAX_CONTINUACIONES", "3"))
+# Salida estructurada via tool use (false: JSON en texto libre)
+EXTRACCION_CON_HERRAMIENTAS = os.getenv("EXTRACCION_CON_HERRAMIENTAS", "true").lower() != "false"
+# Reintentos de una sección cuya salida no cumple el esquema
+MAX_REINTENTOS_ESQUEMA = int(os.getenv("MAX_REINTENTOS_ESQUEMA", "2"))
+# Respuestas en streaming: cada nota se inserta y se embebe apenas se completa (ver incremental.py)
+EXTRACCION_STREAMING = os.getenv("EXTRACCION_STREAMING", "false").lower() == "true"
+
+# Prompt caching del gateway: cachePoint solo después de herramientas y prompt de sistema (el acta o su recorte)
+PROMPT_CACHING = {"extra_body": {"prompt_caching": {"system": True, "messages": False}}}
+
+# Todas las llamadas envían las mismas herramientas (el prefijo cacheado empieza por ellas)
+# y tool_choice fuerza la de cada sección
+HERRAMIENTAS_EXTRACCION = list({
+    nombre: herramienta(llamada) for llamada, (nombre, _) in HERRAMIENTAS.items()
+}.values())
+
+
+class RespuestaInvalida(Exception):
+    """La respuesta del modelo no se pudo interpretar como JSON"""
+
+    def __init__(self, mensaje: str, tokens_salida: int = 0):
+        super().__init__(mensaje)
+        # Tokens gastados en la respuesta inválida, para registrarlos como reintento
+        self.tokens_salida = tokens_salida
 
 client = OpenAI(
     base_url=f"{BEDROCK_URL}/api/v1",
-    api_key=BEDROCK_API_KEY
+    api_key=BEDROCK_API_KEY,
+    # Los reintentos con jitter los hace con_reintentos
+    max_retries=0
 )
 
 def pdf_a_markdown(pdf_path: str) -> str:
@@ -34,78 +72,296 @@ def pdf_a_markdown(pdf_path: str) -> str:
             timeout=120
         )
     if response.status_code != 200:
-        raise Exception(f"Docling error {response.status_code}: {response.text}")
+        # HTTPError con la respuesta: con_reintentos reintenta los 429/5xx
+        raise requests.HTTPError(f"Docling error {response.status_code}: {response.text}", response=response)
     resultado = response.json()
     markdown = resultado["document"]["md_content"]
     print(f"[Docling] OK — {len(markdown)} caracteres extraídos")
     return markdown
 
-def llamar_claude(prompt: str, label: str, max_tokens: int = 4096) -> dict:
-    print(f"[Claude] {label}...")
-    response = client.chat.completions.create(
+def completar(label: str, messages: list, max_tokens: int, parser: ParserIncremental = None, **kwargs) -> tuple:
+    """Una llamada al modelo. Devuelve (texto, finish_reason, usage, hubo_herramienta).
+
+    Con herramientas (tools=...) el texto son los argumentos de la llamada a la
+    herramienta. Con parser la respuesta llega en streaming y cada fragmento se le
+    pasa al parser apenas llega, que entrega los elementos que se van cerrando.
+    Cada llamada queda registrada como etapa "llm" en las métricas.
+    """
+    modo = "herramienta" if "tools" in kwargs else "texto"
+    with medir("llm", llamada=label, modo=modo, streaming=parser is not None, max_tokens=max_tokens) as m:
+        texto, finish_reason, uso, hubo_herramienta = _completar(messages, max_tokens, parser, m, **kwargs)
+        m["finish_reason"] = finish_reason
+        if uso:
+            detalles = getattr(uso, "prompt_tokens_details", None)
+            m["tokens_entrada"] = uso.prompt_tokens
+            m["tokens_salida"] = uso.completion_tokens
+            m["tokens_cache"] = (getattr(detalles, "cached_tokens", 0) or 0) if detalles else 0
+    return texto, finish_reason, uso, hubo_herramienta
+
+
+def _completar(messages: list, max_tokens: int, parser: ParserIncremental, m: dict, **kwargs) -> tuple:
+    con_herramientas = "tools" in kwargs
+    if parser is None:
+        response = con_reintentos(
+            client.chat.completions.create, "Claude",
+            model=BEDROCK_MODEL,
+            max_tokens=max_tokens,
+            messages=messages,
+            extra_body=PROMPT_CACHING,
+            **kwargs
+        )
+        choice = response.choices[0]
+        if con_herramientas:
+            llamadas = choice.message.tool_calls or []
+            texto = llamadas[0].function.arguments if llamadas else ""
+            return texto, choice.finish_reason, response.usage, bool(llamadas)
+        return choice.message.content or "", choice.finish_reason, response.usage, False
+
+    # Se reintenta el pedido; un corte a mitad del stream falla la sección (el checkpoint la retoma)
+    stream = con_reintentos(
+        client.chat.completions.create, "Claude (stream)",
         model=BEDROCK_MODEL,
         max_tokens=max_tokens,
-        messages=[{"role": "user", "content": prompt}]
+        messages=messages,
+        extra_body=PROMPT_CACHING,
+        stream=True,
+        stream_options={"include_usage": True},
+        **kwargs
     )
+    partes = []
+    finish_reason = None
+    uso = None
+    hubo_herramienta = False
+    inicio = time.perf_counter()
+    for chunk in stream:
+        if chunk.usage:
+            uso = chunk.usage
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        finish_reason = choice.finish_reason or finish_reason
+        if con_herramientas:
+            for llamada in choice.delta.tool_calls or []:
+                hubo_herramienta = True
+                fragmento = llamada.function.arguments if llamada.function else None
+                if fragmento:
+                    partes.append(fragmento)
+                    parser.alimentar(fragmento)
+        elif choice.delta.content:
+            partes.append(choice.delta.content)
+            parser.alimentar(choice.delta.content)
+        if partes and "ttft" not in m:
+            m["ttft"] = round(time.perf_counter() - inicio, 3)
+    return "".join(partes), finish_reason, uso, hubo_herramienta
+
+
+def mostrar_uso(label: str, uso) -> int:
+    """Imprime tokens de entrada y de cache; devuelve los tokens de salida"""
+    if not uso:
+        return 0
+    detalles = getattr(uso, "prompt_tokens_details", None)
+    cache_leido = (getattr(detalles, "cached_tokens", 0) or 0) if detalles else 0
+    print(f"[Claude] {label}: {uso.prompt_tokens} tokens de entrada, {cache_leido} leídos de cache")
+    return uso.completion_tokens or 0
+
+
+def llamar_claude(prompt: str, label: str, max_tokens: int = 4096, sistema: str = None, receptor=None) -> tuple:
+    """Devuelve el JSON extraído y los tokens de salida usados (sumando continuaciones).
+    Con receptor, la respuesta se lee en streaming y cada elemento completo se le entrega enseguida."""
+    print(f"[Claude] {label}...")
+    base = [{"role": "user", "content": prompt}]
+    if sistema:
+        base.insert(0, {"role": "system", "content": sistema})
     
-    texto = response.choices[0].message.content.strip()
-    finish_reason = response.choices[0].finish_reason
-    
-    if finish_reason == "length":
+    # Si la respuesta se corta por max_tokens, se reenvía lo generado como inicio de la
+    # respuesta del asistente (prefill) y el modelo continúa el JSON desde ahí
+    # El mismo parser sigue a través de las continuaciones: el texto continúa donde se cortó
+    parser = ParserIncremental(receptor.elemento) if receptor else None
+    texto = ""
+    tokens_salida = 0
+    for continuacion in range(MAX_CONTINUACIONES + 1):
+        messages = base + [{"role": "assistant", "content": texto}] if texto else base
+        generado, finish_reason, uso, _ = completar(label, messages, max_tokens, parser)
+        tokens_salida += mostrar_uso(label, uso)
+        
+        texto += generado
+        if finish_reason != "length":
+            break
+        # Bedrock no acepta un prefill que termine en espacios
+        texto = texto.rstrip()
+        if parser:
+            parser.recortar_espacios()
+        if continuacion < MAX_CONTINUACIONES:
+            print(f"[Claude] {label}: truncada con max_tokens={max_tokens}, "
+                  f"continuando ({continuacion + 1}/{MAX_CONTINUACIONES})")
+    else:
         fname = f"/tmp/claude_truncado_{label.replace(' ','_')}.txt"
         with open(fname, "w") as f:
             f.write(texto)
         raise Exception(
-            f"Respuesta truncada en '{label}' con max_tokens={max_tokens}. Ver {fname}"
+            f"Respuesta truncada en '{label}' con max_tokens={max_tokens} "
+            f"después de {MAX_CONTINUACIONES} continuaciones. Ver {fname}"
         )
     
+    texto = texto.strip()
     if texto.startswith("```"):
         lineas = texto.split("\n")
         texto = "\n".join(lineas[1:-1])
     
     try:
-        return json.loads(texto)
+        return json.loads(texto), tokens_salida
     except json.JSONDecodeError as e:
         fname = f"/tmp/claude_error_{label.replace(' ','_')}.txt"
         with open(fname, "w") as f:
             f.write(texto)
-        raise Exception(f"JSON inválido en '{label}': {e}. Ver {fname}")
-
-def extraer_datos(markdown: str) -> dict:
-    # Llamada 1: metadatos + notas ME/MT
-    r1 = llamar_claude(
-        PROMPT_METADATOS_Y_ME.replace("{markdown}", markdown),
-        "metadatos y ME/MT",
-        max_tokens=4096
-    )
-    
-    # Llamada 2a: distritos I-IV
-    r2a = llamar_claude(
-        PROMPT_DISTRITOS_1_4.replace("{markdown}", markdown),
-        "distritos I-IV",
-        max_tokens=6144
-    )
-    
-    # Llamada 2b: distritos V-VII
-    r2b = llamar_claude(
-        PROMPT_DISTRITOS_5_7.replace("{markdown}", markdown),
-        "distritos V-VII",
-        max_tokens=4096
+        raise RespuestaInvalida(f"JSON inválido en '{label}': {e}. Ver {fname}", tokens_salida)
+
+
+def llamar_claude_herramienta(prompt: str, label: str, max_tokens: int = 4096, sistema: str = None,
+                              receptor=None) -> tuple:
+    """Como llamar_claude, pero el JSON llega como argumentos de la herramienta de la sección"""
+    nombre, _ = HERRAMIENTAS[label]
+    print(f"[Claude] {label} (herramienta {nombre})...")
+    messages = [{"role": "user", "content": f"{prompt}\nDevolvé el resultado llamando a la herramienta {nombre}."}]
+    if sistema:
+        messages.insert(0, {"role": "system", "content": sistema})
+    parser = ParserIncremental(receptor.elemento) if receptor else None
+    inicio = time.perf_counter()
+    argumentos, finish_reason, uso, hubo_herramienta = completar(
+        label, messages, max_tokens, parser,
+        tools=HERRAMIENTAS_EXTRACCION,
+        tool_choice={"type": "function", "function": {"name": nombre}}
     )
+    tokens_salida = mostrar_uso(label, uso)
     
-    # Llamada 3: notas AS y AT
-    r3 = llamar_claude(
-        PROMPT_AS_AT.replace("{markdown}", markdown),
-        "AS y AT",
-        max_tokens=6144
-    )
+    if finish_reason == "length" or not hubo_herramienta:
+        # Los argumentos de una herramienta no se pueden continuar: se repite en modo texto, con continuaciones
+        print(f"[Claude] {label}: sin llamada completa a la herramienta "
+              f"(finish_reason={finish_reason}), se usa JSON en texto")
+        registrar_reintento(label, "herramienta", tokens_salida, time.perf_counter() - inicio)
+        if receptor:
+            # Lo ya entregado se repite en la respuesta de texto
+            receptor.descartar()
+        return llamar_claude(prompt, label, max_tokens=max_tokens, sistema=sistema, receptor=receptor)
     
-    # Llamada 4: temas varios
-    r4 = llamar_claude(
-        PROMPT_TEMAS_VARIOS.replace("{markdown}", markdown),
-        "temas varios",
-        max_tokens=2048
-    )
+    try:
+        return json.loads(argumentos), tokens_salida
+    except json.JSONDecodeError as e:
+        raise RespuestaInvalida(f"Argumentos inválidos en '{label}': {e}", tokens_salida)
+
+
+def registrar_reintento(label: str, motivo: str, tokens_salida: int, segundos: float):
+    """Intento descartado (esquema inválido, JSON roto o herramienta incompleta). Va a las métricas
+    aparte y no al historial de tokens por fila: si no, cada reintento inflaría los max_tokens siguientes."""
+    registrar_metrica("reintentos", segundos, True, {"llamada": label, "motivo": motivo, "tokens_salida": tokens_salida})
+
+
+def extraer_seccion(prompt: str, label: str, max_tokens: int, sistema: str, receptor=None) -> tuple:
+    """Llama al modelo y valida la salida con el esquema de la sección; reintenta solo esta sección.
+    Con receptor, lo entregado durante un intento inválido se descarta antes del siguiente."""
+    llamar = llamar_claude_herramienta if EXTRACCION_CON_HERRAMIENTAS else llamar_claude
+    pedido = prompt
+    if receptor:
+        receptor.iniciar(label)
+    for intento in range(MAX_REINTENTOS_ESQUEMA + 1):
+        inicio = time.perf_counter()
+        try:
+            datos, tokens_salida = llamar(pedido, label, max_tokens=max_tokens, sistema=sistema, receptor=receptor)
+            errores = validar(label, datos)
+            motivo = "esquema"
+        except RespuestaInvalida as e:
+            errores, tokens_salida, motivo = [str(e)], e.tokens_salida, "json"
+        if not errores:
+            if receptor:
+                receptor.confirmar()
+            # Solo los tokens del intento válido: son los que dependen de las filas de la sección
+            return datos, tokens_salida
+        registrar_reintento(label, motivo, tokens_salida, time.perf_counter() - inicio)
+        if receptor:
+            receptor.descartar()
+        print(f"[Esquema] {label}: {len(errores)} errores (intento {intento + 1}/{MAX_REINTENTOS_ESQUEMA + 1}): "
+              f"{'; '.join(errores[:3])}")
+        pedido = (
+            f"{prompt}\nEl intento anterior no cumplió el formato pedido:\n- "
+            + "\n- ".join(errores[:10])
+            + "\nCorregí esos puntos."
+        )
+    raise Exception(f"'{label}' no cumple el esquema después de {MAX_REINTENTOS_ESQUEMA + 1} intentos: {errores[:3]}")
+
+LLAMADAS = [
+    ("metadatos y ME/MT", PROMPT_METADATOS_Y_ME),
+    ("distritos I-IV", PROMPT_DISTRITOS_1_4),
+    ("distritos V-VII", PROMPT_DISTRITOS_5_7),
+    ("AS y AT", PROMPT_AS_AT),
+    ("temas varios", PROMPT_TEMAS_VARIOS),
+]
+
+def sistema_por_llamada(markdown: str, limites: dict) -> dict:
+    """Prompt de sistema de cada llamada: el acta completa, o solo sus secciones"""
+    llamadas = [llamada for llamada, _ in LLAMADAS]
+    if not EXTRACCION_POR_SECCIONES:
+        limites = {}
+    if not limites:
+        if EXTRACCION_POR_SECCIONES:
+            print("[Secciones] No se detectaron secciones, se envía el acta completa")
+        # Prefijo común: la llamada 1 lo escribe en el cache de prompts de Bedrock y las 2-5 lo leen
+        sistema = PROMPT_SISTEMA_ACTA.replace("{markdown}", markdown)
+        return {llamada: sistema for llamada in llamadas}
+
+    sistemas = {
+        llamada: PROMPT_SISTEMA_ACTA.replace("{markdown}", recortar(markdown, llamada, limites))
+        for llamada in llamadas
+    }
+    completo = estimar_tokens(markdown) * len(llamadas)
+    recortado = sum(estimar_tokens(s) for s in sistemas.values())
+    print(f"[Secciones] {len(limites)} secciones detectadas — ~{completo} → ~{recortado} tokens de entrada")
+    return sistemas
+
+
+def entregar(receptor, llamada: str, resultado: dict):
+    """Pasa al receptor los elementos de una sección ya extraída (retomada de un checkpoint)"""
+    receptor.iniciar(llamada)
+    if "acta" in resultado:
+        receptor.elemento("acta", resultado["acta"])
+    for clave, valor in resultado.items():
+        if isinstance(valor, list):
+            for elemento in valor:
+                receptor.elemento(clave, elemento)
+    receptor.confirmar()
+
+
+def extraer_datos(markdown: str, receptor=None, estado=None) -> dict:
+    """receptor: IngestaIncremental que recibe cada elemento en cuanto se completa (EXTRACCION_STREAMING).
+    estado: EstadoIngesta; las llamadas ya completas en el checkpoint no se repiten."""
+    limites = detectar_secciones(markdown)
+    sistemas = sistema_por_llamada(markdown, limites)
+    historial = cargar_historial()
+
+    # Una llamada por grupo de secciones, con max_tokens según las filas de cada una
+    resultados = {}
+    for llamada, prompt in LLAMADAS:
+        previo = estado.seccion(llamada) if estado else None
+        if previo is not None:
+            print(f"[Estado] {llamada}: retomada del checkpoint")
+            resultados[llamada] = previo
+            if receptor:
+                entregar(receptor, llamada, previo)
+            continue
+        filas = contar_filas(markdown, llamada, limites)
+        max_tokens = estimar_max_tokens(llamada, filas, historial)
+        print(f"[Presupuesto] {llamada}: {'?' if filas is None else filas} filas → max_tokens={max_tokens}")
+        resultados[llamada], tokens_salida = extraer_seccion(
+            prompt, llamada, max_tokens=max_tokens, sistema=sistemas[llamada], receptor=receptor
+        )
+        registrar(llamada, filas, tokens_salida, historial)
+        if estado:
+            estado.guardar_seccion(llamada, resultados[llamada])
+
+    r1 = resultados["metadatos y ME/MT"]
+    r2a = resultados["distritos I-IV"]
+    r2b = resultados["distritos V-VII"]
+    r3 = resultados["AS y AT"]
+    r4 = resultados["temas varios"]
     
     datos = {
         "acta": r1["acta"],
@@ -0,0 +1,265 @@
+"""
+Ingesta incremental: las notas se procesan mientras el modelo todavía genera.
+
+ParserIncremental recibe la respuesta de una llamada de extracción de a
+fragmentos (streaming) y entrega cada elemento apenas se cierra: el objeto
+"acta" y cada nota o tema de los arrays de primer nivel.
+
+IngestaIncremental consume esos elementos en un hilo aparte: normaliza cada
+nota, la inserta en PostgreSQL dentro de una transacción abierta y calcula su
+embedding, así la base y los embeddings avanzan en paralelo con la generación.
+Cada sección de extracción corre dentro de un SAVEPOINT: si la sección se
+descarta (reintento por esquema, salida inválida) sus filas se deshacen. La
+transacción se confirma recién al final, como en guardar_todo.
+"""
+
+import contextvars
+import json
+import queue
+import threading
+import time
+
+from db import get_connection, insertar_acta, insertar_nota, insertar_temas_varios, marcar_ingestada
+from metricas import registrar
+from normalizer import normalizar_nota
+from qdrant_index import SECCIONES_NOTAS, generar_embedding, texto_nota, texto_tema
+
+NOMBRES_SECCION = dict(SECCIONES_NOTAS)
+
+
+class ParserIncremental:
+    """Parser JSON incremental del objeto raíz de una respuesta de extracción.
+
+    al_completar(clave, valor) se llama por cada objeto que se cierra como valor
+    del objeto raíz ("acta") o como elemento de un array del objeto raíz
+    ("notas_distritos", "temas_varios", ...). El texto fuera del objeto raíz
+    (bloque ```json, comentarios) se ignora.
+    """
+
+    def __init__(self, al_completar):
+        self.al_completar = al_completar
+        self.texto = ""
+        self.pila = []
+        self.en_cadena = False
+        self.escape = False
+        self.espera_clave = False
+        self.clave = None
+        self.inicio_clave = None
+        self.inicio_elemento = None
+        self.terminado = False
+
+    def _es_elemento(self) -> bool:
+        # Objeto valor del raíz, u objeto elemento de un array del raíz
+        return self.pila in (["{", "{"], ["{", "[", "{"])
+
+    def alimentar(self, fragmento: str):
+        desde = len(self.texto)
+        self.texto += fragmento
+        for i in range(desde, len(self.texto)):
+            if self.terminado:
+                return
+            c = self.texto[i]
+            if self.en_cadena:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.en_cadena = False
+                    if self.inicio_clave is not None:
+                        self.clave = json.loads(self.texto[self.inicio_clave:i + 1])
+                        self.inicio_clave = None
+                        self.espera_clave = False
+                continue
+            if not self.pila:
+                if c == "{":
+                    self.pila.append(c)
+                    self.espera_clave = True
+                continue
+            if c == '"':
+                self.en_cadena = True
+                if len(self.pila) == 1 and self.espera_clave:
+                    self.inicio_clave = i
+            elif c in "{[":
+                self.pila.append(c)
+                if self._es_elemento():
+                    self.inicio_elemento = i
+            elif c in "}]":
+                if c == "}" and self._es_elemento() and self.inicio_elemento is not None:
+                    try:
+                        valor = json.loads(self.texto[self.inicio_elemento:i + 1])
+                    except json.JSONDecodeError:
+                        # Lo detecta la validación de la respuesta completa
+                        valor = None
+                    if valor is not None:
+                        self.al_completar(self.clave, valor)
+                    self.inicio_elemento = None
+                self.pila.pop()
+                self.terminado = not self.pila
+            elif c == "," and len(self.pila) == 1:
+                self.espera_clave = True
+
+    def recortar_espacios(self):
+        """Quita los espacios finales (prefill de una continuación); no cambian el estado del parser"""
+        self.texto = self.texto.rstrip()
+
+
+class IngestaIncremental:
+    """Inserta en PostgreSQL y calcula embeddings de los elementos a medida que llegan.
+
+    Los métodos encolan órdenes y vuelven enseguida; un único hilo las ejecuta en
+    orden con su propia conexión. Uso:
+
+        ingesta = IngestaIncremental(markdown)
+        datos = extraer_datos(markdown, receptor=ingesta)
+        acta_id, embeddings = ingesta.finalizar()   # o ingesta.abortar() ante un error
+    """
+
+    def __init__(self, markdown: str, huella: str = None):
+        self.markdown = markdown
+        # Con huella, el PDF queda marcado como insertado en la misma transacción (ver db.acta_ingestada)
+        self.huella = huella
+        self.ordenes = queue.Queue()
+        self.embeddings = {}
+        self.segundos_embeddings = 0.0
+        self.acta = None
+        self.acta_id = None
+        self.pendientes = []
+        self.notas = 0
+        self.temas = 0
+        self.error = None
+        self.error_seccion = None
+        # Estado al iniciar la sección en curso, para restaurarlo si se descarta
+        self.inicio = None
+        # El hilo hereda el contexto de métricas de la ingesta que lo crea
+        self.hilo = threading.Thread(
+            target=contextvars.copy_context().run, args=(self._procesar,), name="ingesta-incremental", daemon=True
+        )
+        self.hilo.start()
+
+    # --- API del extractor (se ejecuta en el hilo del extractor) ---
+
+    def iniciar(self, label: str):
+        self.ordenes.put(("iniciar", label))
+
+    def elemento(self, clave: str, valor: dict):
+        self.ordenes.put(("elemento", clave, valor))
+
+    def descartar(self):
+        """Deshace lo insertado desde iniciar(); la sección se vuelve a extraer"""
+        self.ordenes.put(("descartar",))
+
+    def confirmar(self):
+        self.ordenes.put(("confirmar",))
+
+    def finalizar(self) -> tuple:
+        """Espera a que se procese todo y confirma la transacción. Devuelve (acta_id, embeddings)"""
+        self.ordenes.put(("fin",))
+        self.hilo.join()
+        if self.error is not None:
+            raise self.error
+        print(f"[DB] OK — {self.notas} notas insertadas, {self.temas} temas varios "
+              f"({len(self.embeddings)} embeddings durante la extracción)")
+        return self.acta_id, self.embeddings
+
+    def abortar(self):
+        self.ordenes.put(("abortar",))
+        self.hilo.join()
+
+    # --- Hilo consumidor ---
+
+    def _procesar(self):
+        conn = None
+        try:
+            conn = get_connection()
+            while True:
+                orden, *args = self.ordenes.get()
+                if orden == "fin":
+                    registrar("embeddings_incremental", self.segundos_embeddings, self.error is None,
+                              {"chunks": len(self.embeddings)})
+                    if self.error is None and self.acta_id is None:
+                        self.error = Exception("La extracción terminó sin datos del acta")
+                    if self.error is None:
+                        if self.huella:
+                            marcar_ingestada(conn, self.huella, self.acta_id)
+                        conn.commit()
+                    else:
+                        conn.rollback()
+                    return
+                if orden == "abortar":
+                    conn.rollback()
+                    return
+                if self.error is not None:
+                    continue
+                self._ejecutar(conn, orden, *args)
+        except Exception as e:
+            self.error = e
+            if conn is not None:
+                conn.rollback()
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _ejecutar(self, conn, orden: str, *args):
+        if orden == "iniciar":
+            with conn.cursor() as cur:
+                cur.execute("SAVEPOINT seccion")
+            self.error_seccion = None
+            self.inicio = (self.acta, self.acta_id, len(self.pendientes), self.notas, self.temas)
+        elif orden == "descartar":
+            with conn.cursor() as cur:
+                cur.execute("ROLLBACK TO SAVEPOINT seccion")
+            self.error_seccion = None
+            self.acta, self.acta_id, pendientes, self.notas, self.temas = self.inicio
+            del self.pendientes[pendientes:]
+        elif orden == "confirmar":
+            if self.error_seccion is not None:
+                # La sección cumplió el esquema pero la base la rechazó: igual que en guardar_todo
+                self.error = self.error_seccion
+                return
+            with conn.cursor() as cur:
+                cur.execute("RELEASE SAVEPOINT seccion")
+        elif orden == "elemento" and self.error_seccion is None:
+            try:
+                self._elemento(conn, *args)
+            except Exception as e:
+                # Transacción abortada hasta el ROLLBACK TO SAVEPOINT de descartar()
+                print(f"[Incremental] AVISO: error al insertar {args[0]}: {e}")
+                self.error_seccion = e
+
+    def _elemento(self, conn, clave: str, valor: dict):
+        if clave == "acta":
+            self.acta = valor
+            self.acta_id = insertar_acta(conn, valor)
+            print(f"[DB] Acta {valor['acta_numero']} → id {self.acta_id} (incremental)")
+            pendientes, self.pendientes = self.pendientes, []
+            for clave_pendiente, valor_pendiente in pendientes:
+                self._elemento(conn, clave_pendiente, valor_pendiente)
+            return
+        if clave not in NOMBRES_SECCION and clave != "temas_varios":
+            return
+        if self.acta_id is None:
+            # Llegó antes que el objeto acta (el modelo puede cambiar el orden de las claves)
+            self.pendientes.append((clave, valor))
+            return
+
+        acta_numero = self.acta["acta_numero"]
+        fecha = self.acta.get("fecha", "")
+        if clave == "temas_varios":
+            insertar_temas_varios(conn, [valor], self.acta_id)
+            self.temas += 1
+            texto = texto_tema(valor, acta_numero, fecha)
+        else:
+            nota = normalizar_nota(valor, self.markdown)
+            insertar_nota(conn, nota, self.acta_id)
+            self.notas += 1
+            texto = texto_nota(nota, acta_numero, fecha, NOMBRES_SECCION[clave])
+
+        # El embedding depende solo del texto: sirve aunque la sección se descarte y se repita
+        if texto not in self.embeddings:
+            inicio = time.perf_counter()
+            try:
+                self.embeddings[texto] = generar_embedding(texto)
+                self.segundos_embeddings += time.perf_counter() - inicio
+            except Exception as e:
+                print(f"[Incremental] AVISO: embedding diferido a la indexación: {e}")
@@ -3,7 +3,7 @@
 Script de ingesta de actas del Colegio de Técnicos de la Provincia de Buenos Aires.
 
 Uso:
-    python ingest.py <path_al_pdf>
+    python ingest.py <path_al_pdf> [--desde-cero]
     python ingest.py /home/admin/actas/ACTA_875_FIRMADA.pdf
 
 El script:
@@ -12,49 +12,120 @@ El script:
 3. Normaliza códigos mal reconocidos por OCR
 4. Inserta los datos estructurados en PostgreSQL
 5. Indexa los chunks en Qdrant para búsqueda semántica
+
+Cada paso queda registrado en <pdf>.estado.json (ver estado.py): si la ingesta
+se interrumpe, volver a correrla retoma desde el primer paso incompleto. La
+inserción en PostgreSQL además deja una marca con la huella del PDF en la misma
+transacción (tabla actas_ingestadas, ver db.py), así un corte entre el commit y
+el checkpoint no duplica las notas.
+
+Dos ingestas del mismo PDF (hilos del worker, otro worker en la misma máquina o
+ingest.py a mano) no corren a la vez: cada una toma un lock sobre <pdf>.lock y
+la segunda espera a la primera y retoma desde su checkpoint.
 """
 
 import sys
 import os
+import fcntl
 import json
 import time
+from contextlib import contextmanager
 from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from extractor import pdf_a_markdown, extraer_datos
-from db import guardar_todo
+from extractor import EXTRACCION_STREAMING, pdf_a_markdown, extraer_datos
+from db import acta_ingestada, guardar_todo
+from estado import EstadoIngesta
+from incremental import IngestaIncremental
+from metricas import contexto, medir
 from qdrant_index import indexar_acta
+from reintentos import con_reintentos
+
+class ArchivoInvalido(Exception):
+    """El archivo no existe o no es un PDF (reintentar no sirve)"""
 
-def ingestar(pdf_path: str):
+@contextmanager
+def bloqueo_pdf(path: Path):
+    """Lock exclusivo por PDF: el checkpoint (.estado.json) y la inserción son de una sola ingesta a la vez"""
+    with open(path.with_suffix(".lock"), "w") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            print(f"[Estado] Otra ingesta de {path.name} en curso, esperando a que termine")
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def ingestar(pdf_path: str, desde_cero: bool = False):
     path = Path(pdf_path)
     if not path.exists():
-        print(f"ERROR: No se encuentra el archivo {pdf_path}")
-        sys.exit(1)
+        raise ArchivoInvalido(f"No se encuentra el archivo {pdf_path}")
     
     if not path.suffix.lower() == ".pdf":
-        print(f"ERROR: El archivo debe ser un PDF")
-        sys.exit(1)
+        raise ArchivoInvalido(f"El archivo debe ser un PDF")
     
     print(f"\n{'='*60}")
     print(f"Ingesta: {path.name}")
     print(f"{'='*60}\n")
     
+    # Tiempos por etapa en metricas_ingesta.jsonl (ver metricas.py)
+    with bloqueo_pdf(path), contexto(path.name), medir("total", bytes=path.stat().st_size) as m:
+        _ingestar(path, desde_cero, m)
+
+def _ingestar(path: Path, desde_cero: bool, metrica: dict):
     inicio = time.time()
+    estado = EstadoIngesta(path, desde_cero=desde_cero)
+    if estado.hecho("qdrant"):
+        print(f"[Estado] {path.name} ya está ingestada (acta id {estado.paso('db')['acta_id']}). "
+              f"Usá --desde-cero para repetirla")
+        metrica["omitida"] = True
+        return
+    if estado.resumen():
+        metrica["retomada"] = estado.resumen()
+        print(f"[Estado] Retomando desde el checkpoint: {estado.resumen()}\n")
     
     # Paso 1: Docling
     print("PASO 1/4 — Extracción Markdown con Docling")
-    markdown = pdf_a_markdown(str(path))
-    
-    # Guarda el markdown para debugging
     markdown_path = path.with_suffix(".md")
-    markdown_path.write_text(markdown, encoding="utf-8")
-    print(f"[Debug] Markdown guardado en {markdown_path}")
+    if estado.hecho("docling") and markdown_path.exists():
+        markdown = markdown_path.read_text(encoding="utf-8")
+        print(f"[Estado] Markdown retomado de {markdown_path}")
+    else:
+        with medir("docling", bytes=path.stat().st_size) as m:
+            markdown = con_reintentos(pdf_a_markdown, "Docling", str(path))
+            m["caracteres"] = len(markdown)
+        
+        # Guarda el markdown para debugging (y para retomar la ingesta)
+        markdown_path.write_text(markdown, encoding="utf-8")
+        print(f"[Debug] Markdown guardado en {markdown_path}")
+        estado.marcar("docling")
     
-    # Paso 2: Claude extrae JSON
+    # La marca en PostgreSQL se guarda con las notas: si la ingesta se cortó después de
+    # insertarlas y antes del checkpoint local, no se vuelven a insertar
+    if not estado.hecho("db") and not desde_cero:
+        acta_id = acta_ingestada(estado.huella)
+        if acta_id is not None:
+            print(f"[Estado] Ya insertada en PostgreSQL (acta id {acta_id}), se retoma desde ahí")
+            estado.marcar("db", acta_id=acta_id)
+    
+    # Paso 2: Claude extrae JSON (las llamadas ya completas se retoman del checkpoint)
+    # En streaming, las notas se insertan y se embeben mientras se generan (pasos 2 y 3 solapados)
     print("\nPASO 2/4 — Extracción estructurada con Claude")
-    datos = extraer_datos(markdown)
+    ingesta = IngestaIncremental(markdown, estado.huella) if EXTRACCION_STREAMING and not estado.hecho("db") else None
+    try:
+        with medir("extraccion", caracteres=len(markdown), streaming=ingesta is not None) as m:
+            datos = extraer_datos(markdown, receptor=ingesta, estado=estado)
+            m["notas"] = sum(len(datos[s]) for s in ("notas_me_mt", "notas_distritos", "notas_as", "notas_at"))
+            m["temas_varios"] = len(datos["temas_varios"])
+    except Exception:
+        if ingesta:
+            ingesta.abortar()
+        raise
+    estado.marcar("extraccion")
     
     # Guarda el JSON para debugging
     json_path = path.with_suffix(".json")
@@ -63,11 +134,23 @@ def ingestar(pdf_path: str):
     
     # Paso 3: PostgreSQL
     print("\nPASO 3/4 — Inserción en PostgreSQL")
-    acta_id = guardar_todo(datos)
+    embeddings = None
+    if estado.hecho("db"):
+        acta_id = estado.paso("db")["acta_id"]
+        print(f"[Estado] Ya insertada (acta id {acta_id})")
+    else:
+        # En streaming solo se mide la espera final: el resto se solapó con la extracción
+        with medir("db", streaming=ingesta is not None):
+            if ingesta:
+                acta_id, embeddings = ingesta.finalizar()
+            else:
+                acta_id = guardar_todo(datos, estado.huella)
+        estado.marcar("db", acta_id=acta_id)
     
-    # Paso 4: Qdrant
+    # Paso 4: Qdrant (los ids de los chunks son deterministas: repetirlo no duplica puntos)
     print("\nPASO 4/4 — Indexación en Qdrant")
-    indexar_acta(markdown, datos, acta_id)
+    indexar_acta(markdown, datos, acta_id, embeddings=embeddings)
+    estado.marcar("qdrant")
     
     elapsed = time.time() - inicio
     print(f"\n{'='*60}")
@@ -76,8 +159,13 @@ def ingestar(pdf_path: str):
     print(f"{'='*60}\n")
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Uso: python ingest.py <path_al_pdf>")
+    argumentos = [a for a in sys.argv[1:] if a != "--desde-cero"]
+    if len(argumentos) != 1:
+        print("Uso: python ingest.py <path_al_pdf> [--desde-cero]")
         sys.exit(1)
     
-    ingestar(sys.argv[1])
+    try:
+        ingestar(argumentos[0], desde_cero="--desde-cero" in sys.argv[1:])
+    except ArchivoInvalido as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
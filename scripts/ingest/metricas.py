@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Tiempos por etapa de la ingesta, como líneas JSON (y opcionalmente Prometheus).
+
+Cada etapa medida con medir() agrega una línea a METRICAS_PATH con la etapa,
+los segundos, si terminó bien y sus contadores (bytes, tokens de entrada y
+salida, chunks...). Todas las líneas de una misma ingesta llevan el mismo id
+y el nombre del PDF.
+
+Etapas: total, docling, extraccion, llm (una por llamada, con "llamada"),
+reintentos (intentos descartados por llamada, con "motivo" y sus tokens de
+salida), db, embeddings, qdrant, y embeddings_incremental en streaming (tiempo
+de los embeddings calculados durante la extracción).
+
+Con METRICAS_PROMETHEUS_PUERTO (y prometheus_client instalado) el worker
+expone además histogramas por etapa en ese puerto.
+
+Resumen de las corridas (p50/p95 por etapa y por llamada):
+    python metricas.py resumen [archivo.jsonl] [--ultimas N]
+"""
+
+import contextvars
+import json
+import math
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+METRICAS_PATH = Path(os.getenv("METRICAS_PATH", Path(__file__).with_name("metricas_ingesta.jsonl")))
+METRICAS_PROMETHEUS_PUERTO = int(os.getenv("METRICAS_PROMETHEUS_PUERTO", "0"))
+
+# Contadores que se suman también en Prometheus
+CONTADORES = ["bytes", "tokens_entrada", "tokens_salida", "tokens_cache", "chunks"]
+
+_ingesta = contextvars.ContextVar("ingesta", default={})
+_escritura = threading.Lock()
+_prometheus = None
+
+
+@contextmanager
+def contexto(pdf: str):
+    """Agrupa las mediciones de una ingesta bajo un mismo id"""
+    token = _ingesta.set({"ingesta": uuid.uuid4().hex[:12], "pdf": pdf})
+    try:
+        yield
+    finally:
+        _ingesta.reset(token)
+
+
+@contextmanager
+def medir(etapa: str, **campos):
+    """Mide la duración del bloque. El dict devuelto acepta contadores extra (tokens, bytes, ...)"""
+    registro = {**campos}
+    inicio = time.perf_counter()
+    ok = True
+    try:
+        yield registro
+    except BaseException as e:
+        ok = False
+        registro.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        registrar(etapa, time.perf_counter() - inicio, ok, registro)
+
+
+def registrar(etapa: str, segundos: float, ok: bool, campos: dict):
+    linea = {
+        "ts": round(time.time(), 3),
+        **_ingesta.get(),
+        "etapa": etapa,
+        "segundos": round(segundos, 3),
+        "ok": ok,
+        **campos,
+    }
+    try:
+        with _escritura, open(METRICAS_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(linea, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"[Métricas] AVISO: no se pudo escribir {METRICAS_PATH}: {e}")
+    if _prometheus:
+        _observar_prometheus(etapa, segundos, ok, campos)
+
+
+def iniciar_prometheus() -> bool:
+    """Expone /metrics en METRICAS_PROMETHEUS_PUERTO (para procesos largos, como worker.py)"""
+    global _prometheus
+    if not METRICAS_PROMETHEUS_PUERTO or _prometheus:
+        return bool(_prometheus)
+    try:
+        from prometheus_client import Counter, Histogram, start_http_server
+    except ImportError:
+        print("[Métricas] AVISO: METRICAS_PROMETHEUS_PUERTO definido pero prometheus_client no está instalado")
+        return False
+    _prometheus = {
+        "segundos": Histogram(
+            "ingesta_etapa_segundos", "Duración de cada etapa de la ingesta", ["etapa", "llamada"],
+            buckets=(0.1, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600),
+        ),
+        "errores": Counter("ingesta_etapa_errores_total", "Etapas que terminaron con error", ["etapa", "llamada"]),
+        "contadores": Counter("ingesta_etapa_total", "Contadores por etapa (bytes, tokens, chunks)",
+                              ["etapa", "llamada", "contador"]),
+    }
+    start_http_server(METRICAS_PROMETHEUS_PUERTO)
+    print(f"[Métricas] Prometheus en el puerto {METRICAS_PROMETHEUS_PUERTO}")
+    return True
+
+
+def _observar_prometheus(etapa: str, segundos: float, ok: bool, campos: dict):
+    llamada = campos.get("llamada", "")
+    _prometheus["segundos"].labels(etapa, llamada).observe(segundos)
+    if not ok:
+        _prometheus["errores"].labels(etapa, llamada).inc()
+    for contador in CONTADORES:
+        if campos.get(contador):
+            _prometheus["contadores"].labels(etapa, llamada, contador).inc(campos[contador])
+
+
+# --- Resumen ---
+
+def percentil(valores: list, p: float) -> float:
+    """Percentil por rango más cercano (valores ordenados)"""
+    indice = max(0, min(len(valores) - 1, math.ceil(p / 100 * len(valores)) - 1))
+    return valores[indice]
+
+
+def cargar(path: Path, ultimas: int = 0) -> list:
+    registros = []
+    with open(path, encoding="utf-8") as f:
+        for linea in f:
+            try:
+                registros.append(json.loads(linea))
+            except json.JSONDecodeError:
+                continue
+    if ultimas:
+        # Las últimas N ingestas (por id), no las últimas N líneas
+        ids = list(dict.fromkeys(r.get("ingesta") for r in registros))[-ultimas:]
+        registros = [r for r in registros if r.get("ingesta") in set(ids)]
+    return registros
+
+
+def resumen(registros: list) -> list:
+    grupos = {}
+    for r in registros:
+        clave = r["etapa"] if "llamada" not in r else f"{r['etapa']}: {r['llamada']}"
+        grupos.setdefault(clave, []).append(r)
+    filas = []
+    for clave, grupo in grupos.items():
+        segundos = sorted(r["segundos"] for r in grupo if r.get("ok"))
+        fila = {
+            "etapa": clave,
+            "n": len(grupo),
+            "errores": sum(1 for r in grupo if not r.get("ok")),
+            "p50": percentil(segundos, 50) if segundos else None,
+            "p95": percentil(segundos, 95) if segundos else None,
+            "max": segundos[-1] if segundos else None,
+        }
+        for contador in ("tokens_entrada", "tokens_salida"):
+            valores = [r[contador] for r in grupo if r.get(contador)]
+            if valores:
+                fila[f"{contador}_prom"] = round(sum(valores) / len(valores))
+        filas.append(fila)
+    # Primero las etapas en el orden del pipeline
+    orden = ["total", "docling", "extraccion", "llm", "reintentos", "db", "embeddings_incremental", "embeddings", "qdrant"]
+    filas.sort(key=lambda f: (orden.index(f["etapa"].split(":")[0]) if f["etapa"].split(":")[0] in orden
+                              else len(orden), f["etapa"]))
+    return filas
+
+
+def imprimir_resumen(filas: list, ingestas: int):
+    print(f"\n{ingestas} ingestas\n")
+    print(f"{'Etapa':<28} {'n':>5} {'err':>4} {'p50 (s)':>9} {'p95 (s)':>9} {'max (s)':>9} "
+          f"{'tok. entrada':>13} {'tok. salida':>12}")
+    print("-" * 96)
+
+    def seg(valor):
+        return f"{valor:9.2f}" if valor is not None else f"{'-':>9}"
+
+    for f in filas:
+        print(f"{f['etapa']:<28} {f['n']:>5} {f['errores']:>4} {seg(f['p50'])} {seg(f['p95'])} {seg(f['max'])} "
+              f"{f.get('tokens_entrada_prom', ''):>13} {f.get('tokens_salida_prom', ''):>12}")
+
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    if not argumentos or argumentos[0] != "resumen":
+        print("Uso: python metricas.py resumen [archivo.jsonl] [--ultimas N]")
+        sys.exit(1)
+    argumentos = argumentos[1:]
+    ultimas = 0
+    if "--ultimas" in argumentos:
+        i = argumentos.index("--ultimas")
+        ultimas = int(argumentos[i + 1])
+        del argumentos[i:i + 2]
+    path = Path(argumentos[0]) if argumentos else METRICAS_PATH
+    if not path.exists():
+        print(f"ERROR: No existe {path}")
+        sys.exit(1)
+    registros = cargar(path, ultimas)
+    imprimir_resumen(resumen(registros), len({r.get("ingesta") for r in registros}))
@@ -0,0 +1,125 @@
+"""
+Presupuesto de max_tokens por llamada de extracción.
+
+Cuenta las filas de tabla (o puntos numerados, en temas varios) de las secciones
+de cada llamada y estima los tokens de salida con el historial de tokens por
+fila observado en actas anteriores, guardado en un JSON local. Sin secciones
+detectadas, o sin filas reconocibles, se usan los valores fijos de siempre.
+
+Si la estimación supera MAX_TOKENS_LIMITE se usa el límite y el resto se
+resuelve con continuaciones (ver llamar_claude).
+
+Varias ingestas pueden correr a la vez (worker.py): cada actualización relee el
+historial bajo un lock y lo reemplaza de forma atómica, así no se pisan.
+"""
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from secciones import SECCIONES_POR_LLAMADA
+
+load_dotenv()
+
+HISTORIAL_PATH = Path(os.getenv("PRESUPUESTO_HISTORIAL", Path(__file__).with_name("historial_tokens.json")))
+MAX_TOKENS_LIMITE = int(os.getenv("MAX_TOKENS_LIMITE", "8192"))
+MIN_MAX_TOKENS = 1024
+MARGEN = 1.3
+# Peso de la última acta en el promedio móvil de tokens por fila
+ALFA = 0.3
+
+# Valores fijos usados antes del presupuesto adaptativo, y cuando no hay secciones
+MAX_TOKENS_FIJOS = {
+    "metadatos y ME/MT": 4096,
+    "distritos I-IV": 6144,
+    "distritos V-VII": 4096,
+    "AS y AT": 6144,
+    "temas varios": 2048,
+}
+
+# Punto de partida sin historial: (tokens fijos de la respuesta, tokens por fila)
+ESTIMACION_INICIAL = {
+    "metadatos y ME/MT": (400, 180),
+    "distritos I-IV": (100, 200),
+    "distritos V-VII": (100, 200),
+    "AS y AT": (100, 180),
+    "temas varios": (50, 150),
+}
+
+FILA_TABLA = re.compile(r"^\s*\|")
+SEPARADOR_TABLA = re.compile(r"^\s*\|[\s:|-]+\|\s*$")
+PUNTO_NUMERADO = re.compile(r"^\s*\d+\s*[.)-]\s+\S")
+
+# Serializa las actualizaciones del historial entre las ingestas de este proceso
+_lock_historial = threading.Lock()
+
+
+def contar_filas(markdown: str, llamada: str, limites: dict) -> int | None:
+    """Filas de datos en las secciones de la llamada, o None si no hay secciones detectadas"""
+    if not limites or SECCIONES_POR_LLAMADA[llamada][0] not in limites:
+        return None
+    lineas = markdown.split("\n")
+    filas = 0
+    for clave in SECCIONES_POR_LLAMADA[llamada]:
+        if clave not in limites:
+            continue
+        inicio, fin = limites[clave]
+        seccion = lineas[inicio + 1:fin]
+        for i, linea in enumerate(seccion):
+            if clave == "TEMAS VARIOS":
+                filas += bool(PUNTO_NUMERADO.match(linea))
+            elif FILA_TABLA.match(linea) and not SEPARADOR_TABLA.match(linea):
+                # Una fila seguida del separador |---| es el encabezado de columnas
+                siguiente = seccion[i + 1] if i + 1 < len(seccion) else ""
+                filas += not SEPARADOR_TABLA.match(siguiente)
+    return filas
+
+
+def cargar_historial() -> dict:
+    if not HISTORIAL_PATH.exists():
+        return {}
+    try:
+        return json.loads(HISTORIAL_PATH.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[Presupuesto] AVISO: historial ilegible ({e}), se usa la estimación inicial")
+        return {}
+
+
+def estimar_max_tokens(llamada: str, filas: int | None, historial: dict) -> int:
+    if not filas:
+        # Sin secciones, o sin filas reconocibles (tablas en otro formato): valor fijo
+        return MAX_TOKENS_FIJOS[llamada]
+    base, por_fila = ESTIMACION_INICIAL[llamada]
+    por_fila = historial.get(llamada, {}).get("tokens_por_fila", por_fila)
+    estimado = int((base + filas * por_fila) * MARGEN)
+    return max(MIN_MAX_TOKENS, min(MAX_TOKENS_LIMITE, estimado))
+
+
+def registrar(llamada: str, filas: int | None, tokens_salida: int, historial: dict):
+    """Actualiza el promedio de tokens por fila de la llamada y guarda el historial.
+
+    La actualización se aplica sobre el historial actual del archivo (otras ingestas
+    pudieron guardarlo después de cargar_historial) y historial queda con esa versión.
+    """
+    if not filas or not tokens_salida:
+        return
+    base, inicial = ESTIMACION_INICIAL[llamada]
+    observado = max(0, tokens_salida - base) / filas
+    with _lock_historial:
+        actual = cargar_historial()
+        entrada = actual.setdefault(llamada, {"tokens_por_fila": inicial, "actas": 0})
+        entrada["tokens_por_fila"] = round((1 - ALFA) * entrada["tokens_por_fila"] + ALFA * observado, 1)
+        entrada["actas"] += 1
+        historial.clear()
+        historial.update(actual)
+        try:
+            # Escritura atómica, como en estado.py: un lector nunca ve el archivo a medio escribir
+            temporal = HISTORIAL_PATH.with_suffix(".tmp")
+            temporal.write_text(json.dumps(actual, indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(temporal, HISTORIAL_PATH)
+        except OSError as e:
+            print(f"[Presupuesto] AVISO: no se pudo guardar el historial: {e}")
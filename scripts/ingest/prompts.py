@@ -1,8 +1,17 @@
-PROMPT_METADATOS_Y_ME = """
+# Prompt de sistema de las llamadas de extracción: el acta (completa o solo las secciones
+# de la llamada, ver secciones.py) va primero, con cachePoint, y las instrucciones de cada
+# sección van después, en el mensaje de usuario. Con el acta completa el prefijo es
+# idéntico en todas las llamadas: Bedrock lo cachea en la primera y lo lee en las siguientes.
+PROMPT_SISTEMA_ACTA = """
 Sos un extractor de datos estructurados especializado en actas del Colegio de Técnicos de la Provincia de Buenos Aires.
 
-Se te provee el contenido completo de un acta en formato Markdown. Tu tarea es extraer ÚNICAMENTE los datos indicados y devolverlos como JSON válido, sin texto adicional, sin bloques de código, sin explicaciones.
+Se te provee el contenido de un acta en formato Markdown (completo, o el encabezado y las secciones que hacen falta). En cada pedido se indica qué datos extraer: extraé ÚNICAMENTE esos datos y devolvelos como JSON válido, sin texto adicional, sin bloques de código, sin explicaciones.
+
+CONTENIDO DEL ACTA:
+{markdown}
+"""
 
+PROMPT_METADATOS_Y_ME = """
 Extraé los siguientes datos:
 
 1. METADATOS DEL ACTA:
@@ -54,9 +63,6 @@ Devolvé ÚNICAMENTE este JSON, sin nada más:
     }
   ]
 }
-
-CONTENIDO DEL ACTA:
-{markdown}
 """
 
 PROMPT_DISTRITOS_Y_RESTO = """
@@ -139,8 +145,6 @@ CONTENIDO DEL ACTA:
 """
 
 PROMPT_AS_AT = """
-Sos un extractor de datos estructurados especializado en actas del Colegio de Técnicos de la Provincia de Buenos Aires.
-
 Extraé ÚNICAMENTE las NOTAS AS y NOTAS AT del acta en formato Markdown que se te provee.
 
 Para cada nota extraé:
@@ -155,14 +159,9 @@ Para cada nota extraé:
 
 Devolvé ÚNICAMENTE este JSON sin nada más:
 {"notas_as": [...], "notas_at": [...]}
-
-CONTENIDO DEL ACTA:
-{markdown}
 """
 
 PROMPT_TEMAS_VARIOS = """
-Sos un extractor de datos estructurados especializado en actas del Colegio de Técnicos de la Provincia de Buenos Aires.
-
 Extraé ÚNICAMENTE los TEMAS VARIOS del acta en formato Markdown que se te provee.
 
 Para cada punto extraé:
@@ -173,14 +172,9 @@ Para cada punto extraé:
 
 Devolvé ÚNICAMENTE este JSON sin nada más:
 {"temas_varios": [...]}
-
-CONTENIDO DEL ACTA:
-{markdown}
 """
 
 PROMPT_DISTRITOS_1_4 = """
-Sos un extractor de datos estructurados especializado en actas del Colegio de Técnicos de la Provincia de Buenos Aires.
-
 Extraé ÚNICAMENTE las notas de DISTRITO I, DISTRITO II, DISTRITO III y DISTRITO IV del acta en formato Markdown que se te provee. Ignorá el resto.
 
 Para cada nota extraé:
@@ -196,14 +190,9 @@ Para cada nota extraé:
 
 Devolvé ÚNICAMENTE este JSON sin nada más:
 {"notas_distritos": [...]}
-
-CONTENIDO DEL ACTA:
-{markdown}
 """
 
 PROMPT_DISTRITOS_5_7 = """
-Sos un extractor de datos estructurados especializado en actas del Colegio de Técnicos de la Provincia de Buenos Aires.
-
 Extraé ÚNICAMENTE las notas de DISTRITO V, DISTRITO VI y DISTRITO VII del acta en formato Markdown que se te provee. Ignorá el resto.
 
 Para cada nota extraé:
@@ -219,7 +208,4 @@ Para cada nota extraé:
 
 Devolvé ÚNICAMENTE este JSON sin nada más:
 {"notas_distritos": [...]}
-
-CONTENIDO DEL ACTA:
-{markdown}
 """
@@ -3,10 +3,16 @@ import hashlib
 from qdrant_client import QdrantClient
 from qdrant_client.models import (
     Distance, VectorParams, PointStruct, 
-    Filter, FieldCondition, MatchValue
+    Filter, FieldCondition, MatchValue,
+    HnswConfigDiff, SearchParams, QuantizationSearchParams,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    BinaryQuantization, BinaryQuantizationConfig
 )
 from openai import OpenAI
 from dotenv import load_dotenv
+from reintentos import con_reintentos
+from metricas import medir, registrar
+import time
 
 load_dotenv()
 
@@ -17,35 +23,201 @@ BEDROCK_API_KEY = os.getenv("BEDROCK_API_KEY")
 
 # Usamos el modelo de embeddings de Bedrock via gateway
 EMBEDDING_MODEL = "amazon.titan-embed-text-v2:0"
-VECTOR_SIZE = 1024
+# Titan v2 admite 256, 512 o 1024 dimensiones. Con 256/512 la colección
+# ocupa 2-4x menos memoria; comparar el recall con reporte_dimensiones.py
+VECTOR_SIZE = int(os.getenv("EMBEDDING_DIMENSIONS", "1024"))
+
+# Layout de almacenamiento de la colección
+# QDRANT_QUANTIZATION: "none", "scalar" (int8, ~4x menos RAM) o "binary" (1 bit, ~32x menos RAM)
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none").lower()
+# Vectores originales (float32) en disco; en RAM quedan solo los cuantizados
+QDRANT_ON_DISK = os.getenv("QDRANT_ON_DISK", "false").lower() == "true"
+QDRANT_HNSW_PERFIL = os.getenv("QDRANT_HNSW_PERFIL", "default").lower()
+# Sobremuestreo al buscar con cuantización: se recuperan limit*oversampling
+# candidatos y se re-puntúan con los vectores originales
+QDRANT_OVERSAMPLING = float(os.getenv("QDRANT_OVERSAMPLING", "2.0"))
+
+HNSW_PERFILES = {
+    # Valores por defecto de Qdrant
+    "default": {"m": 16, "ef_construct": 100, "on_disk": False},
+    # Grafo más chico y en disco, para colecciones grandes con poca RAM
+    "memoria": {"m": 8, "ef_construct": 64, "on_disk": True},
+    # Grafo más denso, mejor recall a costa de RAM y tiempo de indexación
+    "precision": {"m": 32, "ef_construct": 256, "on_disk": False},
+}
+
+# ef de búsqueda sugerido para cada perfil
+HNSW_EF_BUSQUEDA = {"default": 128, "memoria": 64, "precision": 256}
 
 qdrant = QdrantClient(url=QDRANT_URL)
 
 client = OpenAI(
     base_url=f"{BEDROCK_URL}/api/v1",
-    api_key=BEDROCK_API_KEY
+    api_key=BEDROCK_API_KEY,
+    max_retries=0
 )
 
+def config_coleccion(
+    cuantizacion: str = QDRANT_QUANTIZATION,
+    on_disk: bool = QDRANT_ON_DISK,
+    perfil_hnsw: str = QDRANT_HNSW_PERFIL,
+    dimensiones: int = VECTOR_SIZE,
+) -> dict:
+    """
+    Devuelve los argumentos de create_collection para el layout pedido.
+    Por defecto usa el layout configurado por variables de entorno.
+    """
+    if perfil_hnsw not in HNSW_PERFILES:
+        raise ValueError(f"Perfil HNSW desconocido: {perfil_hnsw}. Opciones: {', '.join(HNSW_PERFILES)}")
+    
+    if cuantizacion == "scalar":
+        quantization_config = ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True
+            )
+        )
+    elif cuantizacion == "binary":
+        quantization_config = BinaryQuantization(
+            binary=BinaryQuantizationConfig(always_ram=True)
+        )
+    elif cuantizacion == "none":
+        quantization_config = None
+    else:
+        raise ValueError(f"Cuantización desconocida: {cuantizacion}. Opciones: none, scalar, binary")
+    
+    return {
+        "vectors_config": VectorParams(
+            size=dimensiones,
+            distance=Distance.COSINE,
+            on_disk=on_disk
+        ),
+        "hnsw_config": HnswConfigDiff(**HNSW_PERFILES[perfil_hnsw]),
+        "quantization_config": quantization_config,
+    }
+
+def parametros_busqueda(
+    cuantizacion: str = QDRANT_QUANTIZATION,
+    perfil_hnsw: str = QDRANT_HNSW_PERFIL,
+    exacta: bool = False
+) -> SearchParams:
+    """
+    Parámetros de búsqueda acordes al layout: con cuantización re-puntúa con los vectores originales.
+    Los usa reporte_layouts.py para medir el recall; las consultas de OpenWebUI no pasan por acá.
+    """
+    quantization = None
+    if cuantizacion != "none":
+        quantization = QuantizationSearchParams(
+            rescore=True,
+            oversampling=QDRANT_OVERSAMPLING
+        )
+    return SearchParams(
+        hnsw_ef=HNSW_EF_BUSQUEDA.get(perfil_hnsw),
+        exact=exacta,
+        quantization=quantization
+    )
+
 def asegurar_coleccion():
     """Crea la colección en Qdrant si no existe"""
     colecciones = [c.name for c in qdrant.get_collections().collections]
     if QDRANT_COLLECTION not in colecciones:
         qdrant.create_collection(
             collection_name=QDRANT_COLLECTION,
-            vectors_config=VectorParams(
-                size=VECTOR_SIZE,
-                distance=Distance.COSINE
-            )
+            **config_coleccion()
+        )
+        print(
+            f"[Qdrant] Colección '{QDRANT_COLLECTION}' creada "
+            f"({VECTOR_SIZE} dims, cuantización={QDRANT_QUANTIZATION}, "
+            f"on_disk={QDRANT_ON_DISK}, hnsw={QDRANT_HNSW_PERFIL})"
         )
-        print(f"[Qdrant] Colección '{QDRANT_COLLECTION}' creada")
     else:
+        tamano = qdrant.get_collection(QDRANT_COLLECTION).config.params.vectors.size
+        if tamano != VECTOR_SIZE:
+            raise Exception(
+                f"La colección '{QDRANT_COLLECTION}' tiene vectores de {tamano} dimensiones "
+                f"pero EMBEDDING_DIMENSIONS={VECTOR_SIZE}. Usá otra colección o re-indexá."
+            )
         print(f"[Qdrant] Colección '{QDRANT_COLLECTION}' ya existe")
 
-def generar_embedding(texto: str) -> list:
+def copiar_puntos(origen: str, destino: str, lote_size: int = 256) -> int:
+    """Copia todos los puntos (vector + payload) de una colección a otra"""
+    total = 0
+    offset = None
+    while True:
+        puntos, offset = qdrant.scroll(
+            collection_name=origen,
+            limit=lote_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        if puntos:
+            qdrant.upsert(
+                collection_name=destino,
+                points=[PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in puntos]
+            )
+            total += len(puntos)
+        if offset is None:
+            break
+    return total
+
+def migrar_coleccion():
+    """
+    Re-crea la colección existente con el layout configurado (cuantización,
+    on_disk y perfil HNSW), preservando IDs, vectores y payloads.
+
+    Copia los puntos a una colección temporal, re-crea la original y los
+    vuelve a copiar. La temporal se borra solo si la copia de vuelta está completa.
+    """
+    temporal = f"{QDRANT_COLLECTION}_migracion"
+    colecciones = [c.name for c in qdrant.get_collections().collections]
+    if QDRANT_COLLECTION not in colecciones:
+        print(f"[Qdrant] La colección '{QDRANT_COLLECTION}' no existe, nada que migrar")
+        return
+    if temporal in colecciones:
+        raise Exception(
+            f"Existe la colección temporal '{temporal}' de una migración anterior. "
+            f"Verificala y borrala antes de migrar."
+        )
+    
+    tamano = qdrant.get_collection(QDRANT_COLLECTION).config.params.vectors.size
+    if tamano != VECTOR_SIZE:
+        raise Exception(
+            f"La colección tiene {tamano} dimensiones y EMBEDDING_DIMENSIONS={VECTOR_SIZE}. "
+            f"Cambiar de dimensión requiere re-indexar las actas, no migrar."
+        )
+    
+    original = qdrant.count(collection_name=QDRANT_COLLECTION, exact=True).count
+    print(f"[Qdrant] Migrando '{QDRANT_COLLECTION}' ({original} puntos)...")
+    
+    qdrant.create_collection(collection_name=temporal, **config_coleccion("none", True, "default"))
+    copiados = copiar_puntos(QDRANT_COLLECTION, temporal)
+    if copiados != original:
+        raise Exception(f"Copia incompleta a '{temporal}': {copiados}/{original} puntos")
+    
+    qdrant.delete_collection(collection_name=QDRANT_COLLECTION)
+    qdrant.create_collection(collection_name=QDRANT_COLLECTION, **config_coleccion())
+    restaurados = copiar_puntos(temporal, QDRANT_COLLECTION)
+    if restaurados != original:
+        raise Exception(
+            f"Restauración incompleta: {restaurados}/{original} puntos. "
+            f"Los datos originales siguen en '{temporal}'"
+        )
+    
+    qdrant.delete_collection(collection_name=temporal)
+    print(
+        f"[Qdrant] OK — '{QDRANT_COLLECTION}' re-creada con cuantización={QDRANT_QUANTIZATION}, "
+        f"on_disk={QDRANT_ON_DISK}, hnsw={QDRANT_HNSW_PERFIL} ({restaurados} puntos)"
+    )
+
+def generar_embedding(texto: str, dimensiones: int = VECTOR_SIZE) -> list:
     """Genera embedding via Bedrock gateway"""
-    response = client.embeddings.create(
+    response = con_reintentos(
+        client.embeddings.create, "Embeddings",
         model=EMBEDDING_MODEL,
-        input=texto
+        input=texto,
+        dimensions=dimensiones
     )
     return response.data[0].embedding
 
@@ -54,37 +226,67 @@ def chunk_id(texto: str, acta_numero: int, indice: int) -> int:
     hash_str = f"{acta_numero}_{indice}_{texto[:50]}"
     return int(hashlib.md5(hash_str.encode()).hexdigest()[:8], 16)
 
-def indexar_acta(markdown: str, datos: dict, acta_id: int):
+# Secciones de notas del JSON extraído y su nombre por defecto en los chunks
+SECCIONES_NOTAS = [
+    ("notas_me_mt", "ME/MT"),
+    ("notas_distritos", "Distritos"),
+    ("notas_as", "AS"),
+    ("notas_at", "AT"),
+]
+
+def texto_nota(nota: dict, acta_numero: int, fecha: str, nombre_seccion: str) -> str:
+    """Texto del chunk de una nota, con contexto del acta"""
+    return f"""Acta N° {acta_numero} — {fecha}
+Sección: {nota.get('seccion', nombre_seccion)}
+Código: {nota.get('codigo_nota', '')}
+Tema: {nota.get('tema', '')}
+Descripción: {nota.get('descripcion', '')}
+Resolución: {nota.get('resolucion', '')}"""
+
+def texto_tema(tema: dict, acta_numero: int, fecha: str) -> str:
+    """Texto del chunk de un punto de temas varios"""
+    return f"""Acta N° {acta_numero} — {fecha}
+Sección: Temas Varios
+Punto {tema.get('numero_punto', '')}: {tema.get('titulo', '')}
+Descripción: {tema.get('descripcion', '')}
+Resolución: {tema.get('resolucion', '')}"""
+
+def indexar_acta(markdown: str, datos: dict, acta_id: int, embeddings: dict = None):
     """
     Indexa el acta completa en Qdrant.
     Estrategia: un chunk por nota, con metadata para filtrado.
+    embeddings: {texto_chunk: vector} ya calculados (ingesta incremental); el resto se genera acá.
     """
     asegurar_coleccion()
+    embeddings = embeddings or {}
     
     acta_numero = datos["acta"]["acta_numero"]
     fecha = datos["acta"].get("fecha", "")
     points = []
     indice = 0
+    reutilizados = 0
+    generados = 0
+    segundos_embeddings = 0.0
+    
+    def embedding_de(texto_chunk: str) -> list:
+        nonlocal reutilizados, generados, segundos_embeddings
+        embedding = embeddings.get(texto_chunk)
+        if embedding is not None:
+            reutilizados += 1
+            return embedding
+        inicio = time.perf_counter()
+        embedding = generar_embedding(texto_chunk)
+        segundos_embeddings += time.perf_counter() - inicio
+        generados += 1
+        return embedding
     
     # Indexa cada nota como un chunk independiente
-    secciones = [
-        ("notas_me_mt", "ME/MT"),
-        ("notas_distritos", "Distritos"),
-        ("notas_as", "AS"),
-        ("notas_at", "AT"),
-    ]
-    
-    for clave_seccion, nombre_seccion in secciones:
+    for clave_seccion, nombre_seccion in SECCIONES_NOTAS:
         for nota in datos.get(clave_seccion, []):
             # Construye texto del chunk con contexto
-            texto_chunk = f"""Acta N° {acta_numero} — {fecha}
-Sección: {nota.get('seccion', nombre_seccion)}
-Código: {nota.get('codigo_nota', '')}
-Tema: {nota.get('tema', '')}
-Descripción: {nota.get('descripcion', '')}
-Resolución: {nota.get('resolucion', '')}"""
+            texto_chunk = texto_nota(nota, acta_numero, fecha, nombre_seccion)
             
-            embedding = generar_embedding(texto_chunk)
+            embedding = embedding_de(texto_chunk)
             
             points.append(PointStruct(
                 id=chunk_id(texto_chunk, acta_numero, indice),
@@ -103,13 +305,9 @@ Resolución: {nota.get('resolucion', '')}"""
     
     # Indexa temas varios
     for tema in datos.get("temas_varios", []):
-        texto_chunk = f"""Acta N° {acta_numero} — {fecha}
-Sección: Temas Varios
-Punto {tema.get('numero_punto', '')}: {tema.get('titulo', '')}
-Descripción: {tema.get('descripcion', '')}
-Resolución: {tema.get('resolucion', '')}"""
+        texto_chunk = texto_tema(tema, acta_numero, fecha)
         
-        embedding = generar_embedding(texto_chunk)
+        embedding = embedding_de(texto_chunk)
         
         points.append(PointStruct(
             id=chunk_id(texto_chunk, acta_numero, indice),
@@ -126,10 +324,24 @@ Resolución: {tema.get('resolucion', '')}"""
         ))
         indice += 1
     
+    if reutilizados:
+        print(f"[Qdrant] {reutilizados}/{len(points)} embeddings ya calculados durante la extracción")
+    
+    registrar("embeddings", segundos_embeddings, True, {"chunks": generados, "reutilizados": reutilizados})
+    
     # Sube en lotes de 50
     lote_size = 50
-    for i in range(0, len(points), lote_size):
-        lote = points[i:i+lote_size]
-        qdrant.upsert(collection_name=QDRANT_COLLECTION, points=lote)
+    with medir("qdrant", chunks=len(points)):
+        for i in range(0, len(points), lote_size):
+            lote = points[i:i+lote_size]
+            qdrant.upsert(collection_name=QDRANT_COLLECTION, points=lote)
     
     print(f"[Qdrant] OK — {len(points)} chunks indexados para acta {acta_numero}")
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 2 or sys.argv[1] != "migrar":
+        print("Uso: python qdrant_index.py migrar")
+        sys.exit(1)
+    
+    migrar_coleccion()
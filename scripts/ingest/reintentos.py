@@ -0,0 +1,65 @@
+"""
+Reintentos con backoff exponencial y jitter para errores transitorios.
+
+Se reintentan los 429 y 5xx del gateway y de Docling, y los errores de
+conexión o timeout. La espera es "full jitter": un valor al azar entre 0 y
+REINTENTOS_BASE * 2^intento (con tope REINTENTOS_TOPE), así varias ingestas
+que fallan juntas no vuelven a golpear el gateway todas al mismo tiempo. Si la
+respuesta trae Retry-After (el control de admisión del gateway lo envía) se
+respeta ese valor.
+
+Los clientes OpenAI se crean con max_retries=0 para no sumar estos reintentos
+a los del SDK.
+"""
+
+import os
+import random
+import time
+
+import openai
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REINTENTOS_MAX = int(os.getenv("REINTENTOS_MAX", "5"))
+REINTENTOS_BASE = float(os.getenv("REINTENTOS_BASE", "1.0"))
+REINTENTOS_TOPE = float(os.getenv("REINTENTOS_TOPE", "30"))
+
+ESTADOS_TRANSITORIOS = {408, 429, 500, 502, 503, 504}
+
+
+def _respuesta(error: Exception):
+    return getattr(error, "response", None)
+
+
+def es_transitorio(error: Exception) -> bool:
+    if isinstance(error, (openai.APIConnectionError, requests.ConnectionError, requests.Timeout)):
+        return True
+    respuesta = _respuesta(error)
+    return respuesta is not None and getattr(respuesta, "status_code", None) in ESTADOS_TRANSITORIOS
+
+
+def espera(intento: int, error: Exception) -> float:
+    respuesta = _respuesta(error)
+    retry_after = respuesta.headers.get("retry-after") if respuesta is not None else None
+    if retry_after:
+        try:
+            return min(REINTENTOS_TOPE, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(REINTENTOS_TOPE, REINTENTOS_BASE * 2 ** intento))
+
+
+def con_reintentos(fn, descripcion: str, *args, **kwargs):
+    """Llama fn(*args, **kwargs) reintentando los errores transitorios hasta REINTENTOS_MAX veces"""
+    for intento in range(REINTENTOS_MAX + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if intento == REINTENTOS_MAX or not es_transitorio(e):
+                raise
+            segundos = espera(intento, e)
+            print(f"[Reintento] {descripcion}: {type(e).__name__} ({e}), "
+                  f"reintento {intento + 1}/{REINTENTOS_MAX} en {segundos:.1f}s")
+            time.sleep(segundos)
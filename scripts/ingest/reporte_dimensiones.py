@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Compara el recall de embeddings Titan v2 con dimensión reducida (256/512)
+contra la dimensión completa (1024).
+
+Uso:
+    python reporte_dimensiones.py [--muestras 300] [--k 10]
+
+Toma chunks ya indexados en QDRANT_COLLECTION (payload texto_completo) y usa
+el tema de cada uno como consulta. Genera los embeddings de chunks y consultas
+en cada dimensión via gateway y mide, por búsqueda exacta, qué fracción del
+top-k obtenido con 1024 dimensiones se recupera con 256 y 512.
+"""
+
+import argparse
+
+from qdrant_index import QDRANT_COLLECTION, generar_embedding, qdrant
+
+DIMENSIONES = [1024, 512, 256]
+
+
+def cargar_muestras(n: int) -> list:
+    muestras = []
+    offset = None
+    while len(muestras) < n:
+        puntos, offset = qdrant.scroll(
+            collection_name=QDRANT_COLLECTION,
+            limit=min(256, n - len(muestras)),
+            offset=offset,
+            with_payload=True
+        )
+        for p in puntos:
+            if p.payload.get("texto_completo") and p.payload.get("tema"):
+                muestras.append((p.payload["tema"], p.payload["texto_completo"]))
+        if offset is None:
+            break
+    return muestras[:n]
+
+
+def top_k(consulta: list, corpus: list, k: int) -> set:
+    # Titan v2 devuelve vectores normalizados: producto punto == coseno
+    puntajes = [(sum(a * b for a, b in zip(consulta, v)), i) for i, v in enumerate(corpus)]
+    puntajes.sort(reverse=True)
+    return {i for _, i in puntajes[:k]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall de Titan v2 a 256/512 dimensiones vs 1024")
+    parser.add_argument("--muestras", type=int, default=300)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    muestras = cargar_muestras(args.muestras)
+    if not muestras:
+        print(f"[Reporte] No hay chunks con texto en '{QDRANT_COLLECTION}'")
+        return
+    print(f"[Reporte] {len(muestras)} chunks de '{QDRANT_COLLECTION}'")
+
+    rankings = {}
+    for dims in DIMENSIONES:
+        print(f"[Reporte] Generando embeddings de {dims} dimensiones...")
+        corpus = [generar_embedding(texto, dims) for _, texto in muestras]
+        consultas = [generar_embedding(tema, dims) for tema, _ in muestras]
+        rankings[dims] = [top_k(q, corpus, args.k) for q in consultas]
+
+    referencia = rankings[DIMENSIONES[0]]
+    print(f"\n{'dims':>6}{'recall@' + str(args.k):>12}{'bytes/vector':>14}{'memoria':>10}")
+    print("-" * 42)
+    for dims in DIMENSIONES:
+        recall = sum(
+            len(r & ref) / len(ref) for r, ref in zip(rankings[dims], referencia) if ref
+        ) / len(referencia)
+        print(f"{dims:>6}{recall:>12.4f}{dims * 4:>14}{dims / DIMENSIONES[0]:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Reporte de recall y latencia para los layouts de almacenamiento de Qdrant.
+
+Uso:
+    python reporte_layouts.py [--puntos 5000] [--consultas 200] [--k 10] [--desde-coleccion]
+
+Crea colecciones temporales en el Qdrant local (QDRANT_URL), una por layout
+(sin cuantización, scalar, binary, con y sin vectores en disco), carga los
+mismos vectores en todas y compara cada una contra la búsqueda exacta:
+- recall@k respecto del top-k exacto
+- latencia p50/p95 por consulta
+
+Con --desde-coleccion usa vectores reales de QDRANT_COLLECTION en lugar de
+vectores sintéticos (recomendado: el recall de binary depende mucho de los datos).
+"""
+
+import argparse
+import math
+import random
+import time
+
+from qdrant_client.models import PointStruct
+
+from qdrant_index import (
+    QDRANT_COLLECTION,
+    VECTOR_SIZE,
+    config_coleccion,
+    parametros_busqueda,
+    qdrant,
+)
+
+# (nombre, cuantización, on_disk, perfil HNSW)
+LAYOUTS = [
+    ("float32_ram", "none", False, "default"),
+    ("scalar_ram", "scalar", False, "default"),
+    ("scalar_disco", "scalar", True, "default"),
+    ("binary_disco", "binary", True, "default"),
+    ("scalar_disco_memoria", "scalar", True, "memoria"),
+]
+
+PREFIJO = "reporte_layout_"
+
+
+def normalizar(v: list) -> list:
+    norma = math.sqrt(sum(x * x for x in v)) or 1.0
+    return [x / norma for x in v]
+
+
+def vectores_sinteticos(n: int, semilla: int = 42) -> list:
+    """Vectores agrupados en clusters, más parecidos a embeddings reales que ruido uniforme"""
+    rnd = random.Random(semilla)
+    centros = [normalizar([rnd.gauss(0, 1) for _ in range(VECTOR_SIZE)]) for _ in range(max(1, n // 100))]
+    vectores = []
+    for _ in range(n):
+        centro = rnd.choice(centros)
+        vectores.append(normalizar([c + rnd.gauss(0, 0.05) for c in centro]))
+    return vectores
+
+
+def vectores_de_coleccion(n: int) -> list:
+    vectores = []
+    offset = None
+    while len(vectores) < n:
+        puntos, offset = qdrant.scroll(
+            collection_name=QDRANT_COLLECTION,
+            limit=min(256, n - len(vectores)),
+            offset=offset,
+            with_vectors=True
+        )
+        vectores.extend(p.vector for p in puntos)
+        if offset is None:
+            break
+    return vectores
+
+
+def consultas_desde(vectores: list, n: int, semilla: int = 7) -> list:
+    """Consultas = vectores existentes con ruido, para que tengan vecinos cercanos"""
+    rnd = random.Random(semilla)
+    return [normalizar([x + rnd.gauss(0, 0.02) for x in rnd.choice(vectores)]) for _ in range(n)]
+
+
+def esperar_indexado(nombre: str, timeout: float = 600):
+    inicio = time.time()
+    while time.time() - inicio < timeout:
+        if qdrant.get_collection(nombre).status == "green":
+            return
+        time.sleep(1)
+    print(f"[Reporte] AVISO: '{nombre}' sigue optimizando después de {timeout:.0f}s")
+
+
+def percentil(valores: list, p: float) -> float:
+    ordenados = sorted(valores)
+    idx = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[idx]
+
+
+def crear_y_cargar(nombre: str, cuantizacion: str, on_disk: bool, perfil: str, vectores: list):
+    if qdrant.collection_exists(nombre):
+        qdrant.delete_collection(nombre)
+    qdrant.create_collection(collection_name=nombre, **config_coleccion(cuantizacion, on_disk, perfil))
+    lote_size = 256
+    for i in range(0, len(vectores), lote_size):
+        qdrant.upsert(
+            collection_name=nombre,
+            points=[PointStruct(id=i + j, vector=v) for j, v in enumerate(vectores[i:i+lote_size])],
+            wait=True
+        )
+    esperar_indexado(nombre)
+
+
+def medir(nombre: str, consultas: list, k: int, cuantizacion: str, perfil: str, exacta: bool = False):
+    params = parametros_busqueda(cuantizacion, perfil, exacta=exacta)
+    resultados, latencias = [], []
+    for q in consultas:
+        t0 = time.perf_counter()
+        r = qdrant.query_points(collection_name=nombre, query=q, limit=k, search_params=params)
+        latencias.append((time.perf_counter() - t0) * 1000)
+        resultados.append({p.id for p in r.points})
+    return resultados, latencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara layouts de Qdrant (recall y latencia)")
+    parser.add_argument("--puntos", type=int, default=5000)
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--desde-coleccion", action="store_true")
+    args = parser.parse_args()
+
+    if args.desde_coleccion:
+        vectores = vectores_de_coleccion(args.puntos)
+        print(f"[Reporte] {len(vectores)} vectores tomados de '{QDRANT_COLLECTION}'")
+    else:
+        vectores = vectores_sinteticos(args.puntos)
+        print(f"[Reporte] {len(vectores)} vectores sintéticos de {VECTOR_SIZE} dimensiones")
+    consultas = consultas_desde(vectores, args.consultas)
+
+    filas = []
+    exactos = None
+    try:
+        for nombre, cuantizacion, on_disk, perfil in LAYOUTS:
+            coleccion = PREFIJO + nombre
+            print(f"[Reporte] Cargando {nombre}...")
+            crear_y_cargar(coleccion, cuantizacion, on_disk, perfil, vectores)
+            if exactos is None:
+                exactos, _ = medir(coleccion, consultas, args.k, "none", perfil, exacta=True)
+            obtenidos, latencias = medir(coleccion, consultas, args.k, cuantizacion, perfil)
+            recall = sum(len(o & e) / len(e) for o, e in zip(obtenidos, exactos) if e) / len(consultas)
+            filas.append((nombre, recall, percentil(latencias, 50), percentil(latencias, 95)))
+    finally:
+        for nombre, *_ in LAYOUTS:
+            if qdrant.collection_exists(PREFIJO + nombre):
+                qdrant.delete_collection(PREFIJO + nombre)
+
+    print(f"\n{'layout':<24}{'recall@' + str(args.k):>12}{'p50 ms':>10}{'p95 ms':>10}")
+    print("-" * 56)
+    for nombre, recall, p50, p95 in filas:
+        print(f"{nombre:<24}{recall:>12.4f}{p50:>10.2f}{p95:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
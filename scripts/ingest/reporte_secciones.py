@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Reporte de ahorro de tokens del recorte por secciones.
+
+Uso:
+    python reporte_secciones.py <acta.md> [<acta.md> ...]
+
+Para cada Markdown (ingest.py guarda uno junto a cada PDF) muestra las
+secciones detectadas y, por llamada de extracción, los tokens de entrada
+estimados con el documento completo y con el recorte.
+"""
+
+import sys
+from pathlib import Path
+
+from secciones import SECCIONES_POR_LLAMADA, detectar_secciones, estimar_tokens, recortar
+
+
+def reportar(path: Path) -> tuple:
+    markdown = path.read_text(encoding="utf-8")
+    limites = detectar_secciones(markdown)
+    print(f"\n{path.name}: {len(limites)} secciones detectadas ({', '.join(limites) or 'ninguna'})")
+    print(f"{'llamada':<20}{'completo':>10}{'recorte':>10}{'ahorro':>9}")
+    print("-" * 49)
+    total_completo = total_recorte = 0
+    completo = estimar_tokens(markdown)
+    for llamada in SECCIONES_POR_LLAMADA:
+        recorte = estimar_tokens(recortar(markdown, llamada, limites))
+        total_completo += completo
+        total_recorte += recorte
+        marca = "" if recorte < completo else "  (sin ahorro)"
+        print(f"{llamada:<20}{completo:>10}{recorte:>10}{1 - recorte / completo:>8.0%}{marca}")
+    print(f"{'total':<20}{total_completo:>10}{total_recorte:>10}{1 - total_recorte / total_completo:>8.0%}")
+    return total_completo, total_recorte
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python reporte_secciones.py <acta.md> [<acta.md> ...]")
+        sys.exit(1)
+    total_completo = total_recorte = 0
+    for archivo in sys.argv[1:]:
+        completo, recorte = reportar(Path(archivo))
+        total_completo += completo
+        total_recorte += recorte
+    if len(sys.argv) > 2:
+        print(f"\n[Reporte] {len(sys.argv) - 1} actas: {total_completo} → {total_recorte} tokens de entrada "
+              f"({1 - total_recorte / total_completo:.0%} de ahorro)")
+
+
+if __name__ == "__main__":
+    main()
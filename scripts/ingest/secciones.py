@@ -0,0 +1,106 @@
+"""
+Recorte del Markdown de un acta por secciones.
+
+Cada llamada de extracción necesita solo una parte del acta (las tablas de los
+distritos I-IV, las notas AS/AT, etc). Acá se ubican los encabezados de sección
+en el Markdown de Docling y se arma, para cada llamada, el encabezado del acta
+(metadatos) más las secciones que le corresponden.
+
+Si la detección falla (no se encuentra la sección ancla de una llamada) esa
+llamada recibe el documento completo, como antes.
+"""
+
+import re
+
+# Secciones en el orden en que aparecen en el acta
+SECCIONES = [
+    ("ME", r"NOTAS\s+INGRESADAS\s+ME\b"),
+    ("MT", r"NOTAS\s+INGRESADAS\s+MT\b"),
+    ("DISTRITO I", r"DISTRITO\s+I\b"),
+    ("DISTRITO II", r"DISTRITO\s+II\b"),
+    ("DISTRITO III", r"DISTRITO\s+III\b"),
+    ("DISTRITO IV", r"DISTRITO\s+IV\b"),
+    ("DISTRITO V", r"DISTRITO\s+V\b"),
+    ("DISTRITO VI", r"DISTRITO\s+VI\b"),
+    ("DISTRITO VII", r"DISTRITO\s+VII\b"),
+    ("AS", r"NOTAS\s+AS\b"),
+    ("AT", r"NOTAS\s+AT\b"),
+    ("TEMAS VARIOS", r"TEMAS\s+VARIOS\b"),
+]
+
+# Secciones que necesita cada llamada de extracción. La primera es el ancla:
+# si no se encuentra, esa llamada recibe el documento completo.
+SECCIONES_POR_LLAMADA = {
+    "metadatos y ME/MT": ["ME", "MT"],
+    "distritos I-IV": ["DISTRITO I", "DISTRITO II", "DISTRITO III", "DISTRITO IV"],
+    "distritos V-VII": ["DISTRITO V", "DISTRITO VI", "DISTRITO VII"],
+    "AS y AT": ["AS", "AT"],
+    "temas varios": ["TEMAS VARIOS"],
+}
+
+# Llamadas que además necesitan el cierre del acta (hora de finalización, páginas)
+LLAMADAS_CON_CIERRE = {"metadatos y ME/MT"}
+LINEAS_CIERRE = 15
+
+# Un encabezado es una línea corta que, sin decoración Markdown, empieza con el nombre de la sección
+DECORACION = re.compile(r"^[\s#*|_>:\-]+")
+LARGO_MAXIMO_ENCABEZADO = 80
+
+
+def _es_encabezado(linea: str, patron: str) -> bool:
+    texto = DECORACION.sub("", linea).upper()
+    return len(texto) <= LARGO_MAXIMO_ENCABEZADO and re.match(patron, texto) is not None
+
+
+def detectar_secciones(markdown: str) -> dict:
+    """Devuelve {seccion: (linea_inicio, linea_fin)}, vacío si se detectan menos de dos secciones.
+
+    Cada sección se busca a partir de la anterior encontrada, así una mención
+    suelta en el texto no puede adelantar una sección a otra.
+    """
+    lineas = markdown.split("\n")
+    inicios = {}
+    desde = 0
+    for clave, patron in SECCIONES:
+        for i in range(desde, len(lineas)):
+            if _es_encabezado(lineas[i], patron):
+                inicios[clave] = i
+                desde = i + 1
+                break
+
+    if len(inicios) < 2:
+        return {}
+    ordenadas = sorted(inicios.items(), key=lambda x: x[1])
+    limites = {}
+    for n, (clave, inicio) in enumerate(ordenadas):
+        fin = ordenadas[n + 1][1] if n + 1 < len(ordenadas) else len(lineas)
+        limites[clave] = (inicio, fin)
+    return limites
+
+
+def recortar(markdown: str, llamada: str, limites: dict = None) -> str:
+    """Markdown reducido para una llamada: encabezado del acta + sus secciones (+ cierre si aplica)"""
+    if limites is None:
+        limites = detectar_secciones(markdown)
+    claves = SECCIONES_POR_LLAMADA[llamada]
+    if not limites or claves[0] not in limites:
+        return markdown
+
+    lineas = markdown.split("\n")
+    primera = min(inicio for inicio, _ in limites.values())
+    partes = ["\n".join(lineas[:primera])]
+    for clave in claves:
+        if clave in limites:
+            inicio, fin = limites[clave]
+            partes.append("\n".join(lineas[inicio:fin]))
+    if llamada in LLAMADAS_CON_CIERRE:
+        ultima_incluida = max(limites[c][1] for c in claves if c in limites)
+        desde_cierre = max(ultima_incluida, len(lineas) - LINEAS_CIERRE)
+        if desde_cierre < len(lineas):
+            partes.append("[...]\n" + "\n".join(lineas[desde_cierre:]))
+    return "\n\n".join(p for p in partes if p.strip())
+
+
+def estimar_tokens(texto: str) -> int:
+    # Misma aproximación que el gateway: ~4 caracteres por token
+    return (len(texto) + 3) // 4
@@ -0,0 +1,72 @@
+"""Ingesta contra los servicios falsos del benchmark (benchmark/servicios_falsos.py).
+
+Los módulos de la ingesta leen el entorno al importarse: el gateway falso se levanta
+y el entorno se configura acá, antes de que los tests los importen.
+
+Correr desde scripts/ingest: python -m pytest test
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+AQUI = Path(__file__).resolve().parent
+sys.path.insert(0, str(AQUI.parent))
+sys.path.insert(0, str(AQUI.parent / "benchmark"))
+
+from actas_sinteticas import generar_acta  # noqa: E402
+from servicios_falsos import ServidorFalso, contar_filas_sqlite, usar_qdrant_local, usar_sqlite  # noqa: E402
+
+# Latencia suficiente para que dos ingestas se solapen
+_servidor = ServidorFalso([], latencia_ms=100, tokens_por_segundo=2000, latencia_embeddings_ms=1)
+_directorio = tempfile.mkdtemp(prefix="test_ingesta_")
+
+os.environ.update(
+    {
+        "BEDROCK_URL": _servidor.url,
+        "BEDROCK_API_KEY": "test",
+        "METRICAS_PATH": os.path.join(_directorio, "metricas.jsonl"),
+        "PRESUPUESTO_HISTORIAL": os.path.join(_directorio, "historial_tokens.json"),
+        "QDRANT_COLLECTION": "test_ingesta",
+        "EXTRACCION_STREAMING": "false",
+        "REINTENTOS_MAX": "0",
+    }
+)
+
+import extractor  # noqa: E402
+
+_servidor.llamadas = extractor.LLAMADAS
+usar_qdrant_local()
+
+
+@pytest.fixture
+def base(tmp_path) -> Path:
+    """Base SQLite nueva por test; devuelve su ruta"""
+    path = tmp_path / "ingesta.sqlite"
+    usar_sqlite(str(path))
+    return path
+
+
+@pytest.fixture
+def filas(base):
+    """Filas por tabla de la base del test"""
+    return lambda: contar_filas_sqlite(str(base))
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    """Crea un PDF de acta sintética con su Markdown ya extraído (sin Docling). Devuelve (path, esperado)"""
+    from estado import EstadoIngesta
+
+    def crear(numero: int, filas_por_seccion: int = 5) -> tuple:
+        path = tmp_path / f"ACTA_{numero}.pdf"
+        path.write_bytes(f"%PDF acta {numero}".encode())
+        markdown, esperado = generar_acta(numero, filas_por_seccion)
+        path.with_suffix(".md").write_text(markdown, encoding="utf-8")
+        EstadoIngesta(path).marcar("docling")
+        return path, esperado
+
+    return crear
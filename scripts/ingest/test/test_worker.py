@@ -0,0 +1,116 @@
+"""Ingestas concurrentes en el worker: checkpoint, inserción e historial de tokens compartidos."""
+
+import json
+import os
+import threading
+
+import psycopg2
+import pytest
+
+import cola
+import presupuesto
+from worker import Worker
+
+
+def procesar_en_paralelo(monkeypatch, trabajos: list) -> dict:
+    """Corre Worker._procesar de cada (job_id, pdf_path) en su propio hilo, a la vez. Devuelve job_id → resultado"""
+    resultados = {}
+    monkeypatch.setattr(cola, "completar", lambda conn, job_id, worker: resultados.__setitem__(job_id, "hecho"))
+    monkeypatch.setattr(
+        cola, "fallar",
+        lambda conn, job_id, worker, intentos, error, reintentar=True: resultados.__setitem__(job_id, error),
+    )
+    worker = Worker(concurrencia=len(trabajos))
+    hilos = [
+        threading.Thread(target=worker._procesar, args=(None, f"test-{job_id}", job_id, str(pdf_path), 1))
+        for job_id, pdf_path in trabajos
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return resultados
+
+
+def test_same_pdf_twice_concurrently_inserts_once(monkeypatch, pdf, filas):
+    path, esperado = pdf(9201)
+
+    resultados = procesar_en_paralelo(monkeypatch, [(1, path), (2, path)])
+
+    assert resultados == {1: "hecho", 2: "hecho"}
+    # La segunda esperó el lock y encontró la ingesta completa
+    assert filas() == {"actas": 1, "notas_ingresadas": esperado["notas"], "temas_varios": esperado["temas_varios"]}
+
+
+def test_different_pdfs_run_concurrently(monkeypatch, pdf, filas):
+    (primero, esperado_primero), (segundo, esperado_segundo) = pdf(9202), pdf(9203)
+
+    resultados = procesar_en_paralelo(monkeypatch, [(1, primero), (2, segundo)])
+
+    assert resultados == {1: "hecho", 2: "hecho"}
+    assert filas() == {
+        "actas": 2,
+        "notas_ingresadas": esperado_primero["notas"] + esperado_segundo["notas"],
+        "temas_varios": esperado_primero["temas_varios"] + esperado_segundo["temas_varios"],
+    }
+    # El historial sigue siendo JSON válido con las llamadas de las dos ingestas
+    historial = json.loads(presupuesto.HISTORIAL_PATH.read_text(encoding="utf-8"))
+    assert historial["temas varios"]["actas"] >= 2
+
+
+def test_concurrent_history_updates_are_not_lost():
+    historial_inicial = presupuesto.cargar_historial()
+    previas = historial_inicial.get("AS y AT", {}).get("actas", 0)
+
+    def registrar_varias():
+        historial = presupuesto.cargar_historial()
+        for _ in range(20):
+            presupuesto.registrar("AS y AT", 10, 2000, historial)
+
+    hilos = [threading.Thread(target=registrar_varias) for _ in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert presupuesto.cargar_historial()["AS y AT"]["actas"] == previas + 80
+
+
+@pytest.fixture
+def conn_cola():
+    """Conexión a un PostgreSQL descartable (COLA_TEST_DATABASE_URL), con ingest_jobs vacía"""
+    url = os.getenv("COLA_TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("COLA_TEST_DATABASE_URL no configurada")
+    conn = psycopg2.connect(url)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute("DROP TABLE IF EXISTS ingest_jobs")
+    cola.crear_tabla(conn)
+    yield conn
+    conn.close()
+
+
+def test_queue_refuses_a_second_active_job_for_a_path(conn_cola):
+    job_id, nuevo = cola.encolar(conn_cola, "/actas/ACTA_1.pdf")
+    assert nuevo
+    assert cola.encolar(conn_cola, "/actas/ACTA_1.pdf") == (job_id, False)
+
+    tomado = cola.tomar(conn_cola, "w1")
+    assert tomado[0] == job_id
+    assert cola.encolar(conn_cola, "/actas/ACTA_1.pdf") == (job_id, False)
+    assert cola.tomar(conn_cola, "w2") is None
+
+    cola.completar(conn_cola, job_id, "w1")
+    otro, nuevo = cola.encolar(conn_cola, "/actas/ACTA_1.pdf")
+    assert nuevo and otro != job_id
+
+
+def test_reencolar_errores_keeps_one_active_job_per_path(conn_cola):
+    for worker in ("w1", "w2"):
+        job_id, _ = cola.encolar(conn_cola, "/actas/ACTA_2.pdf")
+        cola.tomar(conn_cola, worker)
+        cola.fallar(conn_cola, job_id, worker, 1, "error", reintentar=False)
+
+    assert cola.reencolar_errores(conn_cola) == 1
+    assert cola.resumen(conn_cola) == {"error": 1, "pendiente": 1}
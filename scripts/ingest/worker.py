@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Worker de ingesta: procesa los PDFs encolados en ingest_jobs (ver cola.py).
+
+Uso:
+    python worker.py                          # procesa la cola hasta recibir SIGTERM/Ctrl+C
+    python worker.py encolar <pdf> [<pdf>...]  # agrega trabajos
+    python worker.py estado                   # trabajos por estado y últimos errores
+    python worker.py reencolar-errores
+
+Cada worker corre INGEST_CONCURRENCIA ingestas en paralelo (hilos: el trabajo
+es casi todo espera de Docling y del gateway). Para escalar se levantan más
+workers, en la misma máquina o en otros pods, contra la misma base; los PDFs
+tienen que estar en una ruta visible para todos (volumen compartido).
+
+Con --una-vez procesa lo pendiente y termina (útil para probar contra un
+Postgres local).
+"""
+
+import os
+import signal
+import socket
+import sys
+import threading
+import traceback
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import cola
+from ingest import ArchivoInvalido, ingestar
+from metricas import iniciar_prometheus
+
+INGEST_CONCURRENCIA = int(os.getenv("INGEST_CONCURRENCIA", "2"))
+# Espera entre consultas cuando la cola está vacía
+COLA_ESPERA_SEGUNDOS = float(os.getenv("COLA_ESPERA_SEGUNDOS", "5"))
+
+
+class Worker:
+    def __init__(self, concurrencia: int = INGEST_CONCURRENCIA, una_vez: bool = False):
+        self.concurrencia = concurrencia
+        self.una_vez = una_vez
+        self.nombre = f"{socket.gethostname()}-{os.getpid()}"
+        self.detener = threading.Event()
+        self.en_curso = {}
+        self.lock = threading.Lock()
+
+    def ejecutar(self):
+        conn = cola.conectar()
+        cola.crear_tabla(conn)
+        conn.close()
+        print(f"[Worker] {self.nombre}: {self.concurrencia} ingestas en paralelo")
+
+        hilos = [
+            threading.Thread(target=self._bucle, args=(f"{self.nombre}-{i}",), name=f"ingesta-{i}")
+            for i in range(self.concurrencia)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        latido = threading.Thread(target=self._renovar_leases, name="leases", daemon=True)
+        latido.start()
+        for hilo in hilos:
+            hilo.join()
+        print(f"[Worker] {self.nombre}: detenido")
+
+    def _bucle(self, worker: str):
+        conn = cola.conectar()
+        try:
+            while not self.detener.is_set():
+                trabajo = cola.tomar(conn, worker)
+                if trabajo is None:
+                    if self.una_vez:
+                        return
+                    self.detener.wait(COLA_ESPERA_SEGUNDOS)
+                    continue
+                self._procesar(conn, worker, *trabajo)
+        finally:
+            conn.close()
+
+    def _procesar(self, conn, worker: str, job_id: int, pdf_path: str, intentos: int):
+        if intentos > cola.COLA_MAX_INTENTOS:
+            # Tomado de nuevo por lease vencido: el worker anterior murió procesándolo
+            cola.fallar(conn, job_id, worker, intentos, "Lease vencido en todos los intentos", reintentar=False)
+            print(f"[Worker] Trabajo {job_id} ({pdf_path}): sin intentos restantes")
+            return
+
+        print(f"[Worker] Trabajo {job_id}: {pdf_path} (intento {intentos}/{cola.COLA_MAX_INTENTOS})")
+        with self.lock:
+            self.en_curso[job_id] = worker
+        try:
+            ingestar(pdf_path)
+        except ArchivoInvalido as e:
+            cola.fallar(conn, job_id, worker, intentos, str(e), reintentar=False)
+            print(f"[Worker] Trabajo {job_id}: ERROR {e}")
+        except Exception as e:
+            traceback.print_exc()
+            demora = cola.fallar(conn, job_id, worker, intentos, f"{type(e).__name__}: {e}")
+            if demora is None:
+                print(f"[Worker] Trabajo {job_id}: ERROR definitivo después de {intentos} intentos")
+            else:
+                print(f"[Worker] Trabajo {job_id}: falló, se reintenta en {demora:.0f}s")
+        else:
+            cola.completar(conn, job_id, worker)
+            print(f"[Worker] Trabajo {job_id}: OK")
+        finally:
+            with self.lock:
+                del self.en_curso[job_id]
+
+    def _renovar_leases(self):
+        # Un solo hilo renueva el lease de todos los trabajos en curso de este proceso
+        conn = cola.conectar()
+        try:
+            while not self.detener.wait(cola.COLA_LEASE_SEGUNDOS / 3):
+                with self.lock:
+                    por_worker = {}
+                    for job_id, worker in self.en_curso.items():
+                        por_worker.setdefault(worker, []).append(job_id)
+                for worker, job_ids in por_worker.items():
+                    cola.renovar(conn, job_ids, worker)
+        finally:
+            conn.close()
+
+    def parar(self, *_):
+        if not self.detener.is_set():
+            print(f"[Worker] {self.nombre}: deteniendo, se terminan las ingestas en curso")
+        self.detener.set()
+
+
+def main(argumentos: list):
+    if argumentos and argumentos[0] in ("encolar", "estado", "reencolar-errores"):
+        conn = cola.conectar()
+        cola.crear_tabla(conn)
+        try:
+            if argumentos[0] == "encolar":
+                if len(argumentos) < 2:
+                    print("Uso: python worker.py encolar <pdf> [<pdf>...]")
+                    sys.exit(1)
+                for pdf in argumentos[1:]:
+                    # Ruta absoluta: el worker puede correr en otro directorio
+                    job_id, nuevo = cola.encolar(conn, os.path.abspath(pdf))
+                    print(f"[Cola] {pdf} → trabajo {job_id}" + ("" if nuevo else " (ya estaba en la cola)"))
+            elif argumentos[0] == "estado":
+                for estado, cantidad in cola.resumen(conn).items():
+                    print(f"{estado:12} {cantidad}")
+                for job_id, pdf_path, intentos, error in cola.errores(conn):
+                    print(f"  #{job_id} {pdf_path} ({intentos} intentos): {error}")
+            else:
+                print(f"[Cola] {cola.reencolar_errores(conn)} trabajos reencolados")
+        finally:
+            conn.close()
+        return
+
+    if argumentos not in ([], ["--una-vez"]):
+        print(__doc__)
+        sys.exit(1)
+    iniciar_prometheus()
+    worker = Worker(una_vez=argumentos == ["--una-vez"])
+    signal.signal(signal.SIGTERM, worker.parar)
+    signal.signal(signal.SIGINT, worker.parar)
+    worker.ejecutar()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])